@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+import discord
+from board import character_key
+from database import connect
+from delivery import TokenBucket, fan_out
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_KINDS = ('dm', 'mention')
+# Discord allows 2000 characters per message; a user mention is at most 22
+MENTIONS_PER_MESSAGE = 80
+
+
+@dataclass(frozen=True)
+class Alert:
+    """One user's alert for one character"""
+    user_id: int
+    character: str
+    delivery: str = 'dm'
+    # Guild whose announcement channel carries the mention when delivery is 'mention'
+    guild_id: Optional[int] = None
+
+
+class AlertRegistry:
+    """Persistent per-user character alerts with an inverted index from character to users
+
+    Finding who to alert when a twisted appears is a single dict lookup, no
+    matter how many alerts exist.
+    """
+
+    def __init__(self, path: str):
+        self.db = connect(path)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS character_alerts (
+                user_id INTEGER NOT NULL,
+                character TEXT NOT NULL,
+                delivery TEXT NOT NULL DEFAULT 'dm',
+                guild_id INTEGER,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (user_id, character)
+            );
+            CREATE TABLE IF NOT EXISTS user_dm_channels (
+                user_id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL
+            );
+        ''')
+        self.db.commit()
+        self._by_character: Dict[str, Dict[int, Alert]] = {}
+        self._by_user: Dict[int, Set[str]] = {}
+        self._dm_channels: Dict[int, int] = {}
+        self._load()
+
+    def _load(self):
+        """Build the in-memory indexes from the database"""
+        for row in self.db.execute('SELECT user_id, character, delivery, guild_id FROM character_alerts'):
+            self._index(Alert(row['user_id'], row['character'], row['delivery'], row['guild_id']))
+        for row in self.db.execute('SELECT user_id, channel_id FROM user_dm_channels'):
+            self._dm_channels[row['user_id']] = row['channel_id']
+        logger.info("Loaded %s character alerts for %s users", len(self), len(self._by_user))
+
+    def _index(self, alert: Alert):
+        self._by_character.setdefault(alert.character, {})[alert.user_id] = alert
+        self._by_user.setdefault(alert.user_id, set()).add(alert.character)
+
+    def __len__(self) -> int:
+        return sum(len(users) for users in self._by_character.values())
+
+    def subscribers(self, twisted_name: str) -> List[Alert]:
+        """Every alert for a twisted"""
+        return list(self._by_character.get(character_key(twisted_name), {}).values())
+
+    def user_ids(self, twisted_name: str) -> FrozenSet[int]:
+        """IDs of every user alerted for a twisted"""
+        return frozenset(self._by_character.get(character_key(twisted_name), ()))
+
+    def characters_for(self, user_id: int) -> List[str]:
+        """Characters a user has alerts for"""
+        return sorted(self._by_user.get(user_id, ()))
+
+    def add(self, alert: Alert) -> bool:
+        """Add or update an alert, returning whether it is new"""
+        alert = Alert(alert.user_id, character_key(alert.character), alert.delivery, alert.guild_id)
+        is_new = alert.user_id not in self._by_character.get(alert.character, {})
+        self.db.execute(
+            'INSERT OR REPLACE INTO character_alerts (user_id, character, delivery, guild_id, created_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (alert.user_id, alert.character, alert.delivery, alert.guild_id, time.time())
+        )
+        self.db.commit()
+        self._index(alert)
+        return is_new
+
+    def remove(self, user_id: int, twisted_name: str) -> bool:
+        """Remove one alert, returning whether it existed"""
+        character = character_key(twisted_name)
+        self.db.execute('DELETE FROM character_alerts WHERE user_id = ? AND character = ?', (user_id, character))
+        self.db.commit()
+        users = self._by_character.get(character, {})
+        if users.pop(user_id, None) is None:
+            return False
+        if not users:
+            del self._by_character[character]
+        characters = self._by_user.get(user_id)
+        if characters is not None:
+            characters.discard(character)
+            if not characters:
+                del self._by_user[user_id]
+        return True
+
+    def remove_user(self, user_id: int) -> int:
+        """Remove every alert a user has, returning how many there were"""
+        characters = self.characters_for(user_id)
+        for character in characters:
+            self.remove(user_id, character)
+        return len(characters)
+
+    def dm_channel(self, user_id: int) -> Optional[int]:
+        """Cached DM channel ID for a user"""
+        return self._dm_channels.get(user_id)
+
+    def remember_dm_channel(self, user_id: int, channel_id: int):
+        """Cache a user's DM channel so later alerts skip opening it"""
+        self._dm_channels[user_id] = channel_id
+        self.db.execute(
+            'INSERT OR REPLACE INTO user_dm_channels (user_id, channel_id) VALUES (?, ?)',
+            (user_id, channel_id)
+        )
+        self.db.commit()
+
+    def close(self):
+        """Close the database connection"""
+        self.db.close()
+
+
+class AlertDispatcher:
+    """Background queue that delivers character alerts without holding up the monitor
+
+    `enqueue()` only matches the twisted against the index and queues the
+    job. A worker then delivers it in batches through the shared token
+    bucket, so alerts never push the process past Discord's global rate
+    limit. Mention alerts for the same guild are packed into as few messages
+    as possible. DMs go one per user, reusing cached DM channels.
+    """
+
+    def __init__(self, client: discord.Client, registry: AlertRegistry, subscriptions,
+                 limiter: Optional[TokenBucket] = None, concurrency: int = 20, batch_size: int = 500):
+        self.client = client
+        self.registry = registry
+        self.subscriptions = subscriptions
+        self.limiter = limiter or TokenBucket(40.0)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the delivery worker"""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the delivery worker, dropping anything still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+    async def join(self):
+        """Wait until every queued alert has been delivered"""
+        await self.queue.join()
+
+    def enqueue(self, twisted_name: str, message: str) -> int:
+        """Queue alerts for everyone watching a twisted, returning how many were matched"""
+        alerts = self.registry.subscribers(twisted_name)
+        if alerts:
+            self.queue.put_nowait((twisted_name, message, alerts))
+            logger.info("Queued %s alerts for %s", len(alerts), twisted_name)
+        return len(alerts)
+
+    def _plan(self, alerts: List[Alert]) -> Tuple[Dict[int, List[int]], List[int]]:
+        """Split alerts into mention batches per announcement channel and individual DMs"""
+        mentions: Dict[int, List[int]] = {}
+        dms: List[int] = []
+        for alert in alerts:
+            subscription = self.subscriptions.get(alert.guild_id) if alert.delivery == 'mention' else None
+            if subscription is not None:
+                mentions.setdefault(subscription.channel_id, []).append(alert.user_id)
+            else:
+                # DMs, and mentions for guilds that no longer announce anywhere
+                dms.append(alert.user_id)
+        return mentions, dms
+
+    async def _send_mentions(self, target: tuple):
+        channel_id, user_ids, message = target
+        channel = self.client.get_partial_messageable(channel_id)
+        content = f"{message}\n{' '.join(f'<@{user_id}>' for user_id in user_ids)}"
+        await channel.send(content, allowed_mentions=discord.AllowedMentions(users=True, roles=False, everyone=False))
+        metrics.inc('totb_alert_deliveries_total', len(user_ids), kind='mention', result='sent')
+
+    async def _send_dm(self, target: tuple):
+        user_id, message = target
+        channel_id = self.registry.dm_channel(user_id)
+        try:
+            if channel_id is None:
+                # Opening a DM channel is its own request; the ID is cached for next time
+                await self.limiter.acquire()
+                dm = await self.client.create_dm(discord.Object(id=user_id))
+                channel_id = dm.id
+                self.registry.remember_dm_channel(user_id, channel_id)
+            channel = self.client.get_partial_messageable(channel_id, type=discord.ChannelType.private)
+            await channel.send(message)
+            metrics.inc('totb_alert_deliveries_total', kind='dm', result='sent')
+        except discord.Forbidden:
+            # DMs closed or the bot is blocked - stop trying this user
+            removed = self.registry.remove_user(user_id)
+            logger.info("Can't DM user %s - removed their %s alerts", user_id, removed)
+            metrics.inc('totb_alert_deliveries_total', kind='dm', result='forbidden')
+            raise
+
+    def _targets(self, mentions: Dict[int, List[int]], dms: List[int], message: str):
+        """(send, args) for every message of a delivery, generated as batches ask for them"""
+        for channel_id, user_ids in mentions.items():
+            for start in range(0, len(user_ids), MENTIONS_PER_MESSAGE):
+                yield self._send_mentions, (channel_id, user_ids[start:start + MENTIONS_PER_MESSAGE], message)
+        for user_id in dms:
+            yield self._send_dm, (user_id, message)
+
+    async def deliver(self, twisted_name: str, message: str, alerts: List[Alert]):
+        """Deliver one board change's alerts in batches"""
+        started = time.monotonic()
+        mentions, dms = self._plan(alerts)
+        targets = self._targets(mentions, dms, message)
+
+        sent = failed = 0
+        # Only one batch of messages is built at a time, however many subscribers there are
+        while True:
+            batch = list(islice(targets, self.batch_size))
+            if not batch:
+                break
+            result = await fan_out(
+                batch,
+                lambda target: target[0](target[1]),
+                concurrency=self.concurrency,
+                limiter=self.limiter
+            )
+            sent += result.sent
+            failed += len(result.failed)
+        logger.info(
+            "Delivered %s alert messages for %s in %.1fs (%s failed)",
+            sent, twisted_name, time.monotonic() - started, failed
+        )
+
+    async def _run(self):
+        while True:
+            twisted_name, message, alerts = await self.queue.get()
+            try:
+                await self.deliver(twisted_name, message, alerts)
+            except Exception as e:
+                logger.error("Error delivering alerts for %s: %s", twisted_name, e)
+            finally:
+                self.queue.task_done()
+
+
+def alert_message(twisted_name: str, wiki_url: str) -> str:
+    """Text of a character alert"""
+    return f"🎭 **{twisted_name}** is on the Daily Twisted Board now! <{wiki_url}>"
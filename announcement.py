@@ -0,0 +1,74 @@
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+EMBED_COLOR = 0xFF6B6B
+
+
+def build_announcement_embed(current_twisted: str, reason: str = "", image_url: Optional[str] = None,
+                             wiki_url: str = "", character_url: Optional[str] = None) -> dict:
+    """Build the board announcement as a Discord embed payload
+
+    Plain JSON so the same embed can go through the gateway bot or straight
+    to webhooks without importing discord.py. With `character_url` the
+    twisted's name links to its wiki page.
+    """
+    name = f"[{current_twisted}]({character_url})" if character_url else current_twisted
+    fields = [{"name": "Current Twisted", "value": name, "inline": False}]
+    if reason:
+        fields.append({"name": "Update Reason", "value": reason, "inline": False})
+    fields.append({"name": "📍 Source", "value": f"[Daily Twisted Board Wiki]({wiki_url})", "inline": False})
+
+    embed = {
+        "title": "🎭 Daily Twisted Board Update!",
+        "description": "Currently, the board is occupied by:",
+        "color": EMBED_COLOR,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "fields": fields,
+        "footer": {"text": "Dandy's World Bot"}
+    }
+
+    # Add image if available
+    if image_url:
+        embed["image"] = {"url": image_url}
+        logger.info("Added image to embed: %s", image_url)
+    else:
+        logger.warning("No image URL available for this twisted character")
+
+    return embed
+
+
+def announcement_targets(subscriptions, config) -> list:
+    """Every (channel ID, guild ID, ping mentions) to announce to"""
+    targets = [
+        (sub.channel_id, sub.guild_id, sub.get_ping_mentions())
+        for sub in subscriptions.all()
+    ]
+
+    # The configured channel keeps working alongside guild subscriptions
+    channel_id = config.get_channel_id()
+    if channel_id and channel_id not in {target[0] for target in targets}:
+        targets.append((channel_id, None, config.get_ping_mentions()))
+    return targets
+
+
+def build_watch_embed(change) -> dict:
+    """Embed payload for a change on a watched page"""
+    fields = [
+        {
+            "name": name,
+            "value": f"{change.previous.get(name) or 'nothing'} → {change.current.get(name) or 'nothing'}"[:1024],
+            "inline": False
+        }
+        for name in change.changed
+    ]
+    return {
+        "title": f"🔔 {change.target.name} updated",
+        "url": change.target.url,
+        "color": EMBED_COLOR,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "fields": fields,
+        "footer": {"text": "Dandy's World Bot"}
+    }
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""Backfill the board's rotation history from the wiki page's revision history.
+
+Lists every revision of the Daily Twisted Board through the MediaWiki
+revisions API, renders each one with action=parse and reads it with the
+scraper's own board parser, and stores the results in the snapshot database.
+Progress is saved per batch, so an interrupted run picks up where it left
+off and a later run only fetches revisions made since.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from dataclasses import astuple, dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+from config import Config
+from fetch_cache import content_hash
+from fetch_policy import CircuitOpenError, FetchError, http_error
+from scraper import DailyTwistedScraper, extract_board_snapshot, slice_board_section
+from snapshot_store import SnapshotStore
+from utils import setup_logging
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+# Some revisions failed with errors worth retrying; run again to resume
+EXIT_INCOMPLETE = 1
+
+
+def parse_timestamp(value: str) -> float:
+    """Unix time of a MediaWiki timestamp such as 2026-10-16T00:01:02Z"""
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp()
+
+
+def format_timestamp(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+@dataclass
+class RevisionResult:
+    """What one revision of the page showed; field order matches SnapshotStore.record_revisions"""
+    revision_id: int
+    twisted: Optional[str] = None
+    timer: Optional[str] = None
+    image_url: Optional[str] = None
+    content_hash: Optional[str] = None
+    # Set when the revision can never be read (deleted, suppressed, ...)
+    error: Optional[str] = None
+
+
+@dataclass
+class BackfillResult:
+    listed: int = 0
+    parsed: int = 0
+    failed: int = 0
+    deferred: int = 0
+    elapsed: float = 0.0
+
+
+class RevisionBackfill:
+    """Walks the board page's revision history into the snapshot store
+
+    Listing pages through the revisions API oldest first and records each
+    revision's ID and edit time. Pending revisions are then rendered in
+    batches, at most `concurrency` requests at once over the scraper's
+    session and fetch policy, and parsed off the event loop. The revisions
+    table doubles as the checkpoint: every batch is committed when it
+    finishes, listing resumes from the newest revision recorded, and only
+    unparsed revisions are fetched. Revisions that fail with retryable
+    errors stay pending for the next run.
+    """
+
+    LIST_LIMIT = 500
+
+    def __init__(self, scraper: DailyTwistedScraper, store: SnapshotStore, concurrency: int = 4,
+                 batch_size: int = 50):
+        self.scraper = scraper
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def _api(self, params: dict) -> dict:
+        """One MediaWiki API call under the scraper's fetch policy"""
+        async def request():
+            session = await self.scraper.get_session()
+            query = dict(params, format='json', formatversion='2')
+            async with session.get(self.scraper.api_url, params=query) as response:
+                if response.status != 200:
+                    raise http_error(response.status)
+                data = await response.json(content_type=None)
+            error = data.get('error')
+            if error:
+                code = error.get('code', 'unknown')
+                raise FetchError('api_error', retryable=code in ('ratelimited', 'maxlag', 'readonly'),
+                                 message=f"MediaWiki API error {code}: {error.get('info', '')}")
+            return data
+
+        return await self.scraper.fetch_policy.run('revisions', request)
+
+    async def list_revisions(self) -> int:
+        """Record revisions newer than the newest one already stored, returning how many were new"""
+        params = {
+            'action': 'query',
+            'prop': 'revisions',
+            'titles': self.scraper.PAGE_TITLE,
+            'rvprop': 'ids|timestamp',
+            'rvlimit': self.LIST_LIMIT,
+            'rvdir': 'newer',
+        }
+        since = self.store.latest_revision_time()
+        if since is not None:
+            # rvstart is inclusive; the newest stored revision comes back and is ignored
+            params['rvstart'] = format_timestamp(since)
+
+        added = 0
+        while True:
+            data = await self._api(params)
+            pages = data.get('query', {}).get('pages') or [{}]
+            if pages[0].get('missing'):
+                raise FetchError('missing_page', retryable=False, message=f"{self.scraper.PAGE_TITLE} doesn't exist")
+            revisions = pages[0].get('revisions', [])
+            added += self.store.add_revisions(
+                (revision['revid'], parse_timestamp(revision['timestamp'])) for revision in revisions
+            )
+            if 'continue' not in data:
+                return added
+            params.update(data['continue'])
+            logger.info("Listed %s new revisions so far", added)
+
+    def _parse(self, revision_id: int, html: str) -> RevisionResult:
+        # Same section and parser as live checks, so hashes line up with board_snapshots;
+        # skips the scraper's single-entry parse cache, which is no use across revisions
+        section = slice_board_section(html)
+        snapshot = extract_board_snapshot(section, self.scraper.parser)
+        twisted = self.scraper.characters.canonical_name(snapshot.twisted) if snapshot.twisted else None
+        return RevisionResult(revision_id, twisted, snapshot.timer, snapshot.image_url, content_hash(section))
+
+    async def fetch_revision(self, revision_id: int) -> RevisionResult:
+        """Render and parse one revision; raises FetchError when it's worth trying again later"""
+        async with self._slots:
+            try:
+                data = await self._api({'action': 'parse', 'oldid': revision_id, 'prop': 'text'})
+            except CircuitOpenError:
+                raise
+            except FetchError as e:
+                if e.retryable:
+                    raise
+                return RevisionResult(revision_id, error=str(e))
+        # BeautifulSoup work - keep the other fetches moving
+        return await asyncio.to_thread(self._parse, revision_id, data['parse']['text'])
+
+    async def run(self, limit: Optional[int] = None) -> BackfillResult:
+        """List new revisions, then parse pending ones until none are left (or `limit` were tried)"""
+        started = time.monotonic()
+        result = BackfillResult(listed=await self.list_revisions())
+        logger.info("Listed %s new revisions", result.listed)
+
+        last_id = 0
+        while limit is None or result.parsed + result.failed + result.deferred < limit:
+            size = self.batch_size
+            if limit is not None:
+                size = min(size, limit - result.parsed - result.failed - result.deferred)
+            pending: List[int] = self.store.pending_revisions(after=last_id, limit=size)
+            if not pending:
+                break
+
+            outcomes = await asyncio.gather(*(self.fetch_revision(rid) for rid in pending), return_exceptions=True)
+            parsed = []
+            for revision_id, outcome in zip(pending, outcomes):
+                if isinstance(outcome, RevisionResult):
+                    parsed.append(astuple(outcome))
+                    if outcome.error:
+                        result.failed += 1
+                        logger.warning("Revision %s can't be read: %s", revision_id, outcome.error)
+                    else:
+                        result.parsed += 1
+                else:
+                    # Left unparsed, so the next run retries it
+                    result.deferred += 1
+                    logger.warning("Revision %s deferred: %s", revision_id, outcome)
+            self.store.record_revisions(parsed)
+            last_id = pending[-1]
+
+            rate = (result.parsed + result.failed) / max(time.monotonic() - started, 1e-9)
+            logger.info(
+                "Parsed %s revisions (%s unreadable, %s deferred) - %.1f/s",
+                result.parsed, result.failed, result.deferred, rate
+            )
+            if self.scraper.fetch_policy.breaker.state == 'open':
+                logger.warning("The wiki keeps failing - stopping here; run again to resume")
+                break
+
+        result.elapsed = time.monotonic() - started
+        return result
+
+
+async def backfill(config: Config, concurrency: int, batch_size: int, limit: Optional[int]) -> int:
+    scraper = DailyTwistedScraper.from_config(config)
+    store = SnapshotStore(config.get_database_path())
+    try:
+        result = await RevisionBackfill(scraper, store, concurrency, batch_size).run(limit)
+    except FetchError as e:
+        logger.error("Backfill stopped: %s", e)
+        return EXIT_INCOMPLETE
+    finally:
+        await scraper.close()
+        store.close()
+
+    logger.info(
+        "Backfill finished in %.1fs: %s new revisions listed, %s parsed, %s unreadable, %s deferred",
+        result.elapsed, result.listed, result.parsed, result.failed, result.deferred
+    )
+    return EXIT_INCOMPLETE if result.deferred else EXIT_OK
+
+
+def print_rotation(config: Config):
+    store = SnapshotStore(config.get_database_path())
+    try:
+        for day, twisted in store.daily_rotation():
+            print(f"{day}  {twisted}")
+    finally:
+        store.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=4, help="revisions rendered at once")
+    parser.add_argument('--batch-size', type=int, default=50, help="revisions per checkpoint")
+    parser.add_argument('--limit', type=int, help="stop after this many revisions")
+    parser.add_argument('--base-url', help="wiki to read, e.g. a local stand-in API (default WIKI_BASE_URL)")
+    parser.add_argument('--rotation', action='store_true', help="print the twisted for each day and exit")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    # Reading the wiki doesn't need Discord credentials
+    config = Config(validate=False)
+    if args.base_url:
+        config.wiki_base_url = args.base_url.rstrip('/')
+
+    if args.rotation:
+        print_rotation(config)
+        return EXIT_OK
+    return asyncio.run(backfill(config, args.concurrency, args.batch_size, args.limit))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Backfill check: run backfill.py's RevisionBackfill against a stand-in wiki serving recorded revisions.
+
+An in-process stand-in answers the two API calls the backfill makes -
+prop=revisions listings (paged, honouring rvstart) and action=parse&oldid=
+renders - from fixtures/revisions/. The check interrupts a run in the
+middle of a batch, resumes it with one revision failing retryably, retries
+the deferred revision, then publishes a new revision and runs again. It
+verifies that finished batches are never fetched again, that the
+interrupted batch and the deferred revision are, and that the stored
+rotation matches fixtures/revisions/expected.json.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+from collections import Counter
+from aiohttp import web
+from backfill import RevisionBackfill, parse_timestamp
+from fetch_policy import FetchPolicy
+from scraper import DailyTwistedScraper
+from snapshot_store import SnapshotStore
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'revisions')
+BATCH_SIZE = 3
+CONCURRENCY = 2
+
+
+class StandInWiki:
+    """api.php for the board page's history, from recorded responses"""
+
+    def __init__(self, fixture_dir: str):
+        self.fixture_dir = fixture_dir
+        with open(os.path.join(fixture_dir, 'revisions.json'), encoding='utf-8') as f:
+            self.listing = json.load(f)
+        self.revisions = self.listing['query']['pages'][0]['revisions']
+        # How many revisions exist yet; raising it publishes the rest
+        self.visible = len(self.revisions)
+        self.parse_requests = Counter()
+        # Revisions that answer 503 the next time they're rendered
+        self.fail_once = set()
+        # A render that hangs until released, to interrupt a run mid-batch
+        self.block = None
+        self.blocked = asyncio.Event()
+        self.released = asyncio.Event()
+        self.base_url = None
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/api.php', self.api)
+        return app
+
+    async def api(self, request):
+        action = request.query.get('action')
+        if action == 'query':
+            return self.list_revisions(request.query)
+        if action == 'parse':
+            return await self.parse(int(request.query['oldid']))
+        return web.json_response({'error': {'code': 'badvalue', 'info': f"Unrecorded action {action}"}})
+
+    def list_revisions(self, query) -> web.Response:
+        revisions = self.revisions[:self.visible]
+        if 'rvstart' in query:
+            since = parse_timestamp(query['rvstart'])
+            revisions = [r for r in revisions if parse_timestamp(r['timestamp']) >= since]
+        if 'rvcontinue' in query:
+            after = int(query['rvcontinue'].split('|')[1])
+            revisions = [r for r in revisions if r['revid'] >= after]
+
+        limit = int(query.get('rvlimit', 50))
+        page = dict(self.listing['query']['pages'][0], revisions=revisions[:limit])
+        data = {'query': {'pages': [page]}}
+        if len(revisions) > limit:
+            # MediaWiki's continuation token: the next revision's timestamp digits and ID
+            following = revisions[limit]
+            stamp = ''.join(ch for ch in following['timestamp'] if ch.isdigit())
+            data['continue'] = {'rvcontinue': f"{stamp}|{following['revid']}", 'continue': '||'}
+        else:
+            data['batchcomplete'] = True
+        return web.json_response(data)
+
+    async def parse(self, revision_id: int) -> web.Response:
+        self.parse_requests[revision_id] += 1
+        if revision_id == self.block:
+            self.blocked.set()
+            await self.released.wait()
+        if revision_id in self.fail_once:
+            self.fail_once.discard(revision_id)
+            return web.Response(status=503, text="Service Unavailable")
+        path = os.path.join(self.fixture_dir, 'parse', f"{revision_id}.json")
+        if not os.path.exists(path):
+            return web.json_response({'error': {'code': 'nosuchrevid',
+                                                'info': f"There is no revision with ID {revision_id}."}})
+        with open(path, encoding='utf-8') as f:
+            return web.Response(text=f.read(), content_type='application/json')
+
+
+class Checks:
+    def __init__(self):
+        self.failed = 0
+
+    def expect(self, description: str, ok: bool, detail=''):
+        print(f"  {'ok    ' if ok else 'FAILED'}  {description}" + (f" ({detail})" if detail and not ok else ''))
+        if not ok:
+            self.failed += 1
+
+
+def new_backfill(wiki: StandInWiki, store: SnapshotStore) -> RevisionBackfill:
+    # One attempt per render, so a 503 defers the revision instead of being retried in place
+    scraper = DailyTwistedScraper(base_url=wiki.base_url, fetch_policy=FetchPolicy(max_attempts=1))
+    return RevisionBackfill(scraper, store, concurrency=CONCURRENCY, batch_size=BATCH_SIZE)
+
+
+def pending(store: SnapshotStore) -> list:
+    return store.pending_revisions(limit=1000)
+
+
+async def run_checks(fixture_dir: str) -> int:
+    with open(os.path.join(fixture_dir, 'expected.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+
+    wiki = StandInWiki(fixture_dir)
+    runner = web.AppRunner(wiki.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    wiki.base_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    checks = Checks()
+    revision_ids = [revision['revid'] for revision in wiki.revisions]
+    first_batch = revision_ids[:BATCH_SIZE]
+    interrupted_batch = revision_ids[BATCH_SIZE:2 * BATCH_SIZE]
+    with tempfile.TemporaryDirectory() as directory:
+        store = SnapshotStore(os.path.join(directory, 'backfill.db'))
+        try:
+            print("Interrupted run")
+            wiki.visible = len(revision_ids) - 1
+            wiki.block = interrupted_batch[0]
+            backfill = new_backfill(wiki, store)
+            task = asyncio.create_task(backfill.run())
+            await asyncio.wait_for(wiki.blocked.wait(), timeout=30)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await backfill.scraper.close()
+            wiki.block = None
+            wiki.released.set()
+            checks.expect("every visible revision was listed",
+                          store.db.execute('SELECT COUNT(*) FROM board_revisions').fetchone()[0] == wiki.visible)
+            checks.expect("the finished batch is stored", not set(first_batch) & set(pending(store)))
+            checks.expect("the interrupted batch is still pending",
+                          set(interrupted_batch) <= set(pending(store)), pending(store))
+
+            print("Resumed run, one revision failing with a 503")
+            deferred_id = revision_ids[2 * BATCH_SIZE]
+            wiki.fail_once.add(deferred_id)
+            backfill = new_backfill(wiki, store)
+            try:
+                result = await backfill.run()
+            finally:
+                await backfill.scraper.close()
+            checks.expect("no new revisions listed", result.listed == 0, result.listed)
+            checks.expect("the finished batch wasn't fetched again",
+                          all(wiki.parse_requests[rid] == 1 for rid in first_batch),
+                          {rid: wiki.parse_requests[rid] for rid in first_batch})
+            checks.expect("the interrupted render was fetched again", wiki.parse_requests[interrupted_batch[0]] == 2,
+                          wiki.parse_requests[interrupted_batch[0]])
+            checks.expect("the interrupted batch is stored", not set(interrupted_batch) & set(pending(store)),
+                          pending(store))
+            checks.expect("one revision deferred", result.deferred == 1 and pending(store) == [deferred_id],
+                          f"deferred {result.deferred}, pending {pending(store)}")
+            checks.expect("deleted revisions are stored as unreadable", result.failed == len(expected['unreadable']),
+                          result.failed)
+
+            print("Retry of the deferred revision")
+            backfill = new_backfill(wiki, store)
+            try:
+                result = await backfill.run()
+            finally:
+                await backfill.scraper.close()
+            checks.expect("only the deferred revision was fetched", result.parsed == 1 and result.deferred == 0,
+                          result)
+            checks.expect("nothing is pending", not pending(store), pending(store))
+
+            print("Incremental run after a new edit")
+            wiki.visible = len(revision_ids)
+            before = sum(wiki.parse_requests.values())
+            backfill = new_backfill(wiki, store)
+            try:
+                result = await backfill.run()
+            finally:
+                await backfill.scraper.close()
+            checks.expect("only the new revision was listed and fetched",
+                          result.listed == 1 and result.parsed == 1 and sum(wiki.parse_requests.values()) == before + 1,
+                          result)
+
+            print("Stored history")
+            rotation = dict(store.daily_rotation())
+            checks.expect("daily rotation matches", rotation == expected['rotation'], rotation)
+            unreadable = [row[0] for row in store.db.execute(
+                'SELECT revision_id FROM board_revisions WHERE error IS NOT NULL ORDER BY revision_id')]
+            checks.expect("unreadable revisions match", unreadable == expected['unreadable'], unreadable)
+            for revision_id, image_url in expected['images'].items():
+                row = store.db.execute('SELECT image_url FROM board_revisions WHERE revision_id = ?',
+                                       (int(revision_id),)).fetchone()
+                checks.expect(f"revision {revision_id} has its artwork", row[0] == image_url, row[0])
+        finally:
+            store.close()
+            await runner.cleanup()
+
+    print(f"\n{'All checks passed' if not checks.failed else f'{checks.failed} checks failed'}")
+    return 1 if checks.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help="recorded revisions directory")
+    args = parser.parse_args()
+    # Deferred and unreadable revisions are part of the script; the checks report them
+    logging.disable(logging.ERROR)
+    # Short listing pages, so the recorded history takes several continued requests
+    RevisionBackfill.LIST_LIMIT = 3
+    return asyncio.run(run_checks(args.fixtures))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Fetch policy check: drive FetchPolicy's circuit breaker through its states with scripted requests.
+
+No network is involved: requests are coroutines that succeed, fail
+retryably or hang until cancelled. Covers opening after repeated failures,
+a successful and a failed half-open trial, a second request during a trial,
+and trials and ordinary requests that are cancelled (shutdown, or the
+watcher stopping on demotion), which must neither count as failures nor
+leave the breaker waiting on a trial that will never finish.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from fetch_policy import CircuitBreaker, CircuitOpenError, FetchError, FetchPolicy
+
+RESET_TIMEOUT = 0.05
+
+
+class Checks:
+    def __init__(self):
+        self.failed = 0
+
+    def expect(self, description: str, ok: bool, detail=''):
+        print(f"  {'ok    ' if ok else 'FAILED'}  {description}" + (f" ({detail})" if detail and not ok else ''))
+        if not ok:
+            self.failed += 1
+
+
+async def succeed():
+    return 'board'
+
+
+async def fail():
+    raise FetchError('http_503', retryable=True, message="HTTP 503")
+
+
+async def hang():
+    await asyncio.Event().wait()
+
+
+def new_policy(threshold: int = 2) -> FetchPolicy:
+    return FetchPolicy(max_attempts=1, breaker=CircuitBreaker(threshold, RESET_TIMEOUT))
+
+
+async def outcome(policy: FetchPolicy, request) -> str:
+    """'ok', the FetchError cause, or 'circuit_open'"""
+    try:
+        await policy.run('check', request)
+        return 'ok'
+    except FetchError as error:
+        return error.cause
+
+
+async def cancelled(policy: FetchPolicy, request=hang):
+    """Start a request and cancel it while it's in flight"""
+    task = asyncio.ensure_future(policy.run('check', request))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def open_breaker(policy: FetchPolicy):
+    for _ in range(policy.breaker.failure_threshold):
+        await outcome(policy, fail)
+
+
+async def run_checks() -> int:
+    checks = Checks()
+
+    print("Opening")
+    policy = new_policy()
+    await open_breaker(policy)
+    checks.expect("opens after the failure threshold", policy.breaker.state == 'open', policy.breaker.state)
+    result = await outcome(policy, succeed)
+    checks.expect("rejects requests while open", result == 'circuit_open', result)
+
+    print("Half-open trials")
+    await asyncio.sleep(RESET_TIMEOUT)
+    result = await outcome(policy, succeed)
+    checks.expect("a successful trial closes it", result == 'ok' and policy.breaker.state == 'closed',
+                  (result, policy.breaker.state))
+    await open_breaker(policy)
+    await asyncio.sleep(RESET_TIMEOUT)
+    result = await outcome(policy, fail)
+    checks.expect("a failed trial opens it again", result == 'http_503' and policy.breaker.state == 'open',
+                  (result, policy.breaker.state))
+
+    await asyncio.sleep(RESET_TIMEOUT)
+    trial = asyncio.ensure_future(policy.run('check', hang))
+    await asyncio.sleep(0.01)
+    result = await outcome(policy, succeed)
+    checks.expect("only one trial runs at a time", result == 'circuit_open', result)
+    trial.cancel()
+    await asyncio.gather(trial, return_exceptions=True)
+
+    print("Cancelled requests")
+    checks.expect("a cancelled trial leaves it half-open", policy.breaker.state == 'half_open', policy.breaker.state)
+    result = await outcome(policy, succeed)
+    checks.expect("the next request after a cancelled trial goes out", result == 'ok', result)
+    checks.expect("and closes it", policy.breaker.state == 'closed', policy.breaker.state)
+
+    policy = new_policy()
+    await outcome(policy, fail)
+    await cancelled(policy)
+    checks.expect("a cancelled request isn't counted as a failure",
+                  policy.breaker.failures == 1 and policy.breaker.state == 'closed',
+                  (policy.breaker.failures, policy.breaker.state))
+
+    # A request that started while closed and is cancelled during another's trial keeps that trial exclusive
+    policy = new_policy(threshold=1)
+    straggler = asyncio.ensure_future(policy.run('check', hang))
+    await asyncio.sleep(0.01)
+    await outcome(policy, fail)
+    await asyncio.sleep(RESET_TIMEOUT)
+    trial = asyncio.ensure_future(policy.run('check', hang))
+    await asyncio.sleep(0.01)
+    straggler.cancel()
+    await asyncio.gather(straggler, return_exceptions=True)
+    result = await outcome(policy, succeed)
+    checks.expect("cancelling an older request doesn't release someone else's trial", result == 'circuit_open', result)
+    trial.cancel()
+    await asyncio.gather(trial, return_exceptions=True)
+
+    print(f"\n{'All checks passed' if not checks.failed else f'{checks.failed} checks failed'}")
+    return 1 if checks.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+    # Breaker transitions are logged as warnings; the checks report them
+    logging.disable(logging.WARNING)
+    return asyncio.run(run_checks())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Offline parser benchmark over the recorded Daily Twisted Board corpus.
+
+Reports per-extractor latency, peak parse memory and correctness against
+fixtures/board/expected.json. Use --json to save results for comparing
+commits or parser backends.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from scraper import DEFAULT_PARSER, DailyTwistedScraper, extract_board_snapshot
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'board')
+FIELDS = ('twisted', 'timer', 'image_url')
+
+
+def available_backends():
+    """Parser backends installed here"""
+    backends = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        backends.append('lxml')
+    except ImportError:
+        pass
+    return backends
+
+
+def load_corpus(fixture_dir: str, pad_kb: int = 0):
+    """Load (name, html, expected) for every fixture"""
+    with open(os.path.join(fixture_dir, 'expected.json'), encoding='utf-8') as f:
+        cases = json.load(f)['cases']
+
+    # Live pages carry a few hundred KB of skin around the board; padding models that
+    padding = ''
+    if pad_kb:
+        item = '<li><a href="/wiki/Special:Random">Random page</a></li>\n'
+        padding = '<nav class="padding"><ul>' + item * (pad_kb * 1024 // len(item)) + '</ul></nav>'
+
+    corpus = []
+    for name in sorted(cases):
+        with open(os.path.join(fixture_dir, name), encoding='utf-8') as f:
+            html = f.read()
+        if padding:
+            html = html.replace('<div class="main-container">', padding + '<div class="main-container">', 1)
+        corpus.append((name, html, cases[name]))
+    return corpus
+
+
+def time_call(func, repeat: int) -> float:
+    """Median wall time of func() in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def peak_memory_kb(func) -> float:
+    """Peak traced allocation while running func() in KiB"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_case(html: str, expected: dict, backend: str, repeat: int) -> dict:
+    """Benchmark every extractor on one page with one backend"""
+    twisted_name = expected.get('twisted') or 'Twisted Vee'
+
+    # A fresh scraper per call so each extractor pays for its own parse
+    extractors = {
+        'parse_board': lambda: extract_board_snapshot(html, backend),
+        'parse_current_twisted': lambda: DailyTwistedScraper(parser=backend).parse_current_twisted(html),
+        'parse_timer_info': lambda: DailyTwistedScraper(parser=backend).parse_timer_info(html),
+        'parse_twisted_image_url': lambda: DailyTwistedScraper(parser=backend).parse_twisted_image_url(html, twisted_name),
+    }
+    latency = {name: time_call(func, repeat) for name, func in extractors.items()}
+
+    snapshot = extract_board_snapshot(html, backend)
+    actual = {field: getattr(snapshot, field) for field in FIELDS}
+    mismatches = {
+        field: {'expected': expected.get(field), 'actual': actual[field]}
+        for field in FIELDS if actual[field] != expected.get(field)
+    }
+
+    return {
+        'bytes': len(html.encode('utf-8')),
+        'latency_ms': latency,
+        'peak_kb': peak_memory_kb(lambda: extract_board_snapshot(html, backend)),
+        'correct': not mismatches,
+        'mismatches': mismatches
+    }
+
+
+def print_report(results: dict):
+    """Print a table per backend"""
+    for backend, cases in results.items():
+        print(f"\n== {backend} ==")
+        print(f"{'fixture':32} {'KiB':>6} {'board':>8} {'twisted':>8} {'timer':>8} {'image':>8} {'peakKiB':>8}  ok")
+        for name, result in cases.items():
+            latency = result['latency_ms']
+            print(
+                f"{name:32} {result['bytes'] / 1024:6.1f} "
+                f"{latency['parse_board']:8.2f} {latency['parse_current_twisted']:8.2f} "
+                f"{latency['parse_timer_info']:8.2f} {latency['parse_twisted_image_url']:8.2f} "
+                f"{result['peak_kb']:8.0f}  {'yes' if result['correct'] else 'NO'}"
+            )
+            for field, mismatch in result['mismatches'].items():
+                print(f"    {field}: expected {mismatch['expected']!r}, got {mismatch['actual']!r}")
+
+
+async def record_fixture(name: str, fixture_dir: str):
+    """Save the live page into the corpus and add its current parse to expected.json"""
+    scraper = DailyTwistedScraper()
+    try:
+        html = await scraper.fetch_page_content()
+    finally:
+        await scraper.close()
+    if not html:
+        print("Could not fetch the live page", file=sys.stderr)
+        return 1
+
+    with open(os.path.join(fixture_dir, name), 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    expected_path = os.path.join(fixture_dir, 'expected.json')
+    with open(expected_path, encoding='utf-8') as f:
+        data = json.load(f)
+    snapshot = extract_board_snapshot(html)
+    data['cases'][name] = {field: getattr(snapshot, field) for field in FIELDS}
+    with open(expected_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+
+    print(f"Recorded {name} - check its entry in {expected_path} by hand")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help="corpus directory")
+    parser.add_argument('--backend', choices=['all', 'html.parser', 'lxml'], default='all')
+    parser.add_argument('--repeat', type=int, default=20, help="timed runs per extractor")
+    parser.add_argument('--pad-kb', type=int, default=0, help="pad each page with this much skin markup")
+    parser.add_argument('--json', metavar='PATH', help="also write results as JSON")
+    parser.add_argument('--record', metavar='NAME', help="record the live page as a new fixture and exit")
+    args = parser.parse_args()
+    # Extractor warnings for fixtures without a board would drown the report
+    logging.disable(logging.WARNING)
+
+    if args.record:
+        return asyncio.run(record_fixture(args.record, args.fixtures))
+
+    backends = available_backends() if args.backend == 'all' else [args.backend]
+    corpus = load_corpus(args.fixtures, args.pad_kb)
+
+    results = {}
+    for backend in backends:
+        results[backend] = {
+            name: bench_case(html, expected, backend, args.repeat)
+            for name, html, expected in corpus
+        }
+
+    print_report(results)
+    print(f"\nDefault backend here: {DEFAULT_PARSER}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'results': results}, f, indent=2)
+
+    all_correct = all(result['correct'] for cases in results.values() for result in cases.values())
+    return 0 if all_correct else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
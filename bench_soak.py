@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""Soak test: drive the bot through simulated days against stand-in wiki and Discord servers.
+
+A child process serves a scripted Daily Twisted Board that rolls over every
+--day-seconds, and a Discord REST and webhook API that answers with
+realistic rate-limit headers and 429s. The bot runs in this process
+(discord.py pointed at the stand-in over REST, no gateway session) with
+--channels subscribed guilds and --alerts character alerts. Reports
+rollover-to-delivery latency percentiles, memory growth and request counts.
+Use --json to save results for comparing commits, and the --max-* options
+to fail the run on a regression.
+"""
+
+import argparse
+import asyncio
+import gc
+import html
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from urllib.parse import quote
+from aiohttp import web
+
+# Razzle & Dazzle comes up on day 1, so even short runs upload artwork for a name with punctuation
+TWISTEDS = tuple(f"Twisted {name}" for name in (
+    'Vee', 'Razzle & Dazzle', 'Goob', 'Astro', 'Shrimpo', 'Boxten', 'Poppy', 'Pebble', 'Sprout', 'Toodles', 'Glisten'
+))
+# Smallest valid PNG, served as every twisted's artwork
+PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d4944415478da63f8cfc0f01f0005000201a0d9f3c70000000049454e44ae426082'
+)
+BOT_USER = {'id': '100000000000000001', 'username': 'soak-bot', 'discriminator': '0', 'avatar': None,
+            'global_name': None, 'bot': True, 'flags': 0, 'mfa_enabled': False, 'verified': True}
+ALERT_PATTERN = re.compile(r"\*\*(Twisted [^*]+)\*\*")
+MENTION_PATTERN = re.compile(r"<@(\d+)>")
+LINK_PATTERN = re.compile(r"\[(.+?)\]\(.+\)")
+# File names Discord resolves in attachment:// embed references
+ATTACHMENT_NAME = re.compile(r"[A-Za-z0-9_.-]+")
+TOKEN = 'soak.token'
+# discord.py treats a 429 without this Cloudflare header as a ban rather than a rate limit
+VIA = '1.1 google'
+
+
+# --- Stand-in servers (child process) ---------------------------------------
+
+def discord_json(data, status: int = 200, headers: dict = None):
+    """JSON response with the bare content type discord.py expects"""
+    return web.Response(body=json.dumps(data).encode(), status=status,
+                        headers=dict(headers or {}, **{'Content-Type': 'application/json'}))
+
+
+class ScriptedBoard:
+    """A board that rolls over every `day` seconds, optionally publishing the new twisted late"""
+
+    def __init__(self, day: float, publish_delay: float, pad_kb: int):
+        self.day = day
+        self.publish_delay = publish_delay
+        # Cycle boundaries on multiples of the day, as the bot's cycle IDs round to it
+        self.start = math.floor(time.time() / day) * day
+        item = '<li><a href="/wiki/Special:Random">Random page</a></li>\n'
+        self.padding = '<nav class="padding"><ul>' + item * (pad_kb * 1024 // len(item)) + '</ul></nav>'
+
+    def twisted(self, cycle: int) -> str:
+        return TWISTEDS[cycle % len(TWISTEDS)]
+
+    def rollover_at(self, cycle: int) -> float:
+        return self.start + cycle * self.day
+
+    def cycle_at(self, now: float) -> int:
+        return int((now - self.start) // self.day)
+
+    def cycle_of(self, twisted: str, received_at: float) -> int:
+        """The latest cycle that showed `twisted` by the time a message about it arrived"""
+        cycle = self.cycle_at(received_at)
+        while cycle > 0 and self.twisted(cycle) != twisted:
+            cycle -= 1
+        return cycle
+
+    def page(self, base_url: str, now: float) -> str:
+        cycle = self.cycle_at(now)
+        remaining = self.rollover_at(cycle + 1) - now
+        if cycle > 0 and now - self.rollover_at(cycle) < self.publish_delay:
+            # The wiki hasn't caught up: old twisted, timer at zero
+            cycle, remaining = cycle - 1, 0
+        twisted = self.twisted(cycle)
+        hours, rest = divmod(int(remaining), 3600)
+        minutes, seconds = divmod(rest, 60)
+        parts = [f"{value} {unit}" for value, unit in ((hours, 'hours'), (minutes, 'minutes')) if value]
+        parts.append(f"{seconds} seconds")
+        timer = ', '.join(parts[:-1]) + f" and {parts[-1]}" if len(parts) > 1 else parts[0]
+        slug = quote(twisted.replace(' ', '_'))
+        twisted = html.escape(twisted)
+        return (
+            '<!DOCTYPE html><html><head><title>Daily Twisted Board | Fandom</title></head><body>'
+            f'{self.padding}<div class="main-container"><main class="page__main" id="content">'
+            '<div id="mw-content-text" class="mw-body-content"><div class="mw-parser-output">'
+            f'<p>Currently, the board is occupied by <a href="/wiki/{slug}" title="{twisted}">{twisted}</a>.</p>'
+            f'<p><span class="countdown">It will be {timer} until the Daily Twisted Board changes.</span></p>'
+            f'<figure class="thumb"><a href="/wiki/File:{slug}_Render.png" class="image">'
+            f'<img alt="{twisted} Render" src="{base_url}/images/{slug}.png" width="180" height="180"/></a></figure>'
+            '</div></div></main></div></body></html>'
+        )
+
+
+class WindowBucket:
+    """Fixed-window rate limit, reported the way Discord's headers describe it"""
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.reset_at = 0.0
+        self.remaining = limit
+
+    def hit(self, now: float) -> bool:
+        if now >= self.reset_at:
+            self.reset_at = now + self.per
+            self.remaining = self.limit
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+    def headers(self, now: float, bucket: str) -> dict:
+        return {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(max(0, self.remaining)),
+            'X-RateLimit-Reset': f"{time.time() + max(0.0, self.reset_at - now):.3f}",
+            'X-RateLimit-Reset-After': f"{max(0.0, self.reset_at - now):.3f}",
+            'X-RateLimit-Bucket': bucket,
+        }
+
+
+class FakeServers:
+    """Wiki pages and images, the Discord REST routes the bot uses, and webhooks, on one port"""
+
+    def __init__(self, options: dict):
+        self.board = ScriptedBoard(options['day_seconds'], options['publish_delay'], options['pad_kb'])
+        self.wiki_latency = options['wiki_latency_ms'] / 1000
+        self.discord_latency = options['discord_latency_ms'] / 1000
+        self.base_url = ''
+        self.global_bucket = WindowBucket(options['global_limit'], 1.0)
+        self.buckets = {}
+        self.requests = Counter()
+        self.rate_limited = Counter()
+        # latencies[kind] and per-cycle recipients[kind][cycle]
+        self.latencies = defaultdict(list)
+        self.recipients = defaultdict(Counter)
+        self.last_delivery = defaultdict(dict)
+        # Embeds whose attachment:// image Discord would have left blank
+        self.unresolved_images = 0
+        self._snowflake = 200000000000000000
+
+    def snowflake(self) -> str:
+        self._snowflake += 1
+        return str(self._snowflake)
+
+    def app(self):
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_get('/wiki/Daily_Twisted_Board', self.wiki_page)
+        app.router.add_get('/images/{name}', self.image)
+        app.router.add_get('/api/v10/users/@me', self.current_user)
+        app.router.add_get('/api/v10/oauth2/applications/@me', self.application)
+        app.router.add_post('/api/v10/users/@me/channels', self.create_dm)
+        app.router.add_post('/api/v10/channels/{channel_id}/messages', self.channel_message)
+        app.router.add_post('/api/webhooks/{webhook_id}/{token}', self.webhook_message)
+        app.router.add_get('/_soak/stats', self.stats)
+        return app
+
+    async def wiki_page(self, request):
+        self.requests['wiki page'] += 1
+        await asyncio.sleep(self.wiki_latency)
+        body = self.board.page(self.base_url, time.time())
+        etag = f'"{hash(body) & 0xffffffffffff:x}"'
+        if request.headers.get('If-None-Match') == etag:
+            self.requests['wiki page 304'] += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=body, content_type='text/html', headers={'ETag': etag})
+
+    async def image(self, request):
+        self.requests['wiki image'] += 1
+        await asyncio.sleep(self.wiki_latency)
+        return web.Response(body=PNG, content_type='image/png')
+
+    async def current_user(self, request):
+        self.requests['discord login'] += 1
+        return discord_json(BOT_USER)
+
+    async def application(self, request):
+        self.requests['discord login'] += 1
+        return discord_json({'id': BOT_USER['id'], 'name': 'soak', 'description': '', 'icon': None,
+                             'bot_public': False, 'bot_require_code_grant': False, 'owner': BOT_USER,
+                             'verify_key': '0' * 64, 'flags': 0})
+
+    def _limited(self, now: float, route: str, bucket: WindowBucket):
+        """A 429 response if the global or route limit is exhausted, else None"""
+        if not self.global_bucket.hit(now):
+            self.rate_limited['global'] += 1
+            retry_after = max(0.0, self.global_bucket.reset_at - now)
+            return discord_json(
+                {'message': 'You are being rate limited.', 'retry_after': retry_after, 'global': True},
+                status=429,
+                headers={'Retry-After': f"{retry_after:.3f}", 'X-RateLimit-Global': 'true',
+                         'X-RateLimit-Scope': 'global', 'Via': VIA}
+            )
+        if not bucket.hit(now):
+            self.rate_limited[route] += 1
+            retry_after = max(0.0, bucket.reset_at - now)
+            return discord_json(
+                {'message': 'You are being rate limited.', 'retry_after': retry_after, 'global': False},
+                status=429,
+                headers=dict(bucket.headers(now, route), **{'Retry-After': f"{retry_after:.3f}",
+                                                            'X-RateLimit-Scope': 'user', 'Via': VIA})
+            )
+        return None
+
+    def _bucket(self, key: tuple, limit: int, per: float) -> WindowBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = WindowBucket(limit, per)
+        return bucket
+
+    async def create_dm(self, request):
+        now = time.time()
+        self.requests['discord create dm'] += 1
+        limited = self._limited(now, 'create dm', self._bucket(('dm',), 10, 1.0))
+        if limited is not None:
+            return limited
+        await asyncio.sleep(self.discord_latency)
+        data = await request.json()
+        recipient = dict(BOT_USER, id=str(data['recipient_id']), username='user', bot=False)
+        return discord_json({'id': self.snowflake(), 'type': 1, 'recipients': [recipient],
+                                  'last_message_id': None})
+
+    async def _payload(self, request) -> tuple:
+        """(JSON payload, attachment file names) of a message, plain or multipart"""
+        if request.content_type.startswith('multipart/'):
+            payload, files = {}, []
+            reader = await request.multipart()
+            async for part in reader:
+                if part.name == 'payload_json':
+                    payload = json.loads(await part.text())
+                else:
+                    await part.read()
+                    files.append(part.filename or 'file.png')
+            return payload, files
+        return await request.json(), []
+
+    def _check_images(self, payload: dict, files: list):
+        for embed in payload.get('embeds') or []:
+            url = (embed.get('image') or {}).get('url') or ''
+            if url.startswith('attachment://'):
+                name = url[len('attachment://'):]
+                if name not in files or not ATTACHMENT_NAME.fullmatch(name):
+                    self.unresolved_images += 1
+
+    def _record(self, payload: dict, received_at: float):
+        """Attribute a delivered message to the board cycle it announces"""
+        embeds = payload.get('embeds') or []
+        content = payload.get('content') or ''
+        if embeds and embeds[0].get('fields'):
+            # The name links to the character's wiki page when the registry knows it
+            value = embeds[0]['fields'][0]['value']
+            link = LINK_PATTERN.fullmatch(value)
+            kind, twisted, count = 'announcement', link.group(1) if link else value, 1
+        else:
+            match = ALERT_PATTERN.search(content)
+            if match is None:
+                return
+            twisted = match.group(1)
+            mentions = MENTION_PATTERN.findall(content)
+            kind, count = ('alert mention', len(mentions)) if mentions else ('alert dm', 1)
+
+        cycle = self.board.cycle_of(twisted, received_at)
+        self.recipients[kind][cycle] += count
+        if cycle == 0:
+            return  # startup state, not a rollover
+        latency = received_at - self.board.rollover_at(cycle)
+        self.latencies[kind].append(latency)
+        self.last_delivery[kind][cycle] = max(latency, self.last_delivery[kind].get(cycle, 0.0))
+
+    def _message(self, channel_id: str, payload: dict, files: list) -> dict:
+        attachments = []
+        for filename in files:
+            attachment_id = self.snowflake()
+            url = f"{self.base_url}/attachments/{channel_id}/{attachment_id}/{filename}?ex={int(time.time()) + 86400:x}"
+            attachments.append({'id': attachment_id, 'filename': filename, 'size': len(PNG), 'url': url,
+                                'proxy_url': url})
+        return {
+            'id': self.snowflake(), 'channel_id': channel_id, 'type': 0, 'content': payload.get('content') or '',
+            'author': BOT_USER, 'attachments': attachments, 'embeds': payload.get('embeds') or [],
+            'mentions': [], 'mention_roles': [], 'pinned': False, 'mention_everyone': False, 'tts': False,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime()), 'edited_timestamp': None,
+            'flags': 0, 'components': [],
+        }
+
+    async def channel_message(self, request):
+        now = time.time()
+        channel_id = request.match_info['channel_id']
+        self.requests['discord message'] += 1
+        # Discord allows 5 messages per 5 seconds in a channel
+        bucket = self._bucket(('message', channel_id), 5, 5.0)
+        limited = self._limited(now, 'channel message', bucket)
+        if limited is not None:
+            return limited
+        payload, files = await self._payload(request)
+        await asyncio.sleep(self.discord_latency)
+        self._check_images(payload, files)
+        self._record(payload, time.time())
+        return discord_json(self._message(channel_id, payload, files),
+                                 headers=bucket.headers(time.time(), 'channel-message'))
+
+    async def webhook_message(self, request):
+        now = time.time()
+        webhook_id = request.match_info['webhook_id']
+        self.requests['discord webhook'] += 1
+        bucket = self._bucket(('webhook', webhook_id), 5, 2.0)
+        limited = self._limited(now, 'webhook', bucket)
+        if limited is not None:
+            return limited
+        payload, files = await self._payload(request)
+        await asyncio.sleep(self.discord_latency)
+        self._check_images(payload, files)
+        self._record(payload, time.time())
+        headers = bucket.headers(time.time(), 'webhook')
+        if request.query.get('wait') == 'true':
+            return discord_json(self._message(webhook_id, payload, files), headers=headers)
+        return web.Response(status=204, headers=headers)
+
+    async def stats(self, request):
+        return web.json_response({
+            'requests': self.requests,
+            'rate_limited': self.rate_limited,
+            'latencies': self.latencies,
+            'recipients': {kind: {str(cycle): count for cycle, count in counts.items()}
+                           for kind, counts in self.recipients.items()},
+            'last_delivery': {kind: list(cycles.values()) for kind, cycles in self.last_delivery.items()},
+            'board': {'start': self.board.start, 'day': self.board.day},
+            'unresolved_images': self.unresolved_images,
+        })
+
+
+def serve_fakes(options: dict, connection):
+    """Child process entry point: serve the stand-ins and send back the base URL"""
+    logging.disable(logging.CRITICAL)
+    servers = FakeServers(options)
+
+    async def main():
+        runner = web.AppRunner(servers.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        servers.base_url = f"http://127.0.0.1:{port}"
+        connection.send(servers.base_url)
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+# --- The bot under test (this process) --------------------------------------
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MiB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource
+        # Peak rather than current where /proc isn't available; KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+def configure_environment(args, base_url: str, data_dir: str):
+    """Point the bot's configuration at the stand-ins before anything reads it"""
+    os.environ.update({
+        'DISCORD_BOT_TOKEN': TOKEN,
+        'DISCORD_CHANNEL_ID': '',
+        'DELIVERY_MODE': args.mode,
+        'WEBHOOK_URLS': ','.join(
+            f"{base_url}/api/webhooks/{300000000000000000 + i}/token{i}" for i in range(args.channels)
+        ),
+        'WIKI_BASE_URL': base_url,
+        'FETCH_MODE': 'html',
+        'DATA_DIR': data_dir,
+        'LOG_DIR': os.path.join(data_dir, 'logs'),
+        'LOG_LEVEL': args.log_level,
+        'SYNC_COMMANDS': 'false',
+        'LEADER_ELECTION': 'none',
+        # The stand-in wiki has no API; characters are learned from the board
+        'CHARACTER_REFRESH_HOURS': '0',
+        'METRICS_PORT': '0',
+    })
+
+
+def seed(config, args) -> dict:
+    """Subscribe the simulated guilds and add alerts, returning alert recipients per twisted"""
+    from alerts import Alert, AlertRegistry
+    from subscriptions import GuildSubscription, SubscriptionRegistry
+
+    rng = random.Random(args.seed)
+    expected = Counter()
+    if args.mode == 'gateway':
+        subscriptions = SubscriptionRegistry(config.get_database_path())
+        for i in range(args.channels):
+            subscriptions.subscribe(GuildSubscription(guild_id=400000000000000000 + i,
+                                                      channel_id=500000000000000000 + i))
+        subscriptions.close()
+
+        alerts = AlertRegistry(config.get_database_path())
+        for i in range(args.alerts):
+            twisted = rng.choice(TWISTEDS)
+            delivery = 'mention' if rng.random() < args.mention_share else 'dm'
+            guild_id = 400000000000000000 + rng.randrange(args.channels) if delivery == 'mention' else None
+            alerts.add(Alert(600000000000000000 + i, twisted, delivery, guild_id))
+            expected[twisted] += 1
+        alerts.close()
+    return expected
+
+
+async def run_bot(args, config):
+    """Run the configured delivery mode until every simulated day has passed"""
+    from monitor import BoardMonitor
+
+    # Cycle IDs normally round to the hour; simulated days are much shorter
+    BoardMonitor.cycle_resolution = args.day_seconds
+
+    if args.mode == 'gateway':
+        from bot import DandyWorldBot
+
+        bot = DandyWorldBot(config)
+        await bot.login(TOKEN)
+        # No gateway session: mark the client ready the way the READY event would
+        bot._ready.set()
+        stop = bot.close
+    else:
+        from webhooks import run_webhook_mode
+
+        task = asyncio.create_task(run_webhook_mode(config))
+
+        async def stop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    samples = []
+    started = time.time()
+    end = started + args.days * args.day_seconds + args.tail
+    try:
+        while time.time() < end:
+            await asyncio.sleep(min(args.sample_seconds, max(0.0, end - time.time())))
+            gc.collect()
+            samples.append((time.time() - started, rss_mb()))
+    finally:
+        await stop()
+    return samples
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+    return {'count': len(ordered), 'p50': pick(0.50), 'p90': pick(0.90), 'p95': pick(0.95),
+            'p99': pick(0.99), 'max': ordered[-1] * 1000, 'mean': statistics.fmean(ordered) * 1000}
+
+
+def memory_growth(samples: list, warmup: float, day_seconds: float) -> dict:
+    """RSS after warm-up, at the end, and the fitted growth per simulated day"""
+    steady = [sample for sample in samples if sample[0] >= warmup] or samples
+    if not steady:
+        return {}
+    result = {'start_mb': steady[0][1], 'end_mb': steady[-1][1], 'peak_mb': max(rss for _, rss in steady),
+              'growth_mb': steady[-1][1] - steady[0][1], 'mb_per_day': 0.0}
+    if len(steady) >= 2:
+        slope = statistics.linear_regression([t for t, _ in steady], [rss for _, rss in steady]).slope
+        result['mb_per_day'] = slope * day_seconds
+    return result
+
+
+def delivery_gaps(args, stats: dict, expected_alerts: dict) -> list:
+    """Cycles whose announcements or alerts didn't all arrive"""
+    board = stats['board']
+    days = range(1, args.days + 1)
+    gaps = []
+    received = stats['recipients']
+    for cycle in days:
+        if board['start'] + cycle * board['day'] > time.time():
+            break
+        twisted = TWISTEDS[cycle % len(TWISTEDS)]
+        announced = received.get('announcement', {}).get(str(cycle), 0)
+        if announced < args.channels:
+            gaps.append(f"day {cycle}: {announced}/{args.channels} announcements")
+        if args.mode == 'gateway':
+            alerted = (received.get('alert mention', {}).get(str(cycle), 0)
+                       + received.get('alert dm', {}).get(str(cycle), 0))
+            if alerted < expected_alerts.get(twisted, 0):
+                gaps.append(f"day {cycle}: {alerted}/{expected_alerts[twisted]} alert recipients")
+    if stats.get('unresolved_images'):
+        gaps.append(f"{stats['unresolved_images']} embeds referenced an attachment name Discord can't resolve")
+    return gaps
+
+
+def print_report(args, result: dict):
+    print(f"\nSoak: {args.days} days of {args.day_seconds}s, {args.channels} "
+          f"{'channels' if args.mode == 'gateway' else 'webhooks'}, {args.alerts if args.mode == 'gateway' else 0} "
+          f"alerts ({args.mode} mode)")
+    print(f"\n{'rollover -> delivery (ms)':28} {'count':>7} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for kind, stats in result['latency_ms'].items():
+        if stats:
+            print(f"{kind:28} {stats['count']:7} {stats['p50']:8.0f} {stats['p90']:8.0f} "
+                  f"{stats['p95']:8.0f} {stats['p99']:8.0f} {stats['max']:8.0f}")
+
+    print("\nrequests")
+    for name, count in sorted(result['requests'].items()):
+        print(f"  {name:26} {count:8}")
+    for scope, count in sorted(result['rate_limited'].items()):
+        print(f"  429 {scope:22} {count:8}")
+
+    memory = result['memory']
+    if memory:
+        print(f"\nRSS {memory['start_mb']:.1f} MiB after warm-up -> {memory['end_mb']:.1f} MiB "
+              f"(peak {memory['peak_mb']:.1f}, {memory['growth_mb']:+.1f} MiB, {memory['mb_per_day']:+.2f} MiB/day)")
+    if result['gaps']:
+        print("\nmissing or broken deliveries:")
+        for gap in result['gaps']:
+            print(f"  {gap}")
+
+
+async def fetch_stats(base_url: str) -> dict:
+    import aiohttp
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{base_url}/_soak/stats") as response:
+            return await response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['gateway', 'webhook'], default='gateway')
+    parser.add_argument('--days', type=int, default=10, help="simulated board rollovers")
+    parser.add_argument('--day-seconds', type=int, default=30, help="real seconds per simulated day")
+    parser.add_argument('--channels', type=int, default=200, help="subscribed guilds (webhooks in webhook mode)")
+    parser.add_argument('--alerts', type=int, default=2000, help="character alerts (gateway mode)")
+    parser.add_argument('--mention-share', type=float, default=0.5, help="fraction of alerts delivered as mentions")
+    parser.add_argument('--publish-delay', type=float, default=0.0,
+                        help="seconds after each rollover the wiki keeps showing the old twisted")
+    parser.add_argument('--pad-kb', type=int, default=200, help="page skin markup around the board")
+    parser.add_argument('--wiki-latency-ms', type=float, default=150)
+    parser.add_argument('--discord-latency-ms', type=float, default=60)
+    parser.add_argument('--global-limit', type=int, default=50, help="Discord requests per second before a global 429")
+    parser.add_argument('--sample-seconds', type=float, default=5, help="memory sampling interval")
+    parser.add_argument('--tail', type=float, default=15, help="seconds to keep running after the last rollover")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--json', metavar='PATH', help="also write results as JSON")
+    parser.add_argument('--max-p95-ms', type=float, help="fail if announcement p95 latency exceeds this")
+    parser.add_argument('--max-growth-mb', type=float, help="fail if RSS grows more than this after warm-up")
+    args = parser.parse_args()
+
+    options = {
+        'day_seconds': args.day_seconds, 'publish_delay': args.publish_delay, 'pad_kb': args.pad_kb,
+        'wiki_latency_ms': args.wiki_latency_ms, 'discord_latency_ms': args.discord_latency_ms,
+        'global_limit': args.global_limit,
+    }
+    parent, child = multiprocessing.Pipe()
+    fakes = multiprocessing.Process(target=serve_fakes, args=(options, child), daemon=True)
+    fakes.start()
+    base_url = parent.recv()
+
+    from discord.http import Route
+    # Every REST call discord.py makes now goes to the stand-in
+    Route.BASE = f"{base_url}/api/v10"
+
+    data_dir = tempfile.mkdtemp(prefix='totb-soak-')
+    configure_environment(args, base_url, data_dir)
+    from config import Config
+    from utils import setup_logging
+
+    setup_logging()
+    config = Config()
+    expected_alerts = seed(config, args)
+
+    try:
+        samples = asyncio.run(run_bot(args, config))
+        stats = asyncio.run(fetch_stats(base_url))
+    finally:
+        fakes.terminate()
+
+    latency = {kind: percentiles(values) for kind, values in sorted(stats['latencies'].items())}
+    for kind, values in sorted(stats['last_delivery'].items()):
+        latency[f"{kind} (whole day)"] = percentiles(values)
+    result = {
+        'created_at': time.time(),
+        'options': vars(args),
+        'latency_ms': latency,
+        'requests': stats['requests'],
+        'rate_limited': stats['rate_limited'],
+        # The first simulated day covers imports, login and the first artwork uploads
+        'memory': memory_growth(samples, args.day_seconds * 2, args.day_seconds),
+        'memory_samples': samples,
+        'gaps': delivery_gaps(args, stats, expected_alerts),
+    }
+    print_report(args, result)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+    failed = bool(result['gaps'])
+    p95 = latency.get('announcement', {}).get('p95')
+    if args.max_p95_ms is not None and p95 is not None and p95 > args.max_p95_ms:
+        print(f"\nannouncement p95 {p95:.0f} ms exceeds {args.max_p95_ms:.0f} ms")
+        failed = True
+    growth = result['memory'].get('growth_mb')
+    if args.max_growth_mb is not None and growth is not None and growth > args.max_growth_mb:
+        print(f"\nRSS grew {growth:.1f} MiB, more than {args.max_growth_mb:.1f} MiB")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark for the checker's entry points.
+
+Starts a fresh interpreter per sample and reports wall time to import each
+entry point, the cumulative import time Python itself reports
+(-X importtime), peak RSS, and which heavy dependencies got loaded. Use
+--json to save results for comparing commits.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# What each entry point pays for just by being imported
+ENTRY_POINTS = {
+    'cli': 'import cli',
+    'check-once path': 'import cli, monitor, scraper, snapshot_store',
+    'webhooks': 'import webhooks',
+    'bot': 'import bot',
+}
+HEAVY_MODULES = ('discord', 'bs4', 'lxml', 'aiohttp')
+
+
+def run_sample(statement: str) -> dict:
+    """Import the statement in a fresh interpreter and measure it"""
+    command = [sys.executable, '-X', 'importtime', '-c', statement]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = process.stderr.read().decode()
+    # wait4 gives this child's own resource usage, not every child's
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - started
+    process.stderr.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{stderr}")
+
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        try:
+            modules[name.strip()] = int(cumulative) / 1000
+        except ValueError:
+            continue  # header line
+
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss_kb = usage.ru_maxrss / 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+    return {'wall_ms': wall * 1000, 'modules': modules, 'rss_kb': rss_kb}
+
+
+def bench_entry(statement: str, repeat: int) -> dict:
+    samples = [run_sample(statement) for _ in range(repeat)]
+    last = samples[-1]['modules']
+    top_level = {name: ms for name, ms in last.items() if '.' not in name}
+    return {
+        'wall_ms': statistics.median(s['wall_ms'] for s in samples),
+        'rss_kb': statistics.median(s['rss_kb'] for s in samples),
+        'heavy': [name for name in HEAVY_MODULES if name in last],
+        'slowest': sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters per entry point")
+    parser.add_argument('--json', help="write results to this file")
+    args = parser.parse_args()
+
+    baseline = bench_entry('pass', args.repeat)
+    print(f"Interpreter alone: {baseline['wall_ms']:.1f} ms, {baseline['rss_kb'] / 1024:.1f} MB")
+
+    results = {'baseline': baseline}
+    for name, statement in ENTRY_POINTS.items():
+        result = bench_entry(statement, args.repeat)
+        results[name] = result
+        print(f"\n{name}: {result['wall_ms']:.1f} ms wall, {result['rss_kb'] / 1024:.1f} MB peak RSS")
+        print(f"  heavy modules loaded: {', '.join(result['heavy']) or 'none'}")
+        for module, ms in result['slowest']:
+            print(f"  {module:<24} {ms:8.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
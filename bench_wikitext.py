@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Fetch-mode check: read the board in every FETCH_MODE from a stand-in wiki serving recorded responses.
+
+An in-process stand-in serves recorded action=raw wikitext, api.php
+action=parse payloads (fixtures/wikitext/) and the matching HTML page
+(fixtures/board/) for one case at a time. Each case is fetched through
+DailyTwistedScraper in html, api and raw mode; results are checked against
+fixtures/wikitext/expected.json, or fixtures/board/expected.json when the
+wikitext has no board and the scraper has to fall back to the HTML page.
+Reports median fetch-and-parse latency and bytes served per mode.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from aiohttp import web
+from fetch_cache import FetchCache
+from fetch_policy import FetchPolicy
+from scraper import DailyTwistedScraper
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIELDS = ('twisted', 'timer', 'image_url')
+
+
+class StandInWiki:
+    """The three endpoints the scraper reads, serving the current case's recordings"""
+
+    def __init__(self, fixture_dir: str):
+        self.fixture_dir = fixture_dir
+        self.case = None
+        self.requests = Counter()
+        self.bytes_served = Counter()
+        self.base_url = None
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/wiki/{title}', self.page)
+        app.router.add_get('/api.php', self.api)
+        return app
+
+    def _read(self, *path) -> str:
+        with open(os.path.join(self.fixture_dir, *path), encoding='utf-8') as f:
+            return f.read()
+
+    def _respond(self, kind: str, body: str, content_type: str) -> web.Response:
+        self.requests[kind] += 1
+        self.bytes_served[kind] += len(body.encode('utf-8'))
+        return web.Response(text=body, content_type=content_type)
+
+    async def page(self, request):
+        if request.query.get('action') == 'raw':
+            if self.case['raw'] is None:
+                self.requests['raw'] += 1
+                return web.Response(status=404, text="There is currently no text in this page.")
+            return self._respond('raw', self._read('wikitext', self.case['raw']), 'text/x-wiki')
+        return self._respond('html', self._read('board', self.case['html']), 'text/html')
+
+    async def api(self, request):
+        if request.query.get('action') != 'parse':
+            return web.json_response({'error': {'code': 'badvalue', 'info': 'Only action=parse is recorded'}})
+        return self._respond('api', self._read('wikitext', self.case['api']), 'application/json')
+
+
+def expected_result(case: dict, mode: str, board_cases: dict, base_url: str) -> tuple:
+    """(expected fields, source that should have served them) for a case in one mode"""
+    if mode != 'html' and case['wikitext'] is not None:
+        fields = {field: value.replace('{base}', base_url) if isinstance(value, str) else value
+                  for field, value in case['wikitext'].items()}
+        return fields, mode
+    return board_cases[case['html']], 'html'
+
+
+async def run_mode(wiki: StandInWiki, mode: str, repeat: int) -> tuple:
+    """Fetch the current case `repeat` times in one mode: (snapshot, median ms, requests by kind)"""
+    # One attempt, so a recorded failure falls back instead of being retried
+    scraper = DailyTwistedScraper(fetch_mode=mode, base_url=wiki.base_url, fetch_policy=FetchPolicy(max_attempts=1))
+    wiki.requests.clear()
+    samples = []
+    snapshot = None
+    try:
+        for _ in range(repeat):
+            # Every run parses the page instead of reusing the conditional-fetch cache
+            scraper.fetch_cache = FetchCache()
+            started = time.perf_counter()
+            snapshot = await scraper.fetch_snapshot()
+            samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        await scraper.close()
+    requests = {kind: count // repeat for kind, count in wiki.requests.items()}
+    return snapshot, statistics.median(samples), requests
+
+
+async def run_cases(fixture_dir: str, repeat: int) -> dict:
+    with open(os.path.join(fixture_dir, 'wikitext', 'expected.json'), encoding='utf-8') as f:
+        cases = json.load(f)['cases']
+    with open(os.path.join(fixture_dir, 'board', 'expected.json'), encoding='utf-8') as f:
+        board_cases = json.load(f)['cases']
+
+    wiki = StandInWiki(fixture_dir)
+    runner = web.AppRunner(wiki.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    wiki.base_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    results = {}
+    try:
+        for name, case in cases.items():
+            wiki.case = case
+            for mode in DailyTwistedScraper.FETCH_MODES:
+                wiki.bytes_served.clear()
+                snapshot, latency, requests = await run_mode(wiki, mode, repeat)
+                expected, source = expected_result(case, mode, board_cases, wiki.base_url)
+                actual = {field: getattr(snapshot, field, None) for field in FIELDS}
+                mismatches = {
+                    field: {'expected': expected.get(field), 'actual': actual[field]}
+                    for field in FIELDS if actual[field] != expected.get(field)
+                }
+                # The HTML page is only fetched when the wikitext didn't have the board
+                served_by = 'html' if requests.get('html') else mode
+                if served_by != source:
+                    mismatches['source'] = {'expected': source, 'actual': served_by}
+                results.setdefault(name, {})[mode] = {
+                    'latency_ms': latency,
+                    'bytes': sum(wiki.bytes_served.values()) // repeat,
+                    'source': served_by,
+                    'correct': not mismatches,
+                    'mismatches': mismatches,
+                }
+    finally:
+        await runner.cleanup()
+    return results
+
+
+def print_report(results: dict):
+    print(f"{'case':34} {'mode':5} {'source':7} {'KiB':>6} {'ms':>8}  ok")
+    for name, modes in results.items():
+        for mode, result in modes.items():
+            print(
+                f"{name:34} {mode:5} {result['source']:7} {result['bytes'] / 1024:6.1f} "
+                f"{result['latency_ms']:8.2f}  {'yes' if result['correct'] else 'NO'}"
+            )
+            for field, mismatch in result['mismatches'].items():
+                print(f"    {field}: expected {mismatch['expected']!r}, got {mismatch['actual']!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help="directory holding board/ and wikitext/")
+    parser.add_argument('--repeat', type=int, default=10, help="timed fetches per case and mode")
+    parser.add_argument('--json', metavar='PATH', help="also write results as JSON")
+    args = parser.parse_args()
+    # Fallback and fetch-failure warnings are the point of some cases; the report says what happened
+    logging.disable(logging.ERROR)
+
+    results = asyncio.run(run_cases(args.fixtures, max(1, args.repeat)))
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'results': results}, f, indent=2)
+
+    all_correct = all(result['correct'] for modes in results.values() for result in modes.values())
+    return 0 if all_correct else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
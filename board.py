@@ -0,0 +1,148 @@
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Optional, Tuple
+
+WIKI_BASE_URL = "https://dandys-world-robloxhorror.fandom.com"
+
+TIMER_UNIT_PATTERN = re.compile(r"(\d+)\s*(day|hour|minute|second)s?", re.IGNORECASE)
+TIMER_UNIT_SECONDS = {'days': 86400, 'hours': 3600, 'minutes': 60, 'seconds': 1}
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def character_key(twisted_name: str) -> str:
+    """Lowercased character name without the "Twisted" prefix, e.g. "vee" """
+    return twisted_name.replace("Twisted ", "").strip().lower()
+
+
+def names_character(text: str, words: list) -> Tuple[bool, bool]:
+    """Whether text names a character by its whole words, and whether it says "twisted"
+
+    Whole words keep similar names apart: "vee" doesn't match "veena".
+    CamelCase file names lose their word breaks once lowercased, so a single
+    word "twistedrazzledazzle" or "razzledazzle" names Razzle & Dazzle too.
+    """
+    text_words = WORD_PATTERN.findall(text.lower())
+    joined = ''.join(words)
+    size = len(words)
+    camel_twisted = f"twisted{joined}" in text_words
+    named = camel_twisted or joined in text_words or any(
+        text_words[i:i + size] == words for i in range(len(text_words) - size + 1)
+    )
+    return named, camel_twisted or 'twisted' in text_words
+
+
+def absolute_image_url(src: str, base_url: str = WIKI_BASE_URL) -> str:
+    """Turn a wiki image src into an absolute URL"""
+    if src.startswith('//'):
+        return f"https:{src}"
+    if src.startswith('/'):
+        return f"{base_url}{src}"
+    return src
+
+
+def parse_timer_fields(timer_text: Optional[str]) -> dict:
+    """Split a timer sentence into its days/hours/minutes/seconds fields"""
+    fields = {}
+    if not timer_text:
+        return fields
+    for value, unit in TIMER_UNIT_PATTERN.findall(timer_text):
+        fields[f"{unit.lower()}s"] = int(value)
+    return fields
+
+
+class BoardTimer:
+    """The board countdown reduced to numbers
+
+    `remaining` is the seconds the timer showed, `deadline` the Unix time
+    it runs out and `cycle_id` the board cycle that deadline ends (see
+    scheduler.board_timer). Two observations belong to the same cycle
+    exactly when their cycle IDs match. Slots keep the object small enough
+    to hold a long history of them in memory.
+    """
+
+    __slots__ = ('remaining', 'deadline', 'cycle_id')
+
+    def __init__(self, remaining: int, deadline: int, cycle_id: str):
+        self.remaining = remaining
+        self.deadline = deadline
+        self.cycle_id = cycle_id
+
+    @property
+    def expired(self) -> bool:
+        """The timer ran out but the wiki hasn't moved on to the next twisted yet"""
+        return self.remaining <= 0
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, BoardTimer):
+            return NotImplemented
+        return (self.remaining, self.deadline, self.cycle_id) == (other.remaining, other.deadline, other.cycle_id)
+
+    def __hash__(self) -> int:
+        return hash((self.remaining, self.deadline, self.cycle_id))
+
+    def __repr__(self) -> str:
+        return f"BoardTimer(remaining={self.remaining}, deadline={self.deadline}, cycle_id={self.cycle_id!r})"
+
+
+@dataclass
+class BoardSnapshot:
+    """Everything extracted from one parse of the Daily Twisted Board page"""
+
+    twisted: Optional[str] = None
+    timer: Optional[str] = None
+    image_url: Optional[str] = None
+    timer_fields: dict = field(default_factory=dict)
+    # (lowercased alt text, src) for every <img alt=...> in the board section
+    images: tuple = ()
+    # Unix time the page was fetched; the timer counts down from here
+    fetched_at: Optional[float] = None
+    # Hash of the page content the snapshot was parsed from
+    content_hash: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """Plain-JSON form of the snapshot"""
+        data = asdict(self)
+        data['images'] = [list(image) for image in self.images]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BoardSnapshot':
+        """Rebuild a snapshot from to_dict() output"""
+        data = dict(data)
+        data['images'] = tuple(tuple(image) for image in data.get('images', ()))
+        return cls(**data)
+
+    def image_index(self) -> dict:
+        """Word in an image's alt text -> indexes into `images`, built once per snapshot"""
+        index = self.__dict__.get('_image_index')
+        if index is None:
+            index = {}
+            for position, (alt_text, _) in enumerate(self.images):
+                for word in set(WORD_PATTERN.findall(alt_text)):
+                    index.setdefault(word, []).append(position)
+            self.__dict__['_image_index'] = index
+        return index
+
+    def image_for(self, twisted_name: str) -> Optional[str]:
+        """Find the image for a twisted, preferring images tagged as twisted"""
+        character_name = character_key(twisted_name)
+        words = WORD_PATTERN.findall(character_name)
+        if not words:
+            return None
+
+        fallback = None
+        # Only images whose alt text shares the name's first word, or spells it CamelCase, can match
+        index = self.image_index()
+        joined = ''.join(words)
+        candidates = set(index.get(words[0], ()))
+        candidates.update(index.get(joined, ()), index.get(f"twisted{joined}", ()))
+        for position in sorted(candidates):
+            alt_text, src = self.images[position]
+            named, twisted = names_character(alt_text, words)
+            if named:
+                if twisted:
+                    return absolute_image_url(src)
+                if fallback is None:
+                    fallback = src
+
+        return absolute_image_url(fallback) if fallback else None
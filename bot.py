@@ -1,191 +1,268 @@
 import discord
 from discord.ext import commands, tasks
 import asyncio
+import io
 import logging
 import os
-from datetime import datetime, timedelta, timezone
+from contextlib import nullcontext
 from typing import Optional
+from alerts import AlertDispatcher, AlertRegistry, alert_message
+from announcement import announcement_targets, build_announcement_embed, build_watch_embed
+from bot_commands import AlertCommands, BoardCommands
 from config import Config
+from delivery import FanOutResult, TokenBucket, fan_out, upload_then_fan_out
+from image_cache import EmbedImage, ImageCache
+from leader import LeaderElector
+from loop_monitor import EventLoopLagMonitor
+from metrics import metrics, start_metrics_server
+from monitor import BoardMonitor
+from profiler import CycleProfiler
 from scraper import DailyTwistedScraper
+from snapshot_store import SnapshotStore
+from status_feed import StatusFeed
+from subscriptions import SubscriptionRegistry
 from utils import setup_logging
+from watcher import Watcher
 
-# Setup logging
-setup_logging()
 logger = logging.getLogger(__name__)
 
+
+async def send_announcement(client: discord.Client, subscriptions: SubscriptionRegistry, targets: list,
+                            embed: dict, concurrency: int = 50, limiter: Optional[TokenBucket] = None,
+                            image: Optional[EmbedImage] = None,
+                            image_cache: Optional[ImageCache] = None) -> FanOutResult:
+    """Send one embed to every (channel ID, guild ID, ping mentions) target over REST
+
+    Needs a logged-in client but not a gateway connection. When the image
+    still has to be uploaded, it is attached to the first message only and
+    every other channel's embed points at the uploaded copy.
+    """
+    embeds = {'current': discord.Embed.from_dict(embed)}
+
+    async def send_to(target, **kwargs):
+        channel_id, guild_id, ping_mentions = target
+        # Partial messageables skip the channel cache - only the ID is needed to send
+        channel = client.get_partial_messageable(channel_id, guild_id=guild_id)
+        try:
+            return await channel.send(content=ping_mentions, embed=embeds['current'], **kwargs)
+        except discord.NotFound:
+            if guild_id is not None:
+                logger.warning("Channel %s no longer exists - unsubscribing guild %s", channel_id, guild_id)
+                subscriptions.unsubscribe(guild_id)
+            raise
+
+    async def send(target):
+        await send_to(target)
+
+    async def upload(target):
+        message = await send_to(target, file=discord.File(io.BytesIO(image.data), filename=image.filename))
+        if message.attachments:
+            cdn_url = message.attachments[0].url
+            if image_cache is not None:
+                image_cache.remember_upload(image, cdn_url)
+            embeds['current'] = discord.Embed.from_dict(dict(embed, image={'url': cdn_url}))
+
+    if image is None or not image.needs_upload:
+        return await fan_out(targets, send, concurrency=concurrency, limiter=limiter)
+    return await upload_then_fan_out(targets, upload, send, concurrency=concurrency, limiter=limiter)
+
+
 class DandyWorldBot(commands.Bot):
-    def __init__(self):
+    def __init__(self, config: Optional[Config] = None):
         intents = discord.Intents.default()
         intents.message_content = False  # We don't need message content for this bot
         super().__init__(command_prefix='!', intents=intents)
         
-        self.config = Config()
-        self.scraper = DailyTwistedScraper()
-        self.last_twisted = None
-        self.last_timer_info = None
+        self.config = config or Config()
+        self.scraper = DailyTwistedScraper.from_config(self.config)
+        self.subscriptions = SubscriptionRegistry(self.config.get_database_path())
+        self.store = SnapshotStore(self.config.get_database_path())
+        self.monitor = BoardMonitor(self.scraper, self.store, StatusFeed.from_config(self.config))
+        self.image_cache = ImageCache.from_config(self.config, self.scraper)
+        self.watcher = Watcher.from_config(self.config, self.scraper.get_session, self.announce_watch_change)
+        # discord.py honours per-route buckets; this keeps fan-out under the global limit
+        self.announce_limiter = TokenBucket(self.config.announce_rate_limit)
+        self.alerts = AlertRegistry(self.config.get_database_path())
+        # Alerts share the announcement bucket so together they stay under the global limit
+        self.alert_dispatcher = AlertDispatcher(self, self.alerts, self.subscriptions, self.announce_limiter)
+        self.elector = LeaderElector.from_config(self.config)
+        self.elector.on_elected(self._on_elected)
+        self.elector.on_demoted(self._on_demoted)
+        self.loop_monitor = EventLoopLagMonitor()
+        self.loop_monitor.add_hook(
+            lambda label, stats: metrics.observe('totb_event_loop_lag_seconds', stats.max_lag, cycle=label)
+        )
+        self.metrics_runner = None
+        self.profiler = CycleProfiler.from_config(self.config)
         
     async def setup_hook(self):
         """Called when the bot is starting up"""
         logger.info("Bot is starting up...")
+        if self.config.metrics_enabled:
+            metrics.enabled = True
+            if self.config.metrics_port:
+                self.metrics_runner = await start_metrics_server(self.config.metrics_port, self.config.metrics_host)
+        self.loop_monitor.start()
+        if self.profiler is not None:
+            self.profiler.start()
+            self.profiler.install_signal_handler()
+        await self.add_cog(BoardCommands(self))
+        await self.add_cog(AlertCommands(self))
+        if self.config.sync_commands:
+            synced = await self.tree.sync()
+            logger.info("Synced %s application commands", len(synced))
+        self.monitor.restore_state()
+        await self.elector.start()
+        self.monitor.following = not self.elector.is_leader
         # Start the monitoring task
         self.monitor_twisted_board.start()
-        
+        self.alert_dispatcher.start()
+        if self.watcher is not None and self.elector.is_leader:
+            self.watcher.start()
+
+    async def _on_elected(self):
+        """Take over scraping and announcing from the previous leader"""
+        self.monitor.following = False
+        if self.monitor.last_twisted is None and not self.monitor.restore_state():
+            # Nothing stored yet: take a baseline rather than announcing whatever is on the board
+            await self.monitor.load_initial_state()
+        if self.watcher is not None:
+            self.watcher.start()
+
+    async def _on_demoted(self):
+        """Leave scraping to the new leader and follow the shared store"""
+        self.monitor.following = True
+        if self.watcher is not None:
+            await self.watcher.stop()
+
+    async def close(self):
+        """Stop background work and release the scraper before disconnecting"""
+        self.loop_monitor.stop()
+        if self.profiler is not None:
+            self.profiler.dump()
+            self.profiler.stop()
+        await self.elector.stop()
+        if self.watcher is not None:
+            await self.watcher.stop()
+        await self.alert_dispatcher.stop()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        await self.scraper.close()
+        self.subscriptions.close()
+        self.alerts.close()
+        self.store.close()
+        await super().close()
+
     async def on_ready(self):
         """Called when the bot has logged in"""
-        logger.info(f'{self.user} has connected to Discord!')
-        logger.info(f'Bot is in {len(self.guilds)} guilds')
-        
-        # Get initial state
-        try:
-            current_twisted, timer_info = await self.scraper.get_twisted_and_timer_info()
-            if current_twisted:
-                self.last_twisted = current_twisted
-                self.last_timer_info = timer_info
-                logger.info(f"Initial twisted state: {current_twisted}")
-                if timer_info:
-                    logger.info(f"Timer info: {timer_info}")
-            else:
-                logger.warning("Could not get initial twisted state")
-        except Exception as e:
-            logger.error(f"Error getting initial state: {e}")
+        logger.info("%s has connected to Discord!", self.user)
+        logger.info("Bot is in %s guilds", len(self.guilds))
     
-    @tasks.loop(hours=1)
+    @tasks.loop()
     async def monitor_twisted_board(self):
-        """Monitor the Daily Twisted Board every hour on the hour"""
+        """Check the Daily Twisted Board whenever the rollover scheduler says a check is due"""
+        if not self.elector.is_leader:
+            # Followers keep /twisted answers current from the leader's snapshots
+            self.monitor.follow()
+            await self.elector.wait_for_leadership(timeout=self.elector.ttl)
+            return
+        await self.monitor.scheduler.sleep_until_due()
+        if not self.elector.is_leader:
+            return
+        self.loop_monitor.reset()
+        profiled = self.profiler.cycle('monitor_twisted_board') if self.profiler is not None else nullcontext()
         try:
-            # Check if it's 8 PM EST (midnight UTC) - the update time
-            now = datetime.now(timezone.utc)
-            if now.hour == 0 and now.minute == 0:  # Midnight UTC = 8 PM EST
-                logger.info("8 PM EST (midnight UTC) detected - waiting 1 minute for board update...")
-                await asyncio.sleep(60)  # Wait 1 minute for board to update
-                logger.info("1 minute delay complete - now checking board...")
-            
-            logger.info("Checking Daily Twisted Board for updates...")
-            current_twisted, timer_info, image_url = await self.scraper.get_twisted_info_with_image()
-            
-            if current_twisted is None:
-                logger.warning("Failed to get current twisted - skipping this check")
-                return
-                
-            logger.info(f"Current twisted: {current_twisted}")
-            if timer_info:
-                logger.info(f"Timer info: {timer_info}")
-            
-            # Check if twisted changed OR if timer restarted with same twisted
-            should_announce = False
-            announcement_reason = ""
-            
-            if self.last_twisted != current_twisted:
-                # Twisted character changed
-                should_announce = True
-                announcement_reason = f"Twisted changed from {self.last_twisted} to {current_twisted}"
-            elif self.last_twisted == current_twisted and timer_info and self.last_timer_info:
-                # Same twisted but check if timer restarted (indicating new cycle)
-                # If timer shows a large time (like 20+ hours), it likely restarted
-                if "hours" in timer_info and any(int(h) > 20 for h in timer_info.split() if h.isdigit()):
-                    should_announce = True
-                    announcement_reason = f"Timer restarted with same twisted: {current_twisted}"
-            
-            if should_announce:
-                logger.info(announcement_reason)
-                await self.announce_current_twisted(current_twisted, announcement_reason, image_url)
-            else:
-                logger.info(f"No announcement needed - still {current_twisted}")
-            
-            # Update stored state
-            self.last_twisted = current_twisted
-            self.last_timer_info = timer_info
-                
-        except Exception as e:
-            logger.error(f"Error in monitor_twisted_board: {e}")
+            with profiled:
+                await self.monitor.run_cycle(self._announce_snapshot)
+        finally:
+            lag = self.loop_monitor.report('monitor_twisted_board')
+            logger.info("Event loop blocked for up to %.1f ms during this check", lag.max_lag * 1000)
+
+    async def _announce_snapshot(self, snapshot, reason: str) -> bool:
+        if not await self.announce_current_twisted(snapshot.twisted, reason, snapshot.image_url):
+            # Alerts go out with the retried announcement
+            return False
+        # Matching is an index lookup; delivery happens on the dispatcher's worker
+        self.alert_dispatcher.enqueue(snapshot.twisted, alert_message(snapshot.twisted, self.config.get_wiki_url()))
+        return True
     
     @monitor_twisted_board.before_loop
     async def before_monitor_twisted_board(self):
-        """Wait until the bot is ready and sync to the next hour before starting the monitoring loop"""
+        """Wait until the bot is ready before starting the monitoring loop"""
         await self.wait_until_ready()
-        
-        # Calculate time until next hour
-        now = datetime.now()
-        next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-        wait_time = (next_hour - now).total_seconds()
-        
-        logger.info(f"Bot is ready - syncing to next hour in {wait_time:.1f} seconds")
-        logger.info(f"Next check will be at {next_hour.strftime('%H:%M:%S')}")
-        
-        # Wait until the next hour
-        await asyncio.sleep(wait_time)
-        logger.info("Synchronized to the hour - starting monitoring loop")
+        # Only the leader scrapes and writes the shared store; followers restored what it stored
+        if self.monitor.last_twisted is None and self.elector.is_leader:
+            await self.monitor.load_initial_state()
+        logger.info("Bot is ready - starting rollover-driven monitoring loop")
     
-    async def announce_current_twisted(self, current_twisted: str, reason: str = "", image_url: Optional[str] = None):
-        """Announce the current twisted from the Daily Twisted Board"""
+    async def announce_current_twisted(self, current_twisted: str, reason: str = "",
+                                       image_url: Optional[str] = None) -> bool:
+        """Announce the current twisted to every subscribed channel, returning whether any got it"""
         try:
-            channel_id = self.config.get_channel_id()
-            if not channel_id:
-                logger.error("No channel ID configured")
-                return
-                
-            channel = self.get_channel(channel_id)
-            if not channel:
-                logger.error(f"Could not find channel with ID {channel_id}")
-                return
-            
-            # Check if channel supports sending messages
-            if not hasattr(channel, 'send'):
-                logger.error(f"Channel {channel_id} does not support sending messages")
-                return
-            
-            # Create embed message
-            embed = discord.Embed(
-                title="🎭 Daily Twisted Board Update!",
-                description=f"Currently, the board is occupied by:",
-                color=0xFF6B6B,
-                timestamp=datetime.utcnow()
+            targets = announcement_targets(self.subscriptions, self.config)
+            if not targets:
+                logger.error("No announcement channels configured")
+                return False
+
+            image = None
+            if self.image_cache is not None:
+                image = await self.image_cache.embed_image(current_twisted, image_url)
+            embed = build_announcement_embed(
+                current_twisted, reason, image.url if image else image_url, self.config.get_wiki_url(),
+                self.scraper.character_url(current_twisted)
             )
-            
-            embed.add_field(
-                name="Current Twisted", 
-                value=current_twisted, 
-                inline=False
+            result = await send_announcement(
+                self,
+                self.subscriptions,
+                targets,
+                embed,
+                concurrency=self.config.announce_concurrency,
+                limiter=self.announce_limiter,
+                image=image,
+                image_cache=self.image_cache
             )
-            
-            if reason:
-                embed.add_field(
-                    name="Update Reason",
-                    value=reason,
-                    inline=False
-                )
-            
-            embed.add_field(
-                name="📍 Source", 
-                value="[Daily Twisted Board Wiki](https://dandys-world-robloxhorror.fandom.com/wiki/Daily_Twisted_Board)", 
-                inline=False
+            metrics.observe('totb_announce_seconds', result.elapsed)
+            metrics.inc('totb_announce_deliveries_total', result.sent, result='sent')
+            metrics.inc('totb_announce_deliveries_total', len(result.failed), result='failed')
+            logger.info(
+                "Announced current twisted to %s/%s channels in %.2fs: %s",
+                result.sent, len(targets), result.elapsed, current_twisted
             )
-            
-            # Add image if available
-            if image_url:
-                embed.set_image(url=image_url)
-                logger.info(f"Added image to embed: {image_url}")
-            else:
-                logger.warning("No image URL available for this twisted character")
-            
-            embed.set_footer(text="Dandy's World Bot")
-            
-            # Get ping mentions
-            ping_mentions = self.config.get_ping_mentions()
-            message_content = f"{ping_mentions}" if ping_mentions else ""
-            
-            await channel.send(content=message_content, embed=embed)
-            channel_name = getattr(channel, 'name', f'Channel {channel_id}')
-            logger.info(f"Announced current twisted in channel {channel_name}: {current_twisted}")
+            return result.sent > 0
             
         except Exception as e:
-            logger.error(f"Error announcing current twisted: {e}")
+            logger.error("Error announcing current twisted: %s", e)
+            return False
+
+    async def announce_watch_change(self, change):
+        """Announce a change on one of the extra watched pages"""
+        targets = announcement_targets(self.subscriptions, self.config)
+        if not targets:
+            return
+        result = await send_announcement(
+            self,
+            self.subscriptions,
+            [(channel_id, guild_id, None) for channel_id, guild_id, _ in targets],
+            build_watch_embed(change),
+            concurrency=self.config.announce_concurrency,
+            limiter=self.announce_limiter
+        )
+        logger.info("Announced %s change to %s/%s channels", change.target.name, result.sent, len(targets))
     
 
 
 async def main():
     """Main function to run the bot"""
-    bot = DandyWorldBot()
+    config = Config()
+    if config.delivery_mode == 'webhook':
+        from webhooks import run_webhook_mode
+        try:
+            await run_webhook_mode(config)
+        except KeyboardInterrupt:
+            logger.info("Bot stopped by user")
+        return
+
+    bot = DandyWorldBot(config)
     
     try:
         # Get bot token from environment
@@ -198,9 +275,10 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Error running bot: {e}")
+        logger.error("Error running bot: %s", e)
     finally:
         await bot.close()
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(main())
@@ -0,0 +1,177 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+import logging
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
+from alerts import Alert
+from board import character_key
+from scheduler import snapshot_deadline
+from subscriptions import GuildSubscription
+from utils import format_twisted_name
+
+logger = logging.getLogger(__name__)
+
+
+class BoardCommands(commands.Cog):
+    """Slash commands for Daily Twisted Board announcements"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="twisted", description="Show who is on the Daily Twisted Board right now")
+    async def twisted(self, interaction: discord.Interaction):
+        """Answer from the snapshot cache, fetching once for everyone if it has expired"""
+        snapshot = self.bot.monitor.snapshot_cache.fresh()
+        if snapshot is None:
+            await interaction.response.defer(thinking=True)
+            snapshot = await self.bot.monitor.snapshot_cache.get()
+
+        if snapshot is None or snapshot.twisted is None:
+            message = "I couldn't read the Daily Twisted Board right now - try again in a bit."
+            if interaction.response.is_done():
+                # Edits the public "thinking" reply, which can't become ephemeral
+                await interaction.followup.send(message)
+            else:
+                await interaction.response.send_message(message, ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title="🎭 Daily Twisted Board",
+            description=f"Currently, the board is occupied by **{snapshot.twisted}**.",
+            color=0xFF6B6B,
+            url=self.bot.config.get_wiki_url()
+        )
+        deadline = snapshot_deadline(snapshot)
+        if deadline is not None:
+            rollover = datetime.fromtimestamp(deadline, timezone.utc)
+            embed.add_field(name="Next Change", value=discord.utils.format_dt(rollover, 'R'), inline=False)
+        if snapshot.image_url:
+            embed.set_thumbnail(url=snapshot.image_url)
+        embed.set_footer(text="Dandy's World Bot")
+
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed)
+        else:
+            await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="subscribe", description="Announce Daily Twisted Board changes in a channel")
+    @app_commands.describe(channel="Channel to announce in", role="Role to ping with each announcement")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_guild=True)
+    async def subscribe(self, interaction: discord.Interaction, channel: discord.TextChannel,
+                        role: Optional[discord.Role] = None):
+        """Subscribe this guild to board announcements"""
+        self.bot.subscriptions.subscribe(GuildSubscription(
+            guild_id=interaction.guild_id,
+            channel_id=channel.id,
+            ping_role_id=role.id if role else None
+        ))
+        logger.info("Guild %s subscribed channel %s", interaction.guild_id, channel.id)
+
+        ping = f" and ping {role.mention}" if role else ""
+        await interaction.response.send_message(
+            f"I'll announce Daily Twisted Board changes in {channel.mention}{ping}.",
+            ephemeral=True
+        )
+
+    @app_commands.command(name="unsubscribe", description="Stop Daily Twisted Board announcements in this server")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_guild=True)
+    async def unsubscribe(self, interaction: discord.Interaction):
+        """Unsubscribe this guild from board announcements"""
+        if self.bot.subscriptions.unsubscribe(interaction.guild_id):
+            logger.info("Guild %s unsubscribed", interaction.guild_id)
+            message = "Daily Twisted Board announcements are now off for this server."
+        else:
+            message = "This server isn't subscribed to Daily Twisted Board announcements."
+        await interaction.response.send_message(message, ephemeral=True)
+
+
+class AlertCommands(commands.GroupCog, group_name="alert", group_description="Get pinged when a twisted shows up"):
+    """Per-user character alerts"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        super().__init__()
+
+    async def character_autocomplete(self, interaction: discord.Interaction,
+                                     current: str) -> List[app_commands.Choice[str]]:
+        current = current.lower()
+        # The wiki's list, plus anything the board showed before the registry knew it
+        names = sorted({character.name for character in self.bot.scraper.characters}
+                       | {self.bot.scraper.characters.canonical_name(name) for name in self.bot.store.characters()})
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in names
+            if current in name.lower()
+        ][:25]
+
+    @app_commands.command(name="add", description="Alert me when a twisted is on the board")
+    @app_commands.describe(character="Twisted to watch for",
+                           delivery="DM me, or mention me in this server's announcement channel")
+    @app_commands.autocomplete(character=character_autocomplete)
+    async def add(self, interaction: discord.Interaction, character: str,
+                  delivery: Literal['dm', 'mention'] = 'dm'):
+        """Add a character alert for the calling user"""
+        if delivery == 'mention' and (interaction.guild_id is None
+                                      or self.bot.subscriptions.get(interaction.guild_id) is None):
+            await interaction.response.send_message(
+                "Mention alerts need a server with announcements set up through `/subscribe`.", ephemeral=True
+            )
+            return
+
+        # "vee", "twisted_vee" and "Twisted Vee" all become the same alert
+        resolved = self.bot.scraper.characters.resolve(character)
+        if resolved is not None:
+            character = resolved.name
+        alert = Alert(interaction.user.id, character, delivery, interaction.guild_id if delivery == 'mention' else None)
+        is_new = self.bot.alerts.add(alert)
+        logger.info("User %s added a %s alert for %s", interaction.user.id, delivery, character_key(character))
+
+        known = len(self.bot.scraper.characters) > 0 or bool(self.bot.store.characters())
+        note = "" if resolved is not None or not known else \
+            " I haven't seen that twisted on the wiki or the board yet, so double-check the spelling."
+        verb = "I'll" if is_new else "Updated - I'll"
+        where = "DM you" if delivery == 'dm' else "mention you in the announcement channel"
+        await interaction.response.send_message(
+            f"{verb} {where} when {character} is on the Daily Twisted Board.{note}", ephemeral=True
+        )
+
+    @app_commands.command(name="remove", description="Stop alerting me about a twisted")
+    @app_commands.describe(character="Twisted to stop watching for")
+    async def remove(self, interaction: discord.Interaction, character: str):
+        """Remove one of the calling user's alerts"""
+        resolved = self.bot.scraper.characters.resolve(character)
+        if resolved is not None:
+            character = resolved.name
+        if self.bot.alerts.remove(interaction.user.id, character):
+            message = f"You won't be alerted about {character} anymore."
+        else:
+            message = f"You don't have an alert for {character}."
+        await interaction.response.send_message(message, ephemeral=True)
+
+    @remove.autocomplete('character')
+    async def remove_autocomplete(self, interaction: discord.Interaction,
+                                  current: str) -> List[app_commands.Choice[str]]:
+        current = current.lower()
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self.bot.alerts.characters_for(interaction.user.id)
+            if current in name
+        ][:25]
+
+    def _display_name(self, key: str) -> str:
+        """The wiki's spelling of an alert's character, which is stored lowercased"""
+        resolved = self.bot.scraper.characters.resolve(key)
+        return resolved.name if resolved is not None else format_twisted_name(key.title())
+
+    @app_commands.command(name="list", description="Show the twisted you get alerts for")
+    async def list_alerts(self, interaction: discord.Interaction):
+        """List the calling user's alerts"""
+        characters = self.bot.alerts.characters_for(interaction.user.id)
+        if characters:
+            message = "You get alerts for: " + ", ".join(self._display_name(key) for key in characters)
+        else:
+            message = "You don't have any alerts yet - add one with `/alert add`."
+        await interaction.response.send_message(message, ephemeral=True)
@@ -0,0 +1,262 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+from board import WIKI_BASE_URL, WORD_PATTERN, BoardSnapshot, character_key
+from fetch_policy import FetchError, http_error
+from utils import format_twisted_name
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+def normalize_name(name: str) -> str:
+    """Lookup form of a character name: "Twisted_Vee", "twisted vee" and "Vee!" all become "vee" """
+    words = WORD_PATTERN.findall(name.replace('_', ' ').lower())
+    if words and words[0] == 'twisted':
+        words = words[1:]
+    # "&" isn't a word, so "Razzle & Dazzle" and "Razzle and Dazzle" should match
+    return ' '.join(word for word in words if word != 'and')
+
+
+@dataclass(frozen=True)
+class Character:
+    """One twisted, as the wiki names it"""
+
+    # character_key() of the name, e.g. "vee" - what alerts and the artwork cache are keyed by
+    key: str
+    # Canonical display name, e.g. "Twisted Vee"
+    name: str
+    page_url: str
+    image_url: Optional[str] = None
+    # Other spellings seen for this character
+    aliases: Tuple[str, ...] = ()
+
+
+class CharacterRegistry:
+    """Every twisted the bot knows, with an index for O(1) name lookups
+
+    Loaded from the wiki category listing the twisteds (page URL and lead
+    image for each) and cached in a JSON file, so startup never waits on the
+    wiki. Refreshes ask only for pages added to the category since the last
+    one, with a full pass weekly to pick up new artwork. Characters the board
+    shows before the wiki lists them are added as they're seen.
+
+    Names resolve through a dict of normalized spellings, so the parsers,
+    alerts and announcements agree on one interned key and display name per
+    character without scanning anything.
+    """
+
+    FULL_REFRESH_INTERVAL = 7 * 24 * 3600
+    # Wait before trying again after a failed refresh
+    RETRY_DELAY = 3600
+
+    def __init__(self, path: Optional[str] = None, base_url: str = WIKI_BASE_URL,
+                 category: str = 'Category:Twisteds', refresh_interval: float = 24 * 3600):
+        self.path = path
+        self.base_url = base_url
+        self.category = category
+        self.refresh_interval = refresh_interval
+        self.refreshed_at = 0.0
+        self.full_refreshed_at = 0.0
+        self._retry_at = 0.0
+        self._characters: Dict[str, Character] = {}
+        # normalize_name(spelling) -> key
+        self._index: Dict[str, str] = {}
+        if path:
+            self._load()
+
+    @classmethod
+    def from_config(cls, config) -> 'CharacterRegistry':
+        """Registry cached in DATA_DIR/characters.json and refreshed every CHARACTER_REFRESH_HOURS"""
+        return cls(
+            config.get_character_cache_path(),
+            config.wiki_base_url,
+            config.character_category,
+            config.character_refresh_hours * 3600
+        )
+
+    def __len__(self) -> int:
+        return len(self._characters)
+
+    def __iter__(self) -> Iterator[Character]:
+        return iter(sorted(self._characters.values(), key=lambda character: character.name))
+
+    def page_url(self, title: str) -> str:
+        return f"{self.base_url}/wiki/{quote(title.replace(' ', '_'))}"
+
+    def resolve(self, name: Optional[str]) -> Optional[Character]:
+        """The character a name refers to, in any known spelling"""
+        if not name:
+            return None
+        key = self._index.get(normalize_name(name))
+        return self._characters.get(key) if key is not None else None
+
+    def canonical_name(self, name: Optional[str]) -> str:
+        """The wiki's name for a character, or the name itself formatted for display"""
+        character = self.resolve(name)
+        return character.name if character is not None else format_twisted_name(name)
+
+    def add(self, name: str, page_url: Optional[str] = None, image_url: Optional[str] = None,
+            aliases: Tuple[str, ...] = ()) -> bool:
+        """Add a character or update what's known about it, returning whether anything changed"""
+        name = sys.intern(' '.join(name.split()))
+        key = sys.intern(character_key(name))
+        existing = self._characters.get(key)
+        if existing is None:
+            character = Character(key, name, page_url or self.page_url(name), image_url, tuple(aliases))
+        else:
+            character = replace(
+                existing,
+                name=name,
+                page_url=page_url or existing.page_url,
+                image_url=image_url or existing.image_url,
+                aliases=existing.aliases + tuple(alias for alias in aliases if alias not in existing.aliases)
+            )
+            if character == existing:
+                return False
+
+        self._characters[key] = character
+        for spelling in (name, key) + character.aliases:
+            self._index[normalize_name(spelling)] = key
+        return True
+
+    def observe(self, snapshot: BoardSnapshot) -> Optional[Character]:
+        """Resolve the twisted in a snapshot, learning it if it's new
+
+        The snapshot is updated in place to the canonical name, and gets the
+        character's image when the board didn't show one.
+        """
+        if not snapshot.twisted:
+            return None
+        character = self.resolve(snapshot.twisted)
+        if character is None:
+            name = format_twisted_name(snapshot.twisted)
+            logger.info("Adding %s to the character registry from the board", name)
+            self.add(name, image_url=snapshot.image_url)
+            self.save()
+            character = self.resolve(name)
+
+        snapshot.twisted = character.name
+        if not snapshot.image_url:
+            snapshot.image_url = character.image_url
+        return character
+
+    def refresh_due(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return self.refresh_interval > 0 and now >= max(self.refreshed_at + self.refresh_interval, self._retry_at)
+
+    async def refresh(self, scraper, now: Optional[float] = None) -> int:
+        """Pull the character category from the wiki, returning how many characters were added or changed
+
+        Uses the scraper's session and fetch policy. Only pages added since
+        the last refresh are requested, unless a full refresh is due.
+        """
+        now = time.time() if now is None else now
+        full = now - self.full_refreshed_at >= self.FULL_REFRESH_INTERVAL
+        params = {
+            'action': 'query',
+            'generator': 'categorymembers',
+            'gcmtitle': self.category,
+            'gcmtype': 'page',
+            'gcmlimit': 'max',
+            'prop': 'pageimages|info',
+            'piprop': 'original',
+            'inprop': 'url',
+            'format': 'json',
+            'formatversion': '2',
+        }
+        if not full:
+            # Sorting by the time pages joined the category lets a refresh start where the last stopped
+            params.update(gcmsort='timestamp', gcmdir='newer',
+                          gcmstart=datetime.fromtimestamp(self.refreshed_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'))
+
+        async def request():
+            session = await scraper.get_session()
+            async with session.get(scraper.api_url, params=params) as response:
+                if response.status != 200:
+                    raise http_error(response.status)
+                data = await response.json(content_type=None)
+            if 'error' in data:
+                raise FetchError('api_error', retryable=False, message=f"MediaWiki API error: {data['error']}")
+            return data
+
+        changed = 0
+        try:
+            while True:
+                data = await scraper.fetch_policy.run('characters', request)
+                for page in data.get('query', {}).get('pages', []):
+                    title = page.get('title', '')
+                    # Categories also hold list and overview pages
+                    if not title.lower().startswith('twisted '):
+                        continue
+                    image_url = (page.get('original') or {}).get('source')
+                    if self.add(title, page.get('fullurl'), image_url):
+                        changed += 1
+                if 'continue' not in data:
+                    break
+                params.update(data['continue'])
+        except FetchError:
+            self._retry_at = now + min(self.RETRY_DELAY, self.refresh_interval)
+            if changed:
+                self.save()
+            raise
+
+        self.refreshed_at = now
+        if full:
+            self.full_refreshed_at = now
+        self.save()
+        logger.info(
+            "Refreshed the character registry (%s): %s added or updated, %s known",
+            'full' if full else 'incremental', changed, len(self._characters)
+        )
+        return changed
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable character cache %s: %s", self.path, e)
+            return
+        if data.get('version') != CACHE_VERSION:
+            return
+
+        for entry in data.get('characters', []):
+            self.add(entry['name'], entry.get('page_url'), entry.get('image_url'), tuple(entry.get('aliases', ())))
+        self.refreshed_at = data.get('refreshed_at', 0.0)
+        self.full_refreshed_at = data.get('full_refreshed_at', 0.0)
+        logger.debug("Loaded %s characters from %s", len(self._characters), self.path)
+
+    def save(self):
+        """Write the registry to its cache file atomically"""
+        if not self.path:
+            return
+        data = {
+            'version': CACHE_VERSION,
+            'refreshed_at': self.refreshed_at,
+            'full_refreshed_at': self.full_refreshed_at,
+            'characters': [
+                {'name': c.name, 'page_url': c.page_url, 'image_url': c.image_url, 'aliases': list(c.aliases)}
+                for c in self
+            ],
+        }
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            os.unlink(temp_path)
+            logger.error("Error saving the character registry to %s: %s", self.path, e)
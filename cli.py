@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Command-line entry point for the Daily Twisted Board checker.
+
+With no arguments this runs the long-lived bot (or webhook mode when
+DELIVERY_MODE=webhook). `--check-once` runs a single fetch, diffs it
+against the stored board and delivers any announcement before exiting,
+for cron jobs and short-lived containers.
+
+discord.py and BeautifulSoup are only imported on the paths that need
+them, so a check-once run that finds nothing new never loads either.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from config import Config
+from utils import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Exit codes for --check-once
+EXIT_OK = 0
+EXIT_FETCH_FAILED = 1
+EXIT_DELIVERY_FAILED = 2
+
+
+async def deliver_once(config: Config, scraper, snapshot, reason: str) -> bool:
+    """Announce one snapshot without a gateway connection, returning whether anything was delivered"""
+    from announcement import announcement_targets, build_announcement_embed
+    from image_cache import ImageCache
+
+    image_cache = ImageCache.from_config(config, scraper)
+    image = None
+    if image_cache is not None:
+        image = await image_cache.embed_image(snapshot.twisted, snapshot.image_url)
+    embed = build_announcement_embed(
+        snapshot.twisted, reason, image.url if image else snapshot.image_url, config.get_wiki_url(),
+        scraper.character_url(snapshot.twisted)
+    )
+
+    if config.delivery_mode == 'webhook':
+        from webhooks import WebhookDelivery
+
+        # Webhook posts reuse the connection pool the wiki fetch just warmed
+        delivery = WebhookDelivery(
+            scraper.get_session,
+            config.webhook_urls,
+            concurrency=config.announce_concurrency,
+            rate_limit=config.announce_rate_limit,
+            image_cache=image_cache
+        )
+        result = await delivery.deliver(config.get_ping_mentions(), embed, image)
+        total = len(delivery.webhooks)
+    else:
+        import discord
+        from alerts import AlertDispatcher, AlertRegistry, alert_message
+        from bot import send_announcement
+        from delivery import TokenBucket
+        from subscriptions import SubscriptionRegistry
+
+        subscriptions = SubscriptionRegistry(config.get_database_path())
+        alerts = AlertRegistry(config.get_database_path())
+        # login() only authenticates over REST; no gateway session is opened
+        client = discord.Client(intents=discord.Intents.none())
+        try:
+            targets = announcement_targets(subscriptions, config)
+            if not targets:
+                logger.error("No announcement channels configured")
+                return False
+            await client.login(config.discord_token)
+            limiter = TokenBucket(config.announce_rate_limit)
+            result = await send_announcement(
+                client,
+                subscriptions,
+                targets,
+                embed,
+                concurrency=config.announce_concurrency,
+                limiter=limiter,
+                image=image,
+                image_cache=image_cache
+            )
+            dispatcher = AlertDispatcher(client, alerts, subscriptions, limiter)
+            if dispatcher.enqueue(snapshot.twisted, alert_message(snapshot.twisted, config.get_wiki_url())):
+                dispatcher.start()
+                await dispatcher.join()
+                await dispatcher.stop()
+        finally:
+            await client.close()
+            alerts.close()
+            subscriptions.close()
+        total = len(targets)
+
+    logger.info("Announced current twisted to %s/%s targets in %.2fs", result.sent, total, result.elapsed)
+    return result.sent > 0
+
+
+async def check_once(config: Config) -> int:
+    """Fetch the board, diff it against the stored state and announce any change"""
+    from monitor import BoardMonitor
+    from scraper import DailyTwistedScraper
+    from snapshot_store import SnapshotStore
+    from status_feed import StatusFeed
+
+    scraper = DailyTwistedScraper.from_config(config)
+    store = SnapshotStore(config.get_database_path())
+    monitor = BoardMonitor(scraper, store, StatusFeed.from_config(config))
+    try:
+        if not monitor.restore_state():
+            # First run: record a baseline instead of announcing whatever is on the board
+            await monitor.load_initial_state()
+            return EXIT_OK if monitor.last_twisted else EXIT_FETCH_FAILED
+
+        # Recorded only once the change is announced, so a failed delivery is retried next run
+        snapshot, reason = await monitor.check(record=False)
+        if snapshot is None:
+            return EXIT_FETCH_FAILED
+
+        if reason is not None:
+            logger.info(reason)
+
+            async def deliver(snapshot, reason: str) -> bool:
+                return await deliver_once(config, scraper, snapshot, reason)
+
+            if not await monitor.announce(snapshot, reason, deliver):
+                return EXIT_DELIVERY_FAILED
+        monitor.commit(snapshot)
+        return EXIT_OK
+    finally:
+        await scraper.close()
+        store.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--check-once', action='store_true',
+                        help="check the board once, announce any change and exit")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    config = Config()
+
+    if args.check_once:
+        return asyncio.run(check_once(config))
+
+    if config.delivery_mode == 'webhook':
+        from webhooks import run_webhook_mode
+        runner = run_webhook_mode(config)
+    else:
+        from bot import main as run_bot
+        runner = run_bot()
+
+    try:
+        asyncio.run(runner)
+    except KeyboardInterrupt:
+        logger.info("Bot stopped by user")
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
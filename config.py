@@ -6,14 +6,46 @@ logger = logging.getLogger(__name__)
 class Config:
     """Configuration manager for the Discord bot"""
     
-    def __init__(self):
+    def __init__(self, validate: bool = True):
         self.discord_token = os.getenv('DISCORD_BOT_TOKEN')
         self.channel_id = self._get_channel_id()
         self.ping_role_id = os.getenv('PING_ROLE_ID', '1381148457212841985')
         self.ping_user_ids = self._get_ping_user_ids()
+        self.delivery_mode = os.getenv('DELIVERY_MODE', 'gateway').lower()
+        self.webhook_urls = [url.strip() for url in os.getenv('WEBHOOK_URLS', '').split(',') if url.strip()]
+        self.data_dir = os.getenv('DATA_DIR', 'data')
+        self.wiki_base_url = os.getenv('WIKI_BASE_URL', 'https://dandys-world-robloxhorror.fandom.com').rstrip('/')
+        self.fetch_mode = os.getenv('FETCH_MODE', 'html').lower()
+        self.parse_executor = os.getenv('PARSE_EXECUTOR', 'thread').lower()
+        self.parse_workers = self._get_int('PARSE_WORKERS', 1)
+        self.parse_timeout = self._get_float('PARSE_TIMEOUT', 20.0)
+        self.stream_fetch = os.getenv('STREAM_FETCH', 'true').lower() in ('1', 'true', 'yes')
+        self.fetch_attempts = self._get_int('FETCH_ATTEMPTS', 3)
+        self.fetch_hedge = os.getenv('FETCH_HEDGE', 'false').lower() in ('1', 'true', 'yes')
+        self.fetch_breaker_threshold = self._get_int('FETCH_BREAKER_THRESHOLD', 5)
+        self.fetch_breaker_reset = self._get_float('FETCH_BREAKER_RESET', 60.0)
+        self.metrics_port = self._get_int('METRICS_PORT', 0)
+        self.metrics_host = os.getenv('METRICS_HOST', '127.0.0.1')
+        self.metrics_enabled = bool(self.metrics_port) or os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+        self.announce_concurrency = self._get_int('ANNOUNCE_CONCURRENCY', 50)
+        self.announce_rate_limit = self._get_float('ANNOUNCE_RATE_LIMIT', 40.0)
+        self.image_cache = os.getenv('IMAGE_CACHE', 'true').lower() in ('1', 'true', 'yes')
+        self.image_thumbnail_size = self._get_int('IMAGE_THUMBNAIL_SIZE', 0)
+        self.watch_targets = os.getenv('WATCH_TARGETS', '')
+        self.leader_election = os.getenv('LEADER_ELECTION', 'none').lower()
+        self.leader_lease_seconds = self._get_float('LEADER_LEASE_SECONDS', 15.0)
+        self.status_feed_dir = os.getenv('STATUS_FEED_DIR', '')
+        self.status_history_limit = self._get_int('STATUS_HISTORY_LIMIT', 30)
+        self.sync_commands = os.getenv('SYNC_COMMANDS', 'true').lower() in ('1', 'true', 'yes')
+        self.character_category = os.getenv('CHARACTER_CATEGORY', 'Category:Twisteds')
+        self.character_refresh_hours = self._get_float('CHARACTER_REFRESH_HOURS', 24.0)
+        self.profile_cycles = os.getenv('PROFILE_CYCLES', 'false').lower() in ('1', 'true', 'yes')
+        self.profile_top = self._get_int('PROFILE_TOP', 15)
+        self.profile_history = self._get_int('PROFILE_HISTORY', 20)
         
-        # Validate required config
-        self._validate_config()
+        # Validate required config; tools that never talk to Discord skip this
+        if validate:
+            self._validate_config()
     
     def _get_channel_id(self):
         """Get and validate channel ID"""
@@ -25,9 +57,31 @@ class Config:
         try:
             return int(channel_id_str)
         except ValueError:
-            logger.error(f"Invalid DISCORD_CHANNEL_ID: {channel_id_str}")
+            logger.error("Invalid DISCORD_CHANNEL_ID: %s", channel_id_str)
             return None
     
+    def _get_int(self, name, default):
+        """Get an integer setting from environment"""
+        value = os.getenv(name)
+        if not value:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            logger.error("Invalid %s: %s", name, value)
+            return default
+
+    def _get_float(self, name, default):
+        """Get a numeric setting from environment"""
+        value = os.getenv(name)
+        if not value:
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            logger.error("Invalid %s: %s", name, value)
+            return default
+
     def _get_ping_user_ids(self):
         """Get ping user IDs from environment"""
         ping_users_str = os.getenv('PING_USER_IDS', '')
@@ -37,11 +91,23 @@ class Config:
         try:
             return [int(uid.strip()) for uid in ping_users_str.split(',') if uid.strip()]
         except ValueError:
-            logger.error(f"Invalid PING_USER_IDS format: {ping_users_str}")
+            logger.error("Invalid PING_USER_IDS format: %s", ping_users_str)
             return []
     
     def _validate_config(self):
         """Validate required configuration"""
+        if self.delivery_mode not in ('gateway', 'webhook'):
+            raise ValueError(f"Invalid DELIVERY_MODE: {self.delivery_mode}")
+
+        if self.leader_election not in ('none', 'sqlite', 'file'):
+            raise ValueError(f"Invalid LEADER_ELECTION: {self.leader_election}")
+
+        if self.delivery_mode == 'webhook':
+            # Webhook deployments never log in, so they need URLs instead of a token
+            if not self.webhook_urls:
+                raise ValueError("WEBHOOK_URLS is required when DELIVERY_MODE is webhook")
+            return
+
         if not self.discord_token:
             raise ValueError("DISCORD_BOT_TOKEN is required")
         
@@ -62,7 +128,7 @@ class Config:
                 role_id = int(self.ping_role_id)
                 mentions.append(f"<@&{role_id}>")
             except ValueError:
-                logger.error(f"Invalid PING_ROLE_ID: {self.ping_role_id}")
+                logger.error("Invalid PING_ROLE_ID: %s", self.ping_role_id)
         
         # Add user pings if configured
         for user_id in self.ping_user_ids:
@@ -70,6 +136,30 @@ class Config:
         
         return " ".join(mentions)
     
+    def get_database_path(self):
+        """Get the path of the SQLite database holding persistent bot state"""
+        return os.path.join(self.data_dir, 'totb.sqlite3')
+
+    def get_fetch_cache_path(self):
+        """Get the path of the on-disk conditional fetch cache"""
+        return os.path.join(self.data_dir, 'fetch_cache.json')
+
+    def get_leader_lock_path(self):
+        """Get the lock file used by LEADER_ELECTION=file"""
+        return os.path.join(self.data_dir, 'leader.lock')
+
+    def get_image_cache_dir(self):
+        """Get the directory twisted artwork is cached in"""
+        return os.path.join(self.data_dir, 'images')
+
+    def get_character_cache_path(self):
+        """Get the file the character registry is cached in"""
+        return os.path.join(self.data_dir, 'characters.json')
+
+    def get_profile_dir(self):
+        """Get the directory cycle profile reports are written to"""
+        return os.path.join(self.data_dir, 'profiles')
+
     def get_wiki_url(self):
         """Get the wiki URL to monitor"""
-        return "https://dandys-world-robloxhorror.fandom.com/wiki/Daily_Twisted_Board"
+        return f"{self.wiki_base_url}/wiki/Daily_Twisted_Board"
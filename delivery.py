@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class TokenBucket:
+    """Async token bucket that keeps requests under a global rate limit"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def pause(self, seconds: float):
+        """Drain the bucket after the server reported a global rate limit"""
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+@dataclass
+class FanOutResult:
+    """Outcome of delivering one message to many targets"""
+
+    sent: int = 0
+    failed: List = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+async def fan_out(targets: Iterable[T], send: Callable[[T], Awaitable[None]],
+                  concurrency: int = 50, limiter: Optional[TokenBucket] = None) -> FanOutResult:
+    """Send to every target concurrently, bounded by a semaphore and an optional rate limiter"""
+    result = FanOutResult()
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.monotonic()
+
+    async def deliver(target: T):
+        async with semaphore:
+            if limiter is not None:
+                await limiter.acquire()
+            try:
+                await send(target)
+                result.sent += 1
+            except Exception as e:
+                logger.error("Error delivering to %s: %s", target, e)
+                result.failed.append((target, e))
+
+    await asyncio.gather(*(deliver(target) for target in targets))
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+async def upload_then_fan_out(targets: Iterable[T], upload: Callable[[T], Awaitable[None]],
+                              send: Callable[[T], Awaitable[None]], concurrency: int = 50,
+                              limiter: Optional[TokenBucket] = None) -> FanOutResult:
+    """Deliver with `upload` to one target at a time until one succeeds, then fan `send` out to the rest
+
+    Used when the first delivery carries a file: once it has been uploaded
+    the remaining targets can point at the uploaded copy instead.
+    """
+    started = time.monotonic()
+    result = FanOutResult()
+    remaining = list(targets)
+    while remaining:
+        target = remaining.pop(0)
+        if limiter is not None:
+            await limiter.acquire()
+        try:
+            await upload(target)
+            result.sent += 1
+            break
+        except Exception as e:
+            logger.error("Error delivering to %s: %s", target, e)
+            result.failed.append((target, e))
+
+    rest = await fan_out(remaining, send, concurrency=concurrency, limiter=limiter)
+    result.sent += rest.sent
+    result.failed.extend(rest.failed)
+    result.elapsed = time.monotonic() - started
+    return result
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Optional
+from board import BoardSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a piece of page content"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class FetchCache:
+    """Validators, board section hash and last snapshot for conditional fetches"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.etag = None
+        self.last_modified = None
+        self.content_hash = None
+        self.body = None
+        self.snapshot = None
+        self._load()
+
+    def _load(self):
+        """Load the cache from disk if there is one"""
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.etag = data.get('etag')
+            self.last_modified = data.get('last_modified')
+            self.content_hash = data.get('content_hash')
+            self.body = data.get('body')
+            if data.get('snapshot'):
+                self.snapshot = BoardSnapshot.from_dict(data['snapshot'])
+            logger.debug("Loaded fetch cache from %s", self.path)
+        except Exception as e:
+            logger.warning("Ignoring unreadable fetch cache %s: %s", self.path, e)
+
+    def save(self):
+        """Atomically write the cache to disk"""
+        if not self.path:
+            return
+
+        data = {
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'content_hash': self.content_hash,
+            'body': self.body,
+            'snapshot': self.snapshot.to_dict() if self.snapshot else None
+        }
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.fetch_cache.')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error("Error saving fetch cache %s: %s", self.path, e)
+
+    def conditional_headers(self) -> dict:
+        """Request headers that let the server answer 304 Not Modified"""
+        if self.snapshot is None:
+            return {}
+
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def update_validators(self, response_headers):
+        """Remember the validators sent with a response"""
+        self.etag = response_headers.get('ETag', self.etag)
+        self.last_modified = response_headers.get('Last-Modified', self.last_modified)
+
+    def store(self, response_headers, body: str, body_hash: str, snapshot: BoardSnapshot):
+        """Replace the cached board with a freshly parsed one"""
+        self.etag = response_headers.get('ETag')
+        self.last_modified = response_headers.get('Last-Modified')
+        self.body = body
+        self.content_hash = body_hash
+        self.snapshot = snapshot
+        self.save()
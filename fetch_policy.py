@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+import aiohttp
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class FetchError(Exception):
+    """A failed fetch attempt, labelled with the cause used in metrics"""
+
+    def __init__(self, cause: str, retryable: bool = True, message: str = ""):
+        super().__init__(message or cause)
+        self.cause = cause
+        self.retryable = retryable
+
+
+class CircuitOpenError(FetchError):
+    """Raised without touching the network while the breaker is open"""
+
+    def __init__(self, retry_in: float):
+        super().__init__('circuit_open', retryable=False, message=f"circuit open for another {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def classify_error(error: BaseException) -> FetchError:
+    """Turn whatever an attempt raised into a FetchError"""
+    if isinstance(error, FetchError):
+        return error
+    if isinstance(error, asyncio.TimeoutError):
+        return FetchError('timeout', message="timed out")
+    if isinstance(error, aiohttp.ClientResponseError):
+        return http_error(error.status)
+    if isinstance(error, aiohttp.ClientError):
+        # Connection resets, DNS failures and dropped streams are worth another try
+        return FetchError('connection', message=str(error) or type(error).__name__)
+    return FetchError('error', retryable=False, message=str(error) or type(error).__name__)
+
+
+def http_error(status: int) -> FetchError:
+    """FetchError for an unexpected HTTP status; only 429 and 5xx are retried"""
+    return FetchError(f'http_{status}', retryable=status == 429 or status >= 500, message=f"HTTP {status}")
+
+
+class CircuitBreaker:
+    """Stops fetching after repeated failures, then lets a single trial through
+
+    Closed: requests flow. After `failure_threshold` consecutive retryable
+    failures it opens and rejects requests for `reset_timeout` seconds. Then
+    it is half-open: one request is allowed, and its result closes or
+    re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def retry_in(self) -> float:
+        """Seconds until the breaker lets a trial request through"""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        """Whether a request may go out now"""
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def cancel_trial(self):
+        """Forget a trial request that was cancelled before it finished, without counting it"""
+        self._trial_running = False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("Wiki is responding again - closing the circuit breaker")
+            metrics.inc('totb_fetch_circuit_transitions_total', state='closed')
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_running:
+                logger.warning(
+                    "Wiki failed %s times in a row - pausing fetches for %.0fs",
+                    self.failures, self.reset_timeout
+                )
+                metrics.inc('totb_fetch_circuit_transitions_total', state='open')
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+
+class LatencyTracker:
+    """Recent successful attempt latencies, for the hedging budget"""
+
+    def __init__(self, window: int = 50, min_samples: int = 10):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """The given percentile, or None until there are enough samples to trust it"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+@dataclass
+class FetchAttempt:
+    """One request made on behalf of a fetch"""
+    label: str
+    attempt: int
+    hedged: bool
+    started_at: float
+    elapsed: float
+    outcome: str
+
+
+class FetchPolicy:
+    """Retries, jittered backoff, a circuit breaker and optional hedging around a request
+
+    `run(label, request)` calls the request factory until it succeeds, it
+    raises a non-retryable FetchError, the attempts run out or the breaker
+    opens. Backoff uses full jitter (a random delay up to the exponential
+    cap) so restarted instances don't retry in lockstep. With hedging on, a
+    second copy of a slow attempt is started once the first exceeds the p95
+    of recent latencies, and whichever finishes first wins.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 10.0,
+                 attempt_timeout: Optional[float] = 15.0, hedge: bool = False,
+                 min_hedge_delay: float = 0.25, breaker: Optional[CircuitBreaker] = None,
+                 history: int = 100):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        # Most recent attempts, newest last
+        self.attempts: Deque[FetchAttempt] = deque(maxlen=history)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retrying after the given (0-based) attempt"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait on an attempt before hedging it, or None to not hedge"""
+        if not self.hedge:
+            return None
+        p95 = self.latency.percentile(0.95)
+        return None if p95 is None else max(self.min_hedge_delay, p95)
+
+    async def run(self, label: str, request: Callable[[], Awaitable[T]]) -> T:
+        """Run a request under the policy, raising FetchError when it can't succeed"""
+        for attempt in range(self.max_attempts):
+            trial = self.breaker.state == 'half_open'
+            if not self.breaker.allow():
+                raise CircuitOpenError(self.breaker.retry_in())
+
+            try:
+                result = await self._attempt(label, request, attempt)
+            except asyncio.CancelledError:
+                # Shutdown or a demotion says nothing about the wiki, but the next trial must still go out
+                if trial:
+                    self.breaker.cancel_trial()
+                raise
+            except FetchError as error:
+                if error.retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The wiki answered; a 404 or a parse problem is not an outage
+                    self.breaker.record_success()
+                if not error.retryable or attempt == self.max_attempts - 1:
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(
+                    "%s attempt %s/%s failed (%s) - retrying in %.2fs",
+                    label, attempt + 1, self.max_attempts, error, delay
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+        raise AssertionError("unreachable")
+
+    async def _attempt(self, label: str, request: Callable[[], Awaitable[T]], attempt: int) -> T:
+        delay = self.hedge_delay()
+        primary = asyncio.ensure_future(self._timed(label, request, attempt, False))
+        if delay is None:
+            return await primary
+
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                logger.debug("%s attempt slower than %.2fs - hedging", label, delay)
+                tasks.add(asyncio.ensure_future(self._timed(label, request, attempt, True)))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _timed(self, label: str, request: Callable[[], Awaitable[T]], attempt: int, hedged: bool) -> T:
+        started_at = time.time()
+        started = time.perf_counter()
+        outcome = 'ok'
+        try:
+            if self.attempt_timeout:
+                result = await asyncio.wait_for(request(), self.attempt_timeout)
+            else:
+                result = await request()
+            self.latency.add(time.perf_counter() - started)
+            return result
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        except Exception as e:
+            error = classify_error(e)
+            outcome = error.cause
+            raise error from e
+        finally:
+            elapsed = time.perf_counter() - started
+            self.attempts.append(FetchAttempt(label, attempt + 1, hedged, started_at, elapsed, outcome))
+            metrics.inc('totb_fetch_attempts_total', outcome=outcome, hedged=str(hedged).lower())
+            logger.debug("%s attempt %s%s: %s in %.3fs", label, attempt + 1, " (hedge)" if hedged else "",
+                         outcome, elapsed)
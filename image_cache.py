@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+import aiohttp
+from board import character_key
+from fetch_policy import FetchPolicy, http_error
+
+logger = logging.getLogger(__name__)
+
+# Discord only resolves attachment:// references to file names made of these
+UNSAFE_FILENAME_CHARACTERS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+CONTENT_TYPE_EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+}
+
+
+def attachment_filename(key: str, extension: str) -> str:
+    """Upload name for a character's artwork that an embed can reference, e.g. razzle_dazzle.png"""
+    return f"{UNSAFE_FILENAME_CHARACTERS.sub('_', key).strip('_') or 'artwork'}{extension}"
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def cdn_url_expiry(url: str) -> Optional[float]:
+    """Unix time a signed Discord CDN URL stops working, from its hex `ex` parameter"""
+    values = parse_qs(urlparse(url).query).get('ex')
+    if not values:
+        return None
+    try:
+        return float(int(values[0], 16))
+    except ValueError:
+        return None
+
+
+@dataclass
+class CachedImage:
+    """Index entry for one character's artwork"""
+    source_url: str
+    sha256: str
+    # File under the cache directory that gets uploaded (the thumbnail when one was made)
+    file_name: str
+    cdn_url: Optional[str] = None
+    cdn_expires_at: Optional[float] = None
+
+
+@dataclass
+class EmbedImage:
+    """What an announcement should do about its image
+
+    `url` goes into the embed. When `data` is set the image isn't on
+    Discord's CDN yet, so it must be uploaded as `filename` alongside the
+    message and `url` points at that attachment.
+    """
+    character: str
+    url: str
+    filename: Optional[str] = None
+    data: Optional[bytes] = None
+
+    @property
+    def needs_upload(self) -> bool:
+        return self.data is not None
+
+
+class ImageCache:
+    """Twisted artwork downloaded once, stored by content hash, and uploaded to Discord once
+
+    Files live in `directory` named by their SHA-256, so the same artwork
+    used for two characters or re-served under a new fandom URL is stored
+    once. `index.json` maps each character to its file and, after the first
+    upload, to the Discord CDN URL of that upload, which later announcements
+    reuse until it is close to expiring.
+    """
+
+    # Upload again when the CDN URL has less than this long left
+    CDN_EXPIRY_MARGIN = 3600
+
+    def __init__(self, directory: str, get_session: Callable[[], Awaitable[aiohttp.ClientSession]],
+                 thumbnail_size: int = 0, fetch_policy: Optional[FetchPolicy] = None):
+        self.directory = directory
+        self.get_session = get_session
+        self.thumbnail_size = thumbnail_size
+        self.fetch_policy = fetch_policy or FetchPolicy()
+        self.index_path = os.path.join(directory, 'index.json')
+        self.entries: Dict[str, CachedImage] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @classmethod
+    def from_config(cls, config, scraper) -> Optional['ImageCache']:
+        """Image cache sharing the scraper's session and fetch policy, or None when disabled"""
+        if not config.image_cache:
+            return None
+        return cls(
+            config.get_image_cache_dir(),
+            scraper.get_session,
+            thumbnail_size=config.image_thumbnail_size,
+            fetch_policy=scraper.fetch_policy
+        )
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = {key: CachedImage(**entry) for key, entry in data.items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Ignoring unreadable image index %s: %s", self.index_path, e)
+
+    def save(self):
+        """Write the index atomically"""
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({key: asdict(entry) for key, entry in self.entries.items()}, f)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logger.error("Error saving image index %s: %s", self.index_path, e)
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.directory, file_name)
+
+    def _write(self, file_name: str, data: bytes):
+        path = self._path(file_name)
+        if os.path.exists(path):
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    async def _download(self, url: str) -> tuple:
+        """(bytes, content type) of the image at url"""
+        async def request():
+            session = await self.get_session()
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise http_error(response.status)
+                return await response.read(), response.content_type
+
+        return await self.fetch_policy.run('image', request)
+
+    def _thumbnail(self, data: bytes, sha256: str) -> Optional[str]:
+        """Downscale the image to fit thumbnail_size, returning the thumbnail's file name"""
+        try:
+            from PIL import Image
+        except ImportError:
+            logger.warning("IMAGE_THUMBNAIL_SIZE is set but Pillow isn't installed - uploading full size")
+            self.thumbnail_size = 0
+            return None
+
+        file_name = f"{sha256}-{self.thumbnail_size}.png"
+        if not os.path.exists(self._path(file_name)):
+            with Image.open(io.BytesIO(data)) as image:
+                image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+                output = io.BytesIO()
+                image.save(output, format='PNG', optimize=True)
+            self._write(file_name, output.getvalue())
+        return file_name
+
+    async def _fetch(self, key: str, source_url: str) -> CachedImage:
+        data, content_type = await self._download(source_url)
+        sha256 = hashlib.sha256(data).hexdigest()
+        file_name = sha256 + CONTENT_TYPE_EXTENSIONS.get(content_type, '.png')
+        self._write(file_name, data)
+        if self.thumbnail_size:
+            # Decoding and resizing is CPU work - keep it off the event loop
+            file_name = await asyncio.to_thread(self._thumbnail, data, sha256) or file_name
+
+        previous = self.entries.get(key)
+        entry = CachedImage(source_url, sha256, file_name)
+        if previous is not None and previous.file_name == file_name:
+            # Same artwork behind a new URL - the earlier upload is still good
+            entry.cdn_url, entry.cdn_expires_at = previous.cdn_url, previous.cdn_expires_at
+        self.entries[key] = entry
+        self.save()
+        logger.info("Cached artwork for %s as %s", key, file_name)
+        return entry
+
+    async def embed_image(self, twisted_name: str, source_url: Optional[str],
+                          now: Optional[float] = None) -> Optional[EmbedImage]:
+        """How to show a twisted's artwork: a reusable CDN URL, an upload, or a hotlink"""
+        if not source_url:
+            return None
+        now = time.time() if now is None else now
+        key = character_key(twisted_name)
+
+        entry = self.entries.get(key)
+        try:
+            if entry is None or entry.source_url != source_url or not os.path.exists(self._path(entry.file_name)):
+                entry = await self._fetch(key, source_url)
+        except Exception as e:
+            logger.warning("Could not cache artwork for %s - hotlinking it instead: %s", twisted_name, e)
+            return EmbedImage(key, source_url)
+
+        if entry.cdn_url and (entry.cdn_expires_at is None or entry.cdn_expires_at - now > self.CDN_EXPIRY_MARGIN):
+            return EmbedImage(key, entry.cdn_url)
+
+        data = await asyncio.to_thread(_read_file, self._path(entry.file_name))
+        filename = attachment_filename(key, os.path.splitext(entry.file_name)[1])
+        return EmbedImage(key, f"attachment://{filename}", filename, data)
+
+    def remember_upload(self, image: EmbedImage, cdn_url: str):
+        """Keep the CDN URL Discord returned for an uploaded image so later embeds reuse it"""
+        entry = self.entries.get(image.character)
+        if entry is None:
+            return
+        entry.cdn_url = cdn_url
+        entry.cdn_expires_at = cdn_url_expiry(cdn_url)
+        self.save()
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, List, Optional
+from database import connect
+
+logger = logging.getLogger(__name__)
+
+LEADER_BACKENDS = ('none', 'sqlite', 'file')
+
+
+class LeaseBackend:
+    """Somewhere replicas can agree on who holds a named lease
+
+    `acquire` takes the lease if it is free or expired, or renews it if the
+    caller already holds it, and says whether the caller holds it now.
+    """
+
+    def acquire(self, holder: str, ttl: float) -> bool:
+        raise NotImplementedError
+
+    def release(self, holder: str):
+        raise NotImplementedError
+
+    def holder(self) -> Optional[str]:
+        """Current holder, if the lease is held"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SqliteLeaseBackend(LeaseBackend):
+    """Lease row in a SQLite database shared by every replica on the host or volume"""
+
+    def __init__(self, path: str, name: str = 'board-monitor'):
+        self.name = name
+        self.db = connect(path)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        self.db.commit()
+
+    def acquire(self, holder: str, ttl: float) -> bool:
+        now = time.time()
+        # One statement, so SQLite's write lock makes take-or-renew atomic across processes
+        self.db.execute('''
+            INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+            WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+        ''', (self.name, holder, now + ttl, now))
+        self.db.commit()
+        return self.holder() == holder
+
+    def release(self, holder: str):
+        self.db.execute('DELETE FROM leases WHERE name = ? AND holder = ?', (self.name, holder))
+        self.db.commit()
+
+    def holder(self) -> Optional[str]:
+        row = self.db.execute(
+            'SELECT holder FROM leases WHERE name = ? AND expires_at >= ?', (self.name, time.time())
+        ).fetchone()
+        return row['holder'] if row else None
+
+    def close(self):
+        self.db.close()
+
+
+class FileLockBackend(LeaseBackend):
+    """Exclusive lock on a file; the OS drops it the moment the holder dies, so takeover is immediate
+
+    POSIX only. The TTL doesn't apply - the lock lasts as long as the process.
+    """
+
+    def __init__(self, path: str):
+        import fcntl
+
+        self._fcntl = fcntl
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd: Optional[int] = None
+        self._holder: Optional[str] = None
+
+    def acquire(self, holder: str, ttl: float) -> bool:
+        if self._fd is not None:
+            return self._holder == holder
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._fcntl.flock(fd, self._fcntl.LOCK_EX | self._fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, holder.encode())
+        self._fd, self._holder = fd, holder
+        return True
+
+    def release(self, holder: str):
+        if self._fd is not None and self._holder == holder:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = self._holder = None
+
+    def holder(self) -> Optional[str]:
+        if self._holder is not None:
+            return self._holder
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return f.read() or None
+        except OSError:
+            return None
+
+    def close(self):
+        if self._holder is not None:
+            self.release(self._holder)
+
+
+Callback = Callable[[], Awaitable[None]]
+
+
+class LeaderElector:
+    """Keeps trying to take or renew a lease and tracks whether this replica leads
+
+    Without a backend the replica always leads, which is the single-instance
+    setup. The lease is renewed every `ttl / 3` seconds, so a follower takes
+    over within about `ttl` seconds of the leader stopping.
+    """
+
+    def __init__(self, backend: Optional[LeaseBackend] = None, ttl: float = 15.0,
+                 holder_id: Optional[str] = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.holder_id = holder_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = backend is None
+        self._elected = asyncio.Event()
+        if self.is_leader:
+            self._elected.set()
+        self._on_elected: List[Callback] = []
+        self._on_demoted: List[Callback] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, config) -> 'LeaderElector':
+        """Elector for LEADER_ELECTION, standalone when it is 'none'"""
+        if config.leader_election == 'sqlite':
+            backend = SqliteLeaseBackend(config.get_database_path())
+        elif config.leader_election == 'file':
+            backend = FileLockBackend(config.get_leader_lock_path())
+        else:
+            backend = None
+        return cls(backend, ttl=config.leader_lease_seconds)
+
+    def on_elected(self, callback: Callback):
+        self._on_elected.append(callback)
+
+    def on_demoted(self, callback: Callback):
+        self._on_demoted.append(callback)
+
+    async def _set_leader(self, is_leader: bool):
+        if is_leader == self.is_leader:
+            return
+        self.is_leader = is_leader
+        if is_leader:
+            logger.info("%s is now the leader - scraping and announcing", self.holder_id)
+            self._elected.set()
+            callbacks = self._on_elected
+        else:
+            logger.warning("%s lost the lease - following the shared snapshot store", self.holder_id)
+            self._elected.clear()
+            callbacks = self._on_demoted
+        for callback in callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error("Error in leadership callback: %s", e)
+
+    async def check(self) -> bool:
+        """Try to take or renew the lease once"""
+        if self.backend is None:
+            return True
+        try:
+            # SQLite may wait on another replica's write lock - don't block the loop on it
+            held = await asyncio.to_thread(self.backend.acquire, self.holder_id, self.ttl)
+        except Exception as e:
+            logger.error("Error renewing leader lease: %s", e)
+            held = False
+        await self._set_leader(held)
+        return held
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.ttl / 3)
+
+    async def start(self):
+        """Run the first election, then keep the lease renewed in the background"""
+        if self.backend is None or self._task is not None:
+            return
+        logger.info("Joining leader election as %s", self.holder_id)
+        await self.check()
+        if not self.is_leader:
+            logger.info("Following leader %s", self.backend.holder())
+        self._task = asyncio.create_task(self._run())
+
+    async def wait_for_leadership(self, timeout: Optional[float] = None) -> bool:
+        """Wait until this replica leads, or the timeout passes"""
+        try:
+            await asyncio.wait_for(self._elected.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.is_leader
+
+    async def stop(self):
+        """Stop renewing and hand the lease over straight away"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.backend is not None:
+            if self.is_leader:
+                await asyncio.to_thread(self.backend.release, self.holder_id)
+            self.backend.close()
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoopLagStats:
+    """How badly the event loop was blocked over one measurement window"""
+
+    max_lag: float = 0.0
+    total_lag: float = 0.0
+    samples: int = 0
+
+
+class EventLoopLagMonitor:
+    """Measures event loop blocking by timing how late a periodic sleep wakes up"""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.hooks: List[Callable[[str, LoopLagStats], None]] = []
+        self._stats = LoopLagStats()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start sampling on the running loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        """Stop sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            stats = self._stats
+            stats.samples += 1
+            stats.total_lag += lag
+            if lag > stats.max_lag:
+                stats.max_lag = lag
+
+    def reset(self) -> LoopLagStats:
+        """Close the current window and start a new one"""
+        stats, self._stats = self._stats, LoopLagStats()
+        return stats
+
+    def add_hook(self, hook: Callable[[str, LoopLagStats], None]):
+        """Register a callback that receives each reported window"""
+        self.hooks.append(hook)
+
+    def report(self, label: str) -> LoopLagStats:
+        """Close the current window and hand it to every hook"""
+        stats = self.reset()
+        for hook in self.hooks:
+            try:
+                hook(label, stats)
+            except Exception as e:
+                logger.error("Error in loop lag hook: %s", e)
+        return stats
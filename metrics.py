@@ -0,0 +1,172 @@
+import logging
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRIC_HELP = {
+    'totb_fetch_seconds': ('histogram', "Wiki fetch latency"),
+    'totb_fetch_response_bytes': ('histogram', "Bytes read per wiki response"),
+    'totb_fetch_cache_total': ('counter', "Conditional fetch results"),
+    'totb_fetch_attempts_total': ('counter', "Wiki request attempts by outcome, including retries and hedges"),
+    'totb_fetch_circuit_transitions_total': ('counter', "Fetch circuit breaker state changes"),
+    'totb_parse_seconds': ('histogram', "Parse time per extractor stage"),
+    'totb_scrape_failures_total': ('counter', "Failed scrapes by cause"),
+    'totb_watch_checks_total': ('counter', "Watch target checks by result"),
+    'totb_monitor_cycle_seconds': ('histogram', "Duration of one monitoring check"),
+    'totb_announce_seconds': ('histogram', "Time to fan an announcement out to every channel"),
+    'totb_announce_deliveries_total': ('counter', "Announcement deliveries by result"),
+    'totb_alert_deliveries_total': ('counter', "Character alert deliveries by kind and result"),
+    'totb_event_loop_lag_seconds': ('histogram', "Worst event loop block per monitoring cycle"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _NullTimer:
+    """Timer handed out while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, registry: 'Metrics', name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Metrics:
+    """In-process counters and histograms with Prometheus text output
+
+    Every method returns immediately while `enabled` is False, so the hooks
+    on the hot path cost a single attribute check when metrics are off.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        # name -> labels -> [bucket counts..., sum, count]
+        self._histograms: Dict[str, Dict[LabelKey, list]] = {}
+
+    @staticmethod
+    def _buckets(name: str):
+        return BYTES_BUCKETS if name.endswith('_bytes') else SECONDS_BUCKETS
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a histogram observation"""
+        if not self.enabled:
+            return
+        buckets = self._buckets(name)
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        values = series.get(key)
+        if values is None:
+            values = series[key] = [0] * (len(buckets) + 2)
+        index = bisect_left(buckets, value)
+        if index < len(buckets):
+            values[index] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def timer(self, name: str, **labels):
+        """Context manager that observes its duration in seconds"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def reset(self):
+        """Forget every recorded value"""
+        self._counters.clear()
+        self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        """Current values as plain data for in-process consumers"""
+        counters = {
+            name: {self._label_string(key): value for key, value in series.items()}
+            for name, series in self._counters.items()
+        }
+        histograms = {
+            name: {
+                self._label_string(key): {'count': values[-1], 'sum': values[-2]}
+                for key, values in series.items()
+            }
+            for name, series in self._histograms.items()
+        }
+        return {'counters': counters, 'histograms': histograms}
+
+    @staticmethod
+    def _label_string(key: LabelKey, extra: Optional[tuple] = None) -> str:
+        pairs = list(key) + ([extra] if extra else [])
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for name in sorted(set(self._counters) | set(self._histograms)):
+            kind, help_text = METRIC_HELP.get(name, ('untyped', name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for key, value in self._counters.get(name, {}).items():
+                lines.append(f"{name}{self._label_string(key)} {value}")
+
+            buckets = self._buckets(name)
+            for key, values in self._histograms.get(name, {}).items():
+                cumulative = 0
+                for bound, count in zip(buckets, values):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._label_string(key, ('le', bound))} {cumulative}")
+                lines.append(f"{name}_bucket{self._label_string(key, ('le', '+Inf'))} {values[-1]}")
+                lines.append(f"{name}_sum{self._label_string(key)} {values[-2]}")
+                lines.append(f"{name}_count{self._label_string(key)} {values[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+# Shared registry used by the scraper and the bot
+metrics = Metrics()
+
+
+async def start_metrics_server(port: int, host: str = '127.0.0.1'):
+    """Serve /metrics on a local port, returning the runner so it can be cleaned up"""
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render_prometheus(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Serving metrics on http://%s:%s/metrics", host, port)
+    return runner
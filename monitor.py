@@ -0,0 +1,207 @@
+import logging
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+from board import BoardSnapshot, BoardTimer
+from metrics import metrics
+from scheduler import RolloverScheduler, board_timer, cycle_id
+from snapshot_cache import SnapshotCache
+from snapshot_store import SnapshotStore
+from status_feed import StatusFeed
+
+logger = logging.getLogger(__name__)
+
+# Returns whether the announcement reached anyone
+Announce = Callable[[BoardSnapshot, str], Awaitable[bool]]
+
+
+class BoardMonitor:
+    """Fetch, change detection, persistence and scheduling shared by every delivery mode"""
+
+    # Seconds cycle IDs are rounded to; the soak harness shortens it for its simulated days
+    cycle_resolution = 3600
+
+    def __init__(self, scraper, store: SnapshotStore, status_feed: Optional[StatusFeed] = None):
+        self.scraper = scraper
+        self.store = store
+        self.status_feed = status_feed
+        self.scheduler = RolloverScheduler()
+        # Shared by scheduled checks and on-demand lookups so they never fetch twice at once
+        self.snapshot_cache = SnapshotCache(self._fetch_for_cache)
+        self.last_twisted = None
+        # Countdown from the last check; its cycle ID tells a restarted timer from a ticking one
+        self.last_timer: Optional[BoardTimer] = None
+        # Followers read what the leader stored instead of scraping
+        self.following = False
+
+    async def _fetch_for_cache(self) -> Optional[BoardSnapshot]:
+        if self.following:
+            return self.store.latest()
+        return await self.scraper.fetch_snapshot()
+
+    def follow(self) -> Optional[BoardSnapshot]:
+        """Catch up with the board the leader last stored, without scraping"""
+        try:
+            snapshot = self.store.latest()
+        except Exception as e:
+            logger.error("Error reading the shared snapshot store: %s", e)
+            return None
+        if snapshot is None or snapshot.twisted is None:
+            return None
+
+        if snapshot.twisted != self.last_twisted:
+            logger.info("Leader reported twisted: %s", snapshot.twisted)
+        self.last_twisted = snapshot.twisted
+        self.last_timer = self.timer_of(snapshot)
+        self.snapshot_cache.put(snapshot)
+        # Keeps the rollover deadline current so a takeover resumes on schedule
+        self.scheduler.observe(snapshot)
+        return snapshot
+
+    def restore_state(self) -> bool:
+        """Load the last observed board from the snapshot store"""
+        try:
+            snapshot = self.store.latest()
+            if snapshot is None:
+                logger.info("No stored board state - will scrape for a baseline")
+                return False
+
+            self.last_twisted = snapshot.twisted
+            self.last_timer = self.timer_of(snapshot)
+            self.snapshot_cache.put(snapshot)
+            self.scheduler.observe(snapshot)
+            logger.info("Restored twisted state: %s", snapshot.twisted)
+            return True
+        except Exception as e:
+            logger.error("Error restoring stored state: %s", e)
+            return False
+
+    async def load_initial_state(self):
+        """Scrape the board once to get a baseline when nothing was stored"""
+        try:
+            snapshot = await self.snapshot_cache.refresh()
+            if snapshot and snapshot.twisted:
+                self.last_twisted = snapshot.twisted
+                self.last_timer = self.timer_of(snapshot)
+                self.store.record(snapshot, self.last_timer)
+                self._publish(snapshot)
+                self.scheduler.observe(snapshot)
+                logger.info("Initial twisted state: %s", snapshot.twisted)
+                if snapshot.timer:
+                    logger.info("Timer info: %s", snapshot.timer)
+            else:
+                logger.warning("Could not get initial twisted state")
+        except Exception as e:
+            logger.error("Error getting initial state: %s", e)
+
+    def timer_of(self, snapshot: BoardSnapshot) -> Optional[BoardTimer]:
+        """The snapshot's countdown, with cycle IDs at this monitor's resolution"""
+        return board_timer(snapshot, self.cycle_resolution)
+
+    def cycle_of(self, snapshot: BoardSnapshot) -> str:
+        """ID of the board cycle a snapshot belongs to, used to claim its announcement"""
+        return cycle_id(snapshot, self.cycle_resolution)
+
+    def detect_change(self, snapshot: BoardSnapshot, timer: Optional[BoardTimer] = None) -> Optional[str]:
+        """Reason to announce this snapshot, or None when nothing meaningful changed"""
+        current_twisted = snapshot.twisted
+
+        if self.last_twisted != current_twisted:
+            # Twisted character changed
+            return f"Twisted changed from {self.last_twisted} to {current_twisted}"
+
+        if timer is None:
+            timer = self.timer_of(snapshot)
+        # Same twisted: a new cycle shows up as a countdown ending at a different rollover.
+        # An expired timer only means the wiki is late to roll over, not that a cycle began.
+        if timer and self.last_timer and not timer.expired and timer.cycle_id != self.last_timer.cycle_id:
+            return f"Timer restarted with same twisted: {current_twisted}"
+
+        return None
+
+    async def check(self, record: bool = True) -> Tuple[Optional[BoardSnapshot], Optional[str]]:
+        """Fetch the board and work out whether to announce it
+
+        The snapshot is recorded as the new state unless `record` is False,
+        in which case the caller commits it once any announcement is out.
+        """
+        logger.info("Checking Daily Twisted Board for updates...")
+        snapshot = await self.snapshot_cache.refresh()
+
+        if snapshot is None or snapshot.twisted is None:
+            logger.warning("Failed to get current twisted - skipping this check")
+            return None, None
+
+        logger.info("Current twisted: %s", snapshot.twisted)
+        if snapshot.timer:
+            logger.info("Timer info: %s", snapshot.timer)
+
+        # Parsed once, so detection and the stored cycle ID use the same resolution
+        timer = self.timer_of(snapshot)
+        reason = self.detect_change(snapshot, timer)
+        if reason is None:
+            logger.info("No announcement needed - still %s", snapshot.twisted)
+
+        if record:
+            self.commit(snapshot, timer)
+        return snapshot, reason
+
+    def commit(self, snapshot: BoardSnapshot, timer: Optional[BoardTimer] = None):
+        """Make a checked snapshot the state later checks are compared against"""
+        if timer is None:
+            timer = self.timer_of(snapshot)
+        self.last_twisted = snapshot.twisted
+        self.last_timer = timer
+        self.store.record(snapshot, timer)
+        self._publish(snapshot)
+
+    async def announce(self, snapshot: BoardSnapshot, reason: str, announce: Announce) -> bool:
+        """Claim the snapshot's cycle and announce it, returning False when it should be retried
+
+        A cycle another instance already claimed counts as announced. When
+        delivery fails the claim is released, so the next check - here or on
+        another replica - announces it instead of finding it taken.
+        """
+        cycle = self.cycle_of(snapshot)
+        if not self.store.claim_announcement(cycle, snapshot.twisted):
+            logger.info("Cycle %s was already announced - skipping", cycle)
+            return True
+
+        try:
+            delivered = await announce(snapshot, reason)
+        except Exception as e:
+            logger.error("Error announcing %s: %s", snapshot.twisted, e)
+            delivered = False
+        if not delivered:
+            logger.warning("Announcement for cycle %s wasn't delivered - releasing it for a retry", cycle)
+            self.store.release_announcement(cycle)
+        return delivered
+
+    def _publish(self, snapshot: BoardSnapshot):
+        """Update the static status feed, when one is configured"""
+        if self.status_feed is not None:
+            self.status_feed.publish(snapshot)
+
+    async def run_cycle(self, announce: Announce) -> Optional[BoardSnapshot]:
+        """One scheduled check: fetch, announce any change and plan the next check"""
+        started = time.perf_counter()
+        snapshot = None
+        reason = None
+        delivered = True
+        try:
+            snapshot, reason = await self.check(record=False)
+            if snapshot is not None:
+                if reason:
+                    logger.info(reason)
+                    delivered = await self.announce(snapshot, reason, announce)
+                # An undelivered change stays unrecorded, so the next check detects it again
+                if delivered:
+                    self.commit(snapshot)
+            # After announcing, so a due refresh never delays an announcement
+            await self.scraper.refresh_characters()
+        except Exception as e:
+            logger.error("Error in monitoring cycle: %s", e)
+        finally:
+            metrics.observe('totb_monitor_cycle_seconds', time.perf_counter() - started)
+            # A failed announcement is retried on the short burst schedule, like a failed fetch
+            self.scheduler.observe(snapshot if delivered else None, reason is not None)
+        return snapshot
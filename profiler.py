@@ -0,0 +1,224 @@
+import asyncio
+import cProfile
+import linecache
+import logging
+import os
+import pstats
+import signal
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Deque, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Allocations made by the profiler itself and by imports aren't the bot's
+_IGNORED_ALLOCATIONS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+@dataclass
+class CycleProfile:
+    """What one profiled cycle cost in time and retained memory"""
+
+    label: str
+    started_at: float
+    seconds: float
+    # Traced memory now held versus the end of the previous profiled cycle
+    memory_growth: int
+    traced_memory: int
+    # (function, calls, own seconds, cumulative seconds), most own time first
+    slowest: List[Tuple[str, int, float, float]] = field(default_factory=list)
+    # (allocation site, bytes grown, blocks grown), largest growth first
+    growth: List[Tuple[str, int, int]] = field(default_factory=list)
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f"{size:+.0f} {unit}" if unit == 'B' else f"{size:+.1f} {unit}"
+        size /= 1024
+    return f"{size:+.1f} GiB"
+
+
+def _function_name(key: tuple) -> str:
+    filename, line, name = key
+    if filename == '~':
+        # Built-ins show up as ('~', 0, '<method ...>')
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+class CycleProfiler:
+    """Opt-in cProfile and tracemalloc capture around each monitor cycle
+
+    Every cycle run under `cycle()` is profiled with cProfile, and traced
+    memory is compared with the end of the previous profiled cycle, so
+    allocations that are still alive - a page string or soup tree held on
+    to, a session never closed - show up cycle after cycle. Each cycle keeps
+    only its top N functions by own time and top N growing allocation sites,
+    and only the last `history` cycles are kept, so the profiler's own
+    footprint stays flat over weeks of uptime.
+
+    cProfile sees everything the event loop runs while a cycle is awaiting,
+    including other tasks; tracemalloc runs for as long as the profiler is
+    enabled and slows allocation-heavy code down noticeably.
+
+    `dump()` (or SIGUSR1, once `install_signal_handler` ran) writes the
+    buffer to a timestamped report in `directory`.
+    """
+
+    def __init__(self, directory: str, top: int = 15, history: int = 20, frames: int = 8):
+        self.directory = directory
+        self.top = max(1, top)
+        self.frames = max(1, frames)
+        self.profiles: Deque[CycleProfile] = deque(maxlen=max(1, history))
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._started_tracing = False
+        self._signal_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_config(cls, config) -> Optional['CycleProfiler']:
+        """Profiler writing to DATA_DIR/profiles when PROFILE_CYCLES is on, otherwise None"""
+        if not config.profile_cycles:
+            return None
+        return cls(config.get_profile_dir(), config.profile_top, config.profile_history)
+
+    def start(self):
+        """Start tracing allocations; cycles before this only get cProfile data"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._baseline = self._snapshot()
+        logger.info("Cycle profiling enabled - keeping the last %s cycles", self.profiles.maxlen)
+
+    def stop(self):
+        """Stop tracing and remove the signal handler"""
+        if self._signal_loop is not None:
+            self._signal_loop.remove_signal_handler(signal.SIGUSR1)
+            self._signal_loop = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._baseline = None
+
+    def _snapshot(self) -> Optional[tracemalloc.Snapshot]:
+        if not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED_ALLOCATIONS)
+
+    @contextmanager
+    def cycle(self, label: str):
+        """Profile the code run inside the block as one cycle"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler already owns the interpreter's profiling hook
+            logger.warning("Can't profile %s: %s", label, e)
+            profile = None
+
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            seconds = time.perf_counter() - started
+            try:
+                self._record(label, started_at, seconds, profile)
+            except Exception as e:
+                logger.error("Error recording the profile of %s: %s", label, e)
+
+    def _record(self, label: str, started_at: float, seconds: float, profile: Optional[cProfile.Profile]):
+        slowest = []
+        if profile is not None:
+            stats = pstats.Stats(profile).stats
+            ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+            slowest = [(_function_name(key), calls, own, cumulative)
+                       for key, (_, calls, own, cumulative, _) in ranked]
+
+        growth = []
+        memory_growth = traced_memory = 0
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            traced_memory = sum(trace.size for trace in snapshot.traces)
+            if self._baseline is not None:
+                differences = snapshot.compare_to(self._baseline, 'traceback')
+                memory_growth = sum(difference.size_diff for difference in differences)
+                growth = [
+                    # Tracebacks run oldest first; show where it was allocated, then who asked for it
+                    (' <- '.join(f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                                 for frame in reversed(difference.traceback[-3:])),
+                     difference.size_diff, difference.count_diff)
+                    for difference in differences[:self.top]
+                    if difference.size_diff > 0
+                ]
+            self._baseline = snapshot
+
+        record = CycleProfile(label, started_at, seconds, memory_growth, traced_memory, slowest, growth)
+        self.profiles.append(record)
+        logger.info(
+            "Profiled %s: %.2fs, traced memory %s (%s since the last cycle)",
+            label, seconds, _format_bytes(traced_memory).lstrip('+'), _format_bytes(memory_growth)
+        )
+
+    def report(self) -> str:
+        """Plain-text report of the buffered cycles, newest first"""
+        lines = [f"Cycle profiles ({len(self.profiles)} of the last {self.profiles.maxlen} kept)"]
+        total_growth = sum(record.memory_growth for record in self.profiles)
+        lines.append(f"Traced memory growth across these cycles: {_format_bytes(total_growth)}")
+        for record in reversed(self.profiles):
+            started = datetime.fromtimestamp(record.started_at, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            lines.append('')
+            lines.append(
+                f"== {record.label} at {started} UTC: {record.seconds:.3f}s, "
+                f"traced {_format_bytes(record.traced_memory).lstrip('+')}, {_format_bytes(record.memory_growth)}"
+            )
+            if record.growth:
+                lines.append("  retained allocations:")
+                for site, size, count in record.growth:
+                    lines.append(f"    {_format_bytes(size):>12} {count:+7d} blocks  {site}")
+            if record.slowest:
+                lines.append("  own time:")
+                for name, calls, own, cumulative in record.slowest:
+                    lines.append(f"    {own:9.4f}s {cumulative:9.4f}s cum {calls:7d} calls  {name}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self) -> Optional[str]:
+        """Write the report to a timestamped file, returning its path"""
+        os.makedirs(self.directory, exist_ok=True)
+        name = datetime.now(timezone.utc).strftime('profile-%Y%m%dT%H%M%SZ.txt')
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.report())
+        except OSError as e:
+            logger.error("Error writing the profile report to %s: %s", path, e)
+            return None
+        logger.info("Wrote profiles of %s cycles to %s", len(self.profiles), path)
+        return path
+
+    def install_signal_handler(self) -> bool:
+        """Dump the report on SIGUSR1 (`kill -USR1 <pid>`); not available on Windows"""
+        if not hasattr(signal, 'SIGUSR1'):
+            logger.warning("SIGUSR1 isn't available here - profiles are only dumped on shutdown")
+            return False
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGUSR1, self.dump)
+        except (NotImplementedError, RuntimeError) as e:
+            logger.warning("Can't install the SIGUSR1 profile dump handler: %s", e)
+            return False
+        self._signal_loop = loop
+        logger.info("Send SIGUSR1 to process %s to dump cycle profiles", os.getpid())
+        return True
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from board import TIMER_UNIT_SECONDS, BoardSnapshot, BoardTimer
+
+logger = logging.getLogger(__name__)
+
+
+def timer_remaining_seconds(timer_fields: dict) -> Optional[int]:
+    """Total seconds left on a parsed board timer"""
+    if not timer_fields:
+        return None
+    return sum(value * TIMER_UNIT_SECONDS[unit] for unit, value in timer_fields.items())
+
+
+def snapshot_deadline(snapshot: BoardSnapshot) -> Optional[float]:
+    """Absolute Unix time at which the board in a snapshot rolls over"""
+    remaining = timer_remaining_seconds(snapshot.timer_fields)
+    if remaining is None:
+        return None
+    return (snapshot.fetched_at or time.time()) + remaining
+
+
+def next_midnight_utc(now: float) -> float:
+    """The documented rollover time (8 PM EST / midnight UTC) after now"""
+    today = datetime.fromtimestamp(now, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (today + timedelta(days=1)).timestamp()
+
+
+def _round_deadline(deadline: float, resolution: int) -> float:
+    return round(deadline / resolution) * resolution
+
+
+def _cycle_name(deadline: float, resolution: int) -> str:
+    fmt = '%Y-%m-%dT%HZ' if resolution >= 3600 else '%Y-%m-%dT%H:%M:%SZ'
+    return datetime.fromtimestamp(_round_deadline(deadline, resolution), timezone.utc).strftime(fmt)
+
+
+def cycle_deadline(snapshot: BoardSnapshot, resolution: int = 3600) -> float:
+    """Rollover that ends the snapshot's cycle, rounded to `resolution` seconds"""
+    deadline = snapshot_deadline(snapshot) or next_midnight_utc(snapshot.fetched_at or time.time())
+    return _round_deadline(deadline, resolution)
+
+
+def cycle_id(snapshot: BoardSnapshot, resolution: int = 3600) -> str:
+    """Stable ID for the board cycle a snapshot belongs to, e.g. "2026-10-17T00Z"
+
+    Named after the rollover that ends the cycle. The deadline is rounded to
+    `resolution` seconds (an hour, since timers only show minutes), so
+    replicas that read the same board a few seconds apart still agree on the
+    ID. Shorter resolutions are for simulated boards with short cycles.
+    """
+    timer = board_timer(snapshot, resolution)
+    if timer is not None:
+        return timer.cycle_id
+    return _cycle_name(next_midnight_utc(snapshot.fetched_at or time.time()), resolution)
+
+
+def board_timer(snapshot: BoardSnapshot, resolution: int = 3600) -> Optional[BoardTimer]:
+    """The snapshot's countdown as a BoardTimer, or None when the board showed no timer"""
+    remaining = timer_remaining_seconds(snapshot.timer_fields)
+    if remaining is None:
+        return None
+    deadline = (snapshot.fetched_at or time.time()) + remaining
+    return BoardTimer(remaining, int(deadline), _cycle_name(deadline, resolution))
+
+
+class RolloverScheduler:
+    """Sleeps until the board's rollover deadline, then polls in a short burst until it flips
+
+    Without a timer on the board nothing says whether the wiki is late or
+    the same twisted simply stayed, so that burst gives up after
+    `untimed_burst` seconds and waits for the next midnight fallback.
+    """
+
+    def __init__(self, grace: float = 5.0, burst_initial: float = 5.0, burst_max: float = 300.0,
+                 max_idle: float = 6 * 3600, untimed_burst: float = 3600.0):
+        self.grace = grace
+        self.burst_initial = burst_initial
+        self.burst_max = burst_max
+        self.max_idle = max_idle
+        self.untimed_burst = untimed_burst
+        self.deadline = None
+        self.next_check = None
+        self._burst_delay = burst_initial
+
+    def _backoff(self, now: float) -> float:
+        """Schedule the next burst poll and grow the delay for the one after"""
+        self.next_check = now + self._burst_delay
+        self._burst_delay = min(self._burst_delay * 2, self.burst_max)
+        return self.next_check
+
+    def observe(self, snapshot: Optional[BoardSnapshot], changed: bool = False,
+                now: Optional[float] = None) -> float:
+        """Feed the result of a check and work out when the next one is due"""
+        now = time.time() if now is None else now
+
+        if snapshot is None or snapshot.twisted is None:
+            return self._backoff(now)
+
+        new_deadline = snapshot_deadline(snapshot)
+
+        if self.deadline is not None and now >= self.deadline:
+            # Waiting on a rollover - a new character or a timer that jumped forward ends the burst
+            rolled_over = changed or (new_deadline is not None and new_deadline > self.deadline + 60)
+            if not rolled_over:
+                if new_deadline is not None or now < self.deadline + self.untimed_burst:
+                    logger.debug("Rollover deadline passed but the board hasn't changed yet")
+                    return self._backoff(now)
+                logger.info(
+                    "No rollover %.0f minutes after the expected time and no timer on the board - "
+                    "back to the idle schedule", (now - self.deadline) / 60
+                )
+
+        self.deadline = new_deadline if new_deadline is not None else next_midnight_utc(now)
+        if self.deadline <= now:
+            return self._backoff(now)
+
+        self._burst_delay = self.burst_initial
+        self.next_check = min(self.deadline + self.grace, now + self.max_idle)
+        return self.next_check
+
+    def seconds_until_due(self, now: Optional[float] = None) -> float:
+        """Seconds until the next check should run"""
+        if self.next_check is None:
+            return 0.0
+        now = time.time() if now is None else now
+        return max(0.0, self.next_check - now)
+
+    async def sleep_until_due(self):
+        """Sleep until the next check is due"""
+        delay = self.seconds_until_due()
+        if delay > 0:
+            due = datetime.fromtimestamp(self.next_check, timezone.utc)
+            logger.info("Next board check in %.0f seconds at %s UTC", delay, due.strftime('%H:%M:%S'))
+            await asyncio.sleep(delay)
@@ -1,229 +1,578 @@
 import aiohttp
 import asyncio
+import codecs
+import importlib.util
 import logging
 import re
-from bs4 import BeautifulSoup
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Optional
+from board import WIKI_BASE_URL, BoardSnapshot, parse_timer_fields
+from characters import CharacterRegistry
+from fetch_cache import FetchCache, content_hash
+from fetch_policy import CircuitBreaker, FetchError, FetchPolicy, http_error
+from metrics import metrics
+from stream_scanner import BoardStreamScanner
+from utils import setup_worker_logging
+from wikitext import extract_wikitext_snapshot
 
 logger = logging.getLogger(__name__)
 
+# Checked without importing so cold starts don't pay for lxml until a page is parsed
+DEFAULT_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+# aiohttp only decodes brotli when one of these packages is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+OCCUPIED_PATTERN = re.compile(r"Currently,\s+the\s+board\s+is\s+occupied\s+by\s+(.+?)(?:\.|$|\n)", re.IGNORECASE | re.DOTALL)
+OCCUPIED_MARKER = re.compile(r"Currently.*occupied by", re.IGNORECASE)
+TWISTED_HREF = re.compile(r'/wiki/Twisted_')
+
+# Look for timer patterns like "It will be X hours, Y minutes and Z seconds until"
+TIMER_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"It will be (.+?) until the Daily Twisted Board changes",
+        r"(\d+) hours?, (\d+) minutes? and (\d+) seconds? until",
+        r"(\d+) hours? and (\d+) minutes? until",
+        r"(\d+) minutes? and (\d+) seconds? until",
+        r"(\d+) seconds? until"
+    )
+]
+
+
+def slice_board_section(html_content: str) -> str:
+    """Cut the article body out of the page without parsing it"""
+    start = html_content.find('<div class="mw-parser-output"')
+    if start == -1:
+        return html_content
+
+    end = -1
+    for end_marker in ('<!-- \nNewPP limit report', 'class="printfooter"'):
+        end = html_content.find(end_marker, start)
+        if end != -1:
+            break
+    return html_content[start:end] if end != -1 else html_content[start:]
+
+
+def _find_twisted(soup, text_content: str) -> Optional[str]:
+    """Find the twisted currently occupying the board"""
+    match = OCCUPIED_PATTERN.search(text_content)
+    if match:
+        # Clean up the name (remove extra whitespace, periods, etc.)
+        twisted_name = re.sub(r'\s+', ' ', match.group(1).strip())
+        return twisted_name.rstrip('.')
+
+    # Alternative method: look for a twisted link after the "occupied by" text
+    for element in soup.find_all(string=OCCUPIED_MARKER):
+        parent = element.parent
+        if parent:
+            for next_elem in parent.find_next_siblings():
+                for link in next_elem.find_all('a'):
+                    href = link.get('href', '')
+                    text = link.get_text().strip()
+                    if 'Twisted' in text and '/wiki/Twisted_' in href:
+                        logger.debug("Found twisted via HTML parsing: %s", text)
+                        return text
+
+    # Try to find any link with "Twisted" in the title near the occupied text
+    occupied_text = soup.find(string=OCCUPIED_MARKER)
+    if occupied_text:
+        parent = occupied_text.parent
+        for i in range(3):  # Check next few elements
+            if parent.next_sibling:
+                parent = parent.next_sibling
+                if hasattr(parent, 'find'):
+                    twisted_link = parent.find('a', href=TWISTED_HREF)
+                    if twisted_link:
+                        twisted_name = twisted_link.get_text().strip()
+                        logger.debug("Found twisted via sibling search: %s", twisted_name)
+                        return twisted_name
+
+    return None
+
+
+def _find_timer(text_content: str) -> Optional[str]:
+    """Find the countdown sentence for the next board change"""
+    for pattern in TIMER_PATTERNS:
+        match = pattern.search(text_content)
+        if match:
+            return match.group(0).strip()
+    return None
+
+
+def extract_board_snapshot(html_content: str, parser: str = DEFAULT_PARSER,
+                           timings: Optional[dict] = None) -> BoardSnapshot:
+    """Parse the page once and pull every board field out of the same tree
+
+    When a timings dict is given, the seconds spent in each stage are stored in it.
+    """
+    # bs4 is imported on first parse so one-shot runs and streamed fetches start faster
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    started = time.perf_counter()
+    # Only the article body holds the board; skip the fandom skin around it
+    board_section = SoupStrainer('div', class_='mw-parser-output')
+    soup = BeautifulSoup(slice_board_section(html_content), parser, parse_only=board_section)
+    if not soup.find(True):
+        # Layout changed or not a full page - fall back to the whole document
+        soup = BeautifulSoup(html_content, parser)
+    text_content = soup.get_text()
+    soup_done = time.perf_counter()
+
+    twisted = _find_twisted(soup, text_content)
+    twisted_done = time.perf_counter()
+    timer = _find_timer(text_content)
+    timer_done = time.perf_counter()
+    images = tuple(
+        (img.get('alt', '').lower(), img.get('src'))
+        for img in soup.find_all('img', alt=True)
+        if img.get('src')
+    )
+
+    snapshot = BoardSnapshot(
+        twisted=twisted,
+        timer=timer,
+        timer_fields=parse_timer_fields(timer),
+        images=images
+    )
+    if twisted:
+        snapshot.image_url = snapshot.image_for(twisted)
+
+    if timings is not None:
+        timings['soup'] = soup_done - started
+        timings['twisted'] = twisted_done - soup_done
+        timings['timer'] = timer_done - twisted_done
+        timings['image'] = time.perf_counter() - timer_done
+    return snapshot
+
+
+def extract_board_snapshot_timed(html_content: str, parser: str = DEFAULT_PARSER) -> tuple:
+    """extract_board_snapshot that also returns its stage timings, for use across processes"""
+    timings = {}
+    snapshot = extract_board_snapshot(html_content, parser, timings)
+    return snapshot, timings
+
+
+def _record_parse_timings(timings: dict):
+    for stage, seconds in timings.items():
+        metrics.observe('totb_parse_seconds', seconds, extractor=stage)
+
 class DailyTwistedScraper:
     """Scraper for the Daily Twisted Board wiki page"""
     
-    def __init__(self):
-        self.wiki_url = "https://dandys-world-robloxhorror.fandom.com/wiki/Daily_Twisted_Board"
+    PAGE_TITLE = "Daily_Twisted_Board"
+    FETCH_MODES = ('html', 'api', 'raw')
+    PARSE_EXECUTORS = ('thread', 'process', 'inline')
+    STREAM_CHUNK_SIZE = 16384
+
+    def __init__(self, parser: str = DEFAULT_PARSER, cache_path: Optional[str] = None,
+                 fetch_mode: str = 'html', base_url: str = WIKI_BASE_URL,
+                 parse_executor: str = 'thread', parse_workers: int = 1, parse_timeout: float = 20.0,
+                 stream_fetch: bool = True, fetch_policy: Optional[FetchPolicy] = None,
+                 characters: Optional[CharacterRegistry] = None):
+        self.base_url = base_url.rstrip('/')
+        self.wiki_url = f"{self.base_url}/wiki/{self.PAGE_TITLE}"
+        self.api_url = f"{self.base_url}/api.php"
+        if fetch_mode not in self.FETCH_MODES:
+            logger.warning("Unknown fetch mode %r - using html", fetch_mode)
+            fetch_mode = 'html'
+        self.fetch_mode = fetch_mode
+        if parse_executor not in self.PARSE_EXECUTORS:
+            logger.warning("Unknown parse executor %r - using thread", parse_executor)
+            parse_executor = 'thread'
+        self.parse_executor = parse_executor
+        self.parse_workers = max(1, parse_workers)
+        self.parse_timeout = parse_timeout
+        self._executor = None
+        self.stream_fetch = stream_fetch
         self.session = None
+        self.parser = parser
+        self.fetch_cache = FetchCache(cache_path)
+        self.fetch_policy = fetch_policy or FetchPolicy()
+        # Names on the board resolve through this; without a cache file it only learns from the board
+        if characters is None:
+            characters = CharacterRegistry(base_url=self.base_url, refresh_interval=0)
+        self.characters = characters
+        self._parsed = None
     
-    async def _get_session(self):
-        """Get or create aiohttp session"""
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get or create the pooled aiohttp session, shared with webhook delivery"""
         if self.session is None or self.session.closed:
             self.session = aiohttp.ClientSession(
                 timeout=aiohttp.ClientTimeout(total=30),
                 headers={
-                    'User-Agent': 'DandyWorldBot/1.0 (Discord Bot)'
+                    'User-Agent': 'DandyWorldBot/1.0 (Discord Bot)',
+                    'Accept-Encoding': ACCEPT_ENCODING
                 }
             )
         return self.session
     
+    @classmethod
+    def from_config(cls, config) -> 'DailyTwistedScraper':
+        """Build a scraper from the bot's Config"""
+        return cls(
+            cache_path=config.get_fetch_cache_path(),
+            fetch_mode=config.fetch_mode,
+            base_url=config.wiki_base_url,
+            parse_executor=config.parse_executor,
+            parse_workers=config.parse_workers,
+            parse_timeout=config.parse_timeout,
+            stream_fetch=config.stream_fetch,
+            fetch_policy=FetchPolicy(
+                max_attempts=config.fetch_attempts,
+                hedge=config.fetch_hedge,
+                breaker=CircuitBreaker(config.fetch_breaker_threshold, config.fetch_breaker_reset)
+            ),
+            characters=CharacterRegistry.from_config(config)
+        )
+
+    def _get_executor(self) -> Executor:
+        """Get or create the pool that parsing runs in"""
+        if self._executor is None:
+            if self.parse_executor == 'process':
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    initializer=setup_worker_logging,
+                    initargs=(logging.getLogger().level,)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix='board-parse')
+        return self._executor
+
+    def _discard_executor(self):
+        """Drop the parse pool, cancelling anything still queued in it"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
     async def close(self):
-        """Close the aiohttp session"""
+        """Close the aiohttp session and the parse pool"""
         if self.session and not self.session.closed:
             await self.session.close()
+        self._discard_executor()
     
+    async def _request_full_page(self) -> str:
+        """One unconditional GET of the whole wiki page"""
+        session = await self.get_session()
+        async with session.get(self.wiki_url) as response:
+            if response.status != 200:
+                raise http_error(response.status)
+            return await response.text()
+
     async def fetch_page_content(self) -> Optional[str]:
         """Fetch the wiki page content"""
         try:
-            session = await self._get_session()
-            async with session.get(self.wiki_url) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    logger.debug("Successfully fetched wiki page")
-                    return content
-                else:
-                    logger.error(f"HTTP {response.status} when fetching wiki page")
-                    return None
-        except asyncio.TimeoutError:
-            logger.error("Timeout when fetching wiki page")
+            content = await self.fetch_policy.run('wiki page', self._request_full_page)
+            logger.debug("Successfully fetched wiki page")
+            return content
+        except FetchError as e:
+            logger.error("Error fetching wiki page: %s", e)
+            return None
+    
+    async def fetch_snapshot(self) -> Optional[BoardSnapshot]:
+        """Fetch the board with the configured mode, falling back to HTML scraping
+
+        The twisted is resolved through the character registry, so every
+        mode reports the same canonical name.
+        """
+        snapshot = None
+        if self.fetch_mode != 'html':
+            snapshot = await self.fetch_wikitext_snapshot()
+            if not (snapshot and snapshot.twisted):
+                logger.info("Board not found in wikitext - falling back to HTML scraping")
+                snapshot = None
+
+        if snapshot is None:
+            snapshot = await self.fetch_html_snapshot()
+        if snapshot is not None:
+            self.characters.observe(snapshot)
+        return snapshot
+
+    async def refresh_characters(self, force: bool = False):
+        """Bring the character registry up to date with the wiki when a refresh is due"""
+        if not (force or self.characters.refresh_due()):
+            return
+        try:
+            await self.characters.refresh(self)
+        except FetchError as e:
+            logger.warning("Could not refresh the character list - keeping %s cached characters: %s",
+                           len(self.characters), e)
+
+    def character_url(self, twisted_name: str) -> Optional[str]:
+        """Wiki page of a twisted, when the registry knows it"""
+        character = self.characters.resolve(twisted_name)
+        return character.page_url if character is not None else None
+
+    async def _request_wikitext(self) -> tuple:
+        """One request for the page's wikitext: (wikitext, image file names or None)"""
+        session = await self.get_session()
+        if self.fetch_mode == 'raw':
+            request = session.get(self.wiki_url, params={'action': 'raw'})
+        else:
+            request = session.get(self.api_url, params={
+                'action': 'parse',
+                'page': self.PAGE_TITLE,
+                'prop': 'wikitext|images',
+                'format': 'json',
+                'formatversion': '2'
+            })
+
+        async with request as response:
+            if response.status != 200:
+                raise http_error(response.status)
+            if self.fetch_mode == 'raw':
+                return await response.text(), None
+
+            data = await response.json(content_type=None)
+            if 'parse' not in data:
+                raise FetchError('api_error', retryable=False, message=f"MediaWiki API error: {data.get('error')}")
+            return data['parse'].get('wikitext', ''), data['parse'].get('images')
+
+    async def fetch_wikitext_snapshot(self) -> Optional[BoardSnapshot]:
+        """Fetch the board through the MediaWiki raw or parse API endpoints"""
+        started = time.perf_counter()
+        try:
+            wikitext, file_names = await self.fetch_policy.run('wikitext', self._request_wikitext)
+            fetched_at = time.time()
+            metrics.observe('totb_fetch_seconds', time.perf_counter() - started, mode=self.fetch_mode)
+            metrics.observe('totb_fetch_response_bytes', len(wikitext.encode('utf-8')), mode=self.fetch_mode)
+
+            with metrics.timer('totb_parse_seconds', extractor='wikitext'):
+                snapshot = extract_wikitext_snapshot(wikitext, file_names, self.base_url)
+            snapshot.fetched_at = fetched_at
+            snapshot.content_hash = content_hash(wikitext)
+            logger.debug("Extracted board from wikitext: %s", snapshot.twisted)
+            return snapshot
+
+        except FetchError as e:
+            logger.error("Error fetching wikitext: %s", e)
+            metrics.inc('totb_scrape_failures_total', cause=e.cause)
             return None
         except Exception as e:
-            logger.error(f"Error fetching wiki page: {e}")
+            logger.error("Error reading wikitext: %s", e)
+            metrics.inc('totb_scrape_failures_total', cause='error')
             return None
-    
+
+    async def _read_board_stream(self, response) -> tuple:
+        """Read the page only as far as the end of the board, then drop the connection
+
+        Returns the text read and the number of bytes received.
+        """
+        decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+        scanner = BoardStreamScanner()
+        received = 0
+
+        async for chunk in response.content.iter_chunked(self.STREAM_CHUNK_SIZE):
+            received += len(chunk)
+            if scanner.feed(decoder.decode(chunk)):
+                logger.debug("Board found after %s bytes - closing connection early", received)
+                response.close()
+                return scanner.board_text, received
+
+        scanner.feed(decoder.decode(b'', final=True))
+        return scanner.board_text or scanner.text, received
+
+    async def _request_page(self) -> tuple:
+        """One conditional GET of the wiki page: (status, headers, content, bytes received)
+
+        A 304 comes back with no content; any other non-200 status raises.
+        """
+        session = await self.get_session()
+        async with session.get(self.wiki_url, headers=self.fetch_cache.conditional_headers()) as response:
+            if response.status == 304:
+                return response.status, response.headers, None, 0
+            if response.status != 200:
+                raise http_error(response.status)
+
+            if self.stream_fetch:
+                content, received = await self._read_board_stream(response)
+            else:
+                received = len(await response.read())
+                content = await response.text()
+            return response.status, response.headers, content, received
+
+    async def fetch_html_snapshot(self) -> Optional[BoardSnapshot]:
+        """Fetch the board conditionally, only parsing when the board section changed"""
+        cache = self.fetch_cache
+        started = time.perf_counter()
+        try:
+            status, headers, content, received = await self.fetch_policy.run('wiki page', self._request_page)
+            fetched_at = time.time()
+            metrics.observe('totb_fetch_seconds', time.perf_counter() - started, mode='html')
+            if status == 304:
+                logger.debug("Wiki page not modified - using cached snapshot")
+                metrics.inc('totb_fetch_cache_total', result='not_modified')
+                cache.update_validators(headers)
+                return cache.snapshot
+
+            metrics.observe('totb_fetch_response_bytes', received, mode='html')
+            logger.debug("Successfully fetched wiki page")
+
+            section = slice_board_section(content)
+            section_hash = content_hash(section)
+            if section_hash == cache.content_hash and cache.snapshot is not None:
+                logger.debug("Board section unchanged - using cached snapshot")
+                metrics.inc('totb_fetch_cache_total', result='unchanged')
+                cache.update_validators(headers)
+                return cache.snapshot
+
+            metrics.inc('totb_fetch_cache_total', result='miss')
+            snapshot = await self.parse_board_async(section)
+            if snapshot is None:
+                return None
+            snapshot.fetched_at = fetched_at
+            snapshot.content_hash = section_hash
+            if not snapshot.twisted:
+                logger.warning("Could not find current twisted in page content")
+                metrics.inc('totb_scrape_failures_total', cause='no_twisted')
+            elif not snapshot.image_url:
+                logger.warning("Could not find image for %s", snapshot.twisted)
+            cache.store(headers, section, section_hash, snapshot)
+            return snapshot
+
+        except FetchError as e:
+            logger.error("Error fetching wiki page: %s", e)
+            metrics.inc('totb_scrape_failures_total', cause=e.cause)
+            return None
+        except Exception as e:
+            logger.error("Error reading wiki page: %s", e)
+            metrics.inc('totb_scrape_failures_total', cause='error')
+            return None
+
+    def parse_board(self, html_content: str) -> BoardSnapshot:
+        """Parse the page into a BoardSnapshot, reusing the last parse of the same page"""
+        cache_key = (len(html_content), hash(html_content))
+        if self._parsed is not None and self._parsed[0] == cache_key:
+            return self._parsed[1]
+
+        if metrics.enabled:
+            snapshot, timings = extract_board_snapshot_timed(html_content, self.parser)
+            _record_parse_timings(timings)
+        else:
+            snapshot = extract_board_snapshot(html_content, self.parser)
+        self._parsed = (cache_key, snapshot)
+        return snapshot
+
+    async def parse_board_async(self, html_content: str) -> Optional[BoardSnapshot]:
+        """Parse the page in the parse pool so the event loop keeps running"""
+        if self.parse_executor == 'inline':
+            return self.parse_board(html_content)
+
+        cache_key = (len(html_content), hash(html_content))
+        if self._parsed is not None and self._parsed[0] == cache_key:
+            return self._parsed[1]
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), extract_board_snapshot_timed, html_content, self.parser)
+        try:
+            snapshot, timings = await asyncio.wait_for(future, self.parse_timeout)
+        except asyncio.TimeoutError:
+            # A running parse can't be interrupted; abandon the pool so the next one starts clean
+            logger.error("Parsing the wiki page took longer than %ss - giving up", self.parse_timeout)
+            metrics.inc('totb_scrape_failures_total', cause='parse_timeout')
+            self._discard_executor()
+            return None
+
+        _record_parse_timings(timings)
+
+        self._parsed = (cache_key, snapshot)
+        return snapshot
+
     def parse_current_twisted(self, html_content: str) -> Optional[str]:
         """Parse the HTML content to extract the current twisted"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Look for the text "Currently, the board is occupied by"
-            text_content = soup.get_text()
-            
-            # Use regex to find the pattern
-            pattern = r"Currently,\s+the\s+board\s+is\s+occupied\s+by\s+(.+?)(?:\.|$|\n)"
-            match = re.search(pattern, text_content, re.IGNORECASE | re.DOTALL)
-            
-            if match:
-                twisted_name = match.group(1).strip()
-                # Clean up the name (remove extra whitespace, periods, etc.)
-                twisted_name = re.sub(r'\s+', ' ', twisted_name)
-                twisted_name = twisted_name.rstrip('.')
-                logger.debug(f"Extracted twisted name: {twisted_name}")
-                return twisted_name
-            
-            # Alternative method: look for the specific HTML structure
-            # Find text containing "Currently, the board is occupied by"
-            for element in soup.find_all(text=re.compile(r"Currently.*occupied by", re.IGNORECASE)):
-                parent = element.parent
-                if parent:
-                    # Look for the next link or text that contains "Twisted"
-                    next_elements = parent.find_next_siblings()
-                    for next_elem in next_elements:
-                        links = next_elem.find_all('a') if hasattr(next_elem, 'find_all') else []
-                        for link in links:
-                            href = link.get('href', '')
-                            text = link.get_text().strip()
-                            if 'Twisted' in text and '/wiki/Twisted_' in href:
-                                logger.debug(f"Found twisted via HTML parsing: {text}")
-                                return text
-            
-            # Try to find any link with "Twisted" in the title near the occupied text
-            occupied_text = soup.find(text=re.compile(r"Currently.*occupied by", re.IGNORECASE))
-            if occupied_text:
-                # Get the parent element and search nearby
-                parent = occupied_text.parent
-                for i in range(3):  # Check next few elements
-                    if parent.next_sibling:
-                        parent = parent.next_sibling
-                        if hasattr(parent, 'find'):
-                            twisted_link = parent.find('a', href=re.compile(r'/wiki/Twisted_'))
-                            if twisted_link:
-                                twisted_name = twisted_link.get_text().strip()
-                                logger.debug(f"Found twisted via sibling search: {twisted_name}")
-                                return twisted_name
-            
-            logger.warning("Could not find current twisted in page content")
-            return None
-            
+            twisted_name = self.parse_board(html_content).twisted
+            if twisted_name:
+                twisted_name = self.characters.canonical_name(twisted_name)
+                logger.debug("Extracted twisted name: %s", twisted_name)
+            else:
+                logger.warning("Could not find current twisted in page content")
+            return twisted_name
+
         except Exception as e:
-            logger.error(f"Error parsing HTML content: {e}")
+            logger.error("Error parsing HTML content: %s", e)
             return None
-    
+
     def parse_timer_info(self, html_content: str) -> Optional[str]:
         """Parse the HTML content to extract timer information"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            text_content = soup.get_text()
-            
-            # Look for timer patterns like "It will be X hours, Y minutes and Z seconds until"
-            timer_patterns = [
-                r"It will be (.+?) until the Daily Twisted Board changes",
-                r"(\d+) hours?, (\d+) minutes? and (\d+) seconds? until",
-                r"(\d+) hours? and (\d+) minutes? until",
-                r"(\d+) minutes? and (\d+) seconds? until",
-                r"(\d+) seconds? until"
-            ]
-            
-            for pattern in timer_patterns:
-                match = re.search(pattern, text_content, re.IGNORECASE)
-                if match:
-                    timer_text = match.group(0).strip()
-                    logger.debug(f"Extracted timer info: {timer_text}")
-                    return timer_text
-            
-            logger.debug("No timer information found")
-            return None
-            
+            timer_text = self.parse_board(html_content).timer
+            if timer_text:
+                logger.debug("Extracted timer info: %s", timer_text)
+            else:
+                logger.debug("No timer information found")
+            return timer_text
+
         except Exception as e:
-            logger.error(f"Error parsing timer info: {e}")
+            logger.error("Error parsing timer info: %s", e)
             return None
-    
+
     async def get_current_twisted(self) -> Optional[str]:
         """Get the current twisted from the wiki page"""
         try:
-            html_content = await self.fetch_page_content()
-            if html_content:
-                return self.parse_current_twisted(html_content)
-            return None
+            snapshot = await self.fetch_snapshot()
+            return snapshot.twisted if snapshot else None
         except Exception as e:
-            logger.error(f"Error getting current twisted: {e}")
+            logger.error("Error getting current twisted: %s", e)
             return None
     
     def parse_twisted_image_url(self, html_content: str, twisted_name: str) -> Optional[str]:
         """Parse the HTML content to extract the twisted character image URL"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Remove "Twisted " prefix to get the character name
-            character_name = twisted_name.replace("Twisted ", "").strip()
-            
-            # Look for image with alt text containing the character name
-            img_tags = soup.find_all('img', alt=True)
-            for img in img_tags:
-                alt_text = img.get('alt', '').lower()
-                if character_name.lower() in alt_text and 'twisted' in alt_text:
-                    src = img.get('src')
-                    if src:
-                        # Handle relative URLs
-                        if src.startswith('//'):
-                            return f"https:{src}"
-                        elif src.startswith('/'):
-                            return f"https://dandys-world-robloxhorror.fandom.com{src}"
-                        else:
-                            return src
-            
-            # Fallback: look for any image with the character name
-            for img in img_tags:
-                alt_text = img.get('alt', '').lower()
-                if character_name.lower() in alt_text:
-                    src = img.get('src')
-                    if src:
-                        if src.startswith('//'):
-                            return f"https:{src}"
-                        elif src.startswith('/'):
-                            return f"https://dandys-world-robloxhorror.fandom.com{src}"
-                        else:
-                            return src
-            
-            logger.warning(f"Could not find image for {twisted_name}")
-            return None
-            
+            image_url = self.parse_board(html_content).image_for(twisted_name)
+            if not image_url:
+                # Not on the page; fall back to the artwork the registry has for it
+                character = self.characters.resolve(twisted_name)
+                image_url = character.image_url if character is not None else None
+            if not image_url:
+                logger.warning("Could not find image for %s", twisted_name)
+            return image_url
+
         except Exception as e:
-            logger.error(f"Error parsing twisted image URL: {e}")
+            logger.error("Error parsing twisted image URL: %s", e)
             return None
 
     async def get_twisted_and_timer_info(self) -> tuple[Optional[str], Optional[str]]:
         """Get both current twisted and timer information"""
         try:
-            html_content = await self.fetch_page_content()
-            if html_content:
-                twisted = self.parse_current_twisted(html_content)
-                timer = self.parse_timer_info(html_content)
-                return twisted, timer
+            snapshot = await self.fetch_snapshot()
+            if snapshot:
+                return snapshot.twisted, snapshot.timer
             return None, None
         except Exception as e:
-            logger.error(f"Error getting twisted and timer info: {e}")
+            logger.error("Error getting twisted and timer info: %s", e)
             return None, None
     
     async def get_twisted_info_with_image(self) -> tuple[Optional[str], Optional[str], Optional[str]]:
         """Get current twisted, timer information, and image URL"""
         try:
-            html_content = await self.fetch_page_content()
-            if html_content:
-                twisted = self.parse_current_twisted(html_content)
-                timer = self.parse_timer_info(html_content)
-                image_url = None
-                if twisted:
-                    image_url = self.parse_twisted_image_url(html_content, twisted)
-                return twisted, timer, image_url
+            snapshot = await self.fetch_snapshot()
+            if snapshot:
+                return snapshot.twisted, snapshot.timer, snapshot.image_url
             return None, None, None
         except Exception as e:
-            logger.error(f"Error getting twisted info with image: {e}")
+            logger.error("Error getting twisted info with image: %s", e)
             return None, None, None
     
     def __del__(self):
-        """Cleanup when object is destroyed"""
-        if hasattr(self, 'session') and self.session and not self.session.closed:
-            # Note: This won't work in async context, but it's a fallback
-            try:
-                asyncio.create_task(self.session.close())
-            except:
-                pass
+        """Last-resort cleanup for a scraper that was never closed"""
+        if getattr(self, '_executor', None) is not None:
+            self._discard_executor()
+        session = getattr(self, 'session', None)
+        if session is None or session.closed:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop to run session.close() on - all that's left is to say so
+            logger.warning("DailyTwistedScraper was garbage collected without close(); its session leaked")
+            return
+        loop.create_task(session.close())
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+from board import BoardSnapshot
+from scheduler import snapshot_deadline
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCache:
+    """Latest board snapshot kept until the rollover deadline, refreshed single-flight
+
+    Any number of concurrent callers that miss the cache share one in-flight
+    fetch, so a burst of lookups right after rollover costs one wiki request.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[Optional[BoardSnapshot]]],
+                 max_ttl: float = 3600.0, retry_ttl: float = 30.0):
+        self.fetch = fetch
+        self.max_ttl = max_ttl
+        # How long a stale or failed result is served before fetching again
+        self.retry_ttl = retry_ttl
+        self.snapshot = None
+        self.expires_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+
+    def put(self, snapshot: BoardSnapshot, now: Optional[float] = None):
+        """Cache a snapshot until its board rolls over"""
+        now = time.time() if now is None else now
+        deadline = snapshot_deadline(snapshot)
+        if deadline is None:
+            expires_at = now + self.max_ttl
+        elif deadline <= now:
+            # The page still shows the previous board - look again shortly
+            expires_at = now + self.retry_ttl
+        else:
+            expires_at = min(deadline, now + self.max_ttl)
+
+        self.snapshot = snapshot
+        self.expires_at = expires_at
+
+    def fresh(self, now: Optional[float] = None) -> Optional[BoardSnapshot]:
+        """The cached snapshot if it hasn't expired"""
+        now = time.time() if now is None else now
+        if self.snapshot is not None and now < self.expires_at:
+            return self.snapshot
+        return None
+
+    async def get(self) -> Optional[BoardSnapshot]:
+        """The cached snapshot, fetching it once for all waiting callers when expired
+
+        Falls back to the last known snapshot when the fetch fails. A failure
+        with nothing to fall back on is cached too, so lookups don't each
+        start another fetch until `retry_ttl` has passed.
+        """
+        now = time.time()
+        snapshot = self.fresh(now)
+        if snapshot is not None:
+            return snapshot
+        if now < self.expires_at:
+            # Only reachable after a failed fetch with no earlier snapshot
+            return None
+        return await self.refresh() or self.snapshot
+
+    async def refresh(self) -> Optional[BoardSnapshot]:
+        """Fetch a new snapshot, joining a fetch that is already in flight"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+        # Shield so one cancelled caller doesn't cancel the fetch for everyone else
+        return await asyncio.shield(self._inflight)
+
+    async def _fetch(self) -> Optional[BoardSnapshot]:
+        try:
+            snapshot = await self.fetch()
+            if snapshot is not None and snapshot.twisted:
+                self.put(snapshot)
+                return snapshot
+
+            logger.warning("Snapshot refresh failed - serving the last known board")
+            self.expires_at = time.time() + self.retry_ttl
+            return None
+        except Exception as e:
+            logger.error("Error refreshing snapshot cache: %s", e)
+            self.expires_at = time.time() + self.retry_ttl
+            return None
+        finally:
+            self._inflight = None
@@ -0,0 +1,230 @@
+import logging
+import time
+from typing import Iterable, List, Optional, Tuple
+from board import BoardSnapshot, BoardTimer, parse_timer_fields
+from database import connect
+from scheduler import board_timer
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """SQLite history of board snapshots, used to restore state on restart"""
+
+    def __init__(self, path: str):
+        self.db = connect(path)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS board_snapshots (
+                id INTEGER PRIMARY KEY,
+                observed_at REAL NOT NULL,
+                twisted TEXT,
+                timer TEXT,
+                image_url TEXT,
+                content_hash TEXT,
+                deadline INTEGER,
+                cycle_id TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_board_snapshots_observed_at
+                ON board_snapshots (observed_at);
+            CREATE INDEX IF NOT EXISTS idx_board_snapshots_twisted
+                ON board_snapshots (twisted, observed_at);
+            CREATE TABLE IF NOT EXISTS announcements (
+                cycle_id TEXT PRIMARY KEY,
+                twisted TEXT,
+                announced_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS board_revisions (
+                revision_id INTEGER PRIMARY KEY,
+                edited_at REAL NOT NULL,
+                twisted TEXT,
+                timer TEXT,
+                image_url TEXT,
+                content_hash TEXT,
+                parsed_at REAL,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_board_revisions_edited_at
+                ON board_revisions (edited_at);
+        ''')
+        self.db.commit()
+        self._migrate()
+        self.db.execute(
+            'CREATE INDEX IF NOT EXISTS idx_board_snapshots_cycle_id ON board_snapshots (cycle_id)'
+        )
+        self.db.commit()
+        self._last_recorded = None
+
+    def _migrate(self):
+        """Add the timer columns to databases created before they existed, filling them in from the timer text"""
+        columns = {row['name'] for row in self.db.execute('PRAGMA table_info(board_snapshots)')}
+        if 'cycle_id' in columns:
+            return
+
+        logger.info("Adding timer columns to the snapshot history")
+        self.db.execute('ALTER TABLE board_snapshots ADD COLUMN deadline INTEGER')
+        self.db.execute('ALTER TABLE board_snapshots ADD COLUMN cycle_id TEXT')
+        rows = self.db.execute('SELECT id, observed_at, timer FROM board_snapshots WHERE timer IS NOT NULL')
+        updates = []
+        for row in rows:
+            timer = board_timer(BoardSnapshot(timer_fields=parse_timer_fields(row['timer']),
+                                              fetched_at=row['observed_at']))
+            if timer is not None:
+                updates.append((timer.deadline, timer.cycle_id, row['id']))
+        self.db.executemany('UPDATE board_snapshots SET deadline = ?, cycle_id = ? WHERE id = ?', updates)
+        self.db.commit()
+
+    @staticmethod
+    def _from_row(row) -> BoardSnapshot:
+        return BoardSnapshot(
+            twisted=row['twisted'],
+            timer=row['timer'],
+            image_url=row['image_url'],
+            timer_fields=parse_timer_fields(row['timer']),
+            fetched_at=row['observed_at'],
+            content_hash=row['content_hash']
+        )
+
+    def record(self, snapshot: BoardSnapshot, timer: Optional[BoardTimer] = None) -> bool:
+        """Append a snapshot to the history, skipping repeats of the last one recorded
+
+        `timer` is the snapshot's parsed countdown when the caller already
+        has it; otherwise it is derived at the default cycle resolution.
+        """
+        observed_at = snapshot.fetched_at or time.time()
+        key = (observed_at, snapshot.twisted, snapshot.content_hash)
+        if key == self._last_recorded:
+            return False
+
+        if timer is None:
+            timer = board_timer(snapshot)
+        self.db.execute(
+            'INSERT INTO board_snapshots (observed_at, twisted, timer, image_url, content_hash, deadline, cycle_id) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (observed_at, snapshot.twisted, snapshot.timer, snapshot.image_url, snapshot.content_hash,
+             timer.deadline if timer else None, timer.cycle_id if timer else None)
+        )
+        self.db.commit()
+        self._last_recorded = key
+        return True
+
+    def latest(self) -> Optional[BoardSnapshot]:
+        """Get the most recently observed snapshot"""
+        row = self.db.execute(
+            'SELECT * FROM board_snapshots ORDER BY observed_at DESC LIMIT 1'
+        ).fetchone()
+        if row is None:
+            return None
+
+        snapshot = self._from_row(row)
+        self._last_recorded = (snapshot.fetched_at, snapshot.twisted, snapshot.content_hash)
+        return snapshot
+
+    def history(self, since: Optional[float] = None, until: Optional[float] = None,
+                twisted: Optional[str] = None, limit: Optional[int] = None) -> List[BoardSnapshot]:
+        """Snapshots in a time range, optionally for one character, oldest first"""
+        clauses = []
+        params = []
+        if twisted is not None:
+            clauses.append('twisted = ?')
+            params.append(twisted)
+        if since is not None:
+            clauses.append('observed_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('observed_at < ?')
+            params.append(until)
+
+        query = 'SELECT * FROM board_snapshots'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY observed_at'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        return [self._from_row(row) for row in self.db.execute(query, params)]
+
+    def claim_announcement(self, cycle_id: str, twisted: Optional[str]) -> bool:
+        """Claim the announcement for a board cycle, returning False if it was already made
+
+        Every replica (and every --check-once run) shares this table, so a
+        cycle is announced once however many instances see it change.
+        """
+        cursor = self.db.execute(
+            'INSERT OR IGNORE INTO announcements (cycle_id, twisted, announced_at) VALUES (?, ?, ?)',
+            (cycle_id, twisted, time.time())
+        )
+        self.db.commit()
+        return cursor.rowcount == 1
+
+    def release_announcement(self, cycle_id: str):
+        """Give up a claim whose announcement wasn't delivered, so a later check can retry it"""
+        self.db.execute('DELETE FROM announcements WHERE cycle_id = ?', (cycle_id,))
+        self.db.commit()
+
+    def add_revisions(self, revisions: Iterable[Tuple[int, float]]) -> int:
+        """Record (revision ID, edit time) pairs from the wiki, returning how many were new"""
+        before = self.db.total_changes
+        self.db.executemany(
+            'INSERT OR IGNORE INTO board_revisions (revision_id, edited_at) VALUES (?, ?)', revisions
+        )
+        self.db.commit()
+        return self.db.total_changes - before
+
+    def latest_revision_time(self) -> Optional[float]:
+        """Edit time of the newest revision recorded so far"""
+        row = self.db.execute('SELECT MAX(edited_at) AS edited_at FROM board_revisions').fetchone()
+        return row['edited_at']
+
+    def pending_revisions(self, after: int = 0, limit: int = 50) -> List[int]:
+        """IDs of recorded revisions that haven't been parsed yet, oldest first"""
+        rows = self.db.execute(
+            'SELECT revision_id FROM board_revisions WHERE parsed_at IS NULL AND revision_id > ? '
+            'ORDER BY revision_id LIMIT ?',
+            (after, limit)
+        )
+        return [row['revision_id'] for row in rows]
+
+    def record_revisions(self, results: Iterable[tuple]):
+        """Store parsed revisions: (revision ID, twisted, timer, image URL, content hash, error)"""
+        now = time.time()
+        self.db.executemany(
+            'UPDATE board_revisions SET twisted = ?, timer = ?, image_url = ?, content_hash = ?, error = ?, '
+            'parsed_at = ? WHERE revision_id = ?',
+            [(twisted, timer, image_url, page_hash, error, now, revision_id)
+             for revision_id, twisted, timer, image_url, page_hash, error in results]
+        )
+        self.db.commit()
+
+    def daily_rotation(self, since: Optional[float] = None) -> List[Tuple[str, str]]:
+        """(UTC date, twisted) for every day seen live or in backfilled wiki revisions
+
+        The board rolls over at midnight UTC, so the last observation of a
+        UTC day is that day's twisted.
+        """
+        rows = self.db.execute('''
+            SELECT day, twisted FROM (
+                SELECT day, twisted, ROW_NUMBER() OVER (PARTITION BY day ORDER BY at DESC) AS rank
+                FROM (
+                    SELECT date(observed_at, 'unixepoch') AS day, twisted, observed_at AS at
+                    FROM board_snapshots WHERE twisted IS NOT NULL AND observed_at >= ?
+                    UNION ALL
+                    SELECT date(edited_at, 'unixepoch'), twisted, edited_at
+                    FROM board_revisions WHERE twisted IS NOT NULL AND edited_at >= ?
+                )
+            )
+            WHERE rank = 1
+            ORDER BY day
+        ''', (since or 0, since or 0))
+        return [(row['day'], row['twisted']) for row in rows]
+
+    def characters(self) -> List[str]:
+        """Every twisted ever seen on the board, alphabetically"""
+        rows = self.db.execute(
+            'SELECT DISTINCT twisted FROM board_snapshots WHERE twisted IS NOT NULL ORDER BY twisted'
+        )
+        return [row['twisted'] for row in rows]
+
+    def close(self):
+        """Close the database connection"""
+        self.db.close()
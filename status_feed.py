@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import List, Optional
+from board import BoardSnapshot
+from scheduler import board_timer, cycle_deadline, cycle_id
+
+logger = logging.getLogger(__name__)
+
+# Bump when a field changes meaning or goes away; clients check it before reading
+SCHEMA_VERSION = 1
+STATUS_FILE = 'status.json'
+HISTORY_FILE = 'history.json'
+
+
+def iso_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def encode(document: dict) -> bytes:
+    """Canonical JSON, so the same document always produces the same bytes"""
+    return (json.dumps(document, sort_keys=True, separators=(',', ':'), ensure_ascii=False) + '\n').encode('utf-8')
+
+
+class StatusFeed:
+    """The board published as static JSON for the docs site, CDNs and anyone polling
+
+    `status.json` holds the current twisted, its artwork, the cycle ID and
+    the next rollover. `history.json` lists recent cycles, newest first.
+    Files only change when the board does - a ticking countdown doesn't
+    count - and are replaced atomically. Unchanged files keep their bytes
+    and modification time, so any ETag a static host derives stays the same
+    and clients polling with If-None-Match get 304s.
+    """
+
+    def __init__(self, directory: str, wiki_url: str = '', history_limit: int = 30, cycle_resolution: int = 3600):
+        self.directory = directory
+        self.wiki_url = wiki_url
+        self.history_limit = max(1, history_limit)
+        self.cycle_resolution = cycle_resolution
+        os.makedirs(directory, exist_ok=True)
+        # Resume from what was published before a restart instead of rewriting it
+        self.status = self._read(STATUS_FILE)
+        history = self._read(HISTORY_FILE)
+        self.history: List[dict] = history['entries'] if history else []
+
+    @classmethod
+    def from_config(cls, config) -> Optional['StatusFeed']:
+        """Status feed writing to STATUS_FEED_DIR, or None when it isn't set"""
+        if not config.status_feed_dir:
+            return None
+        return cls(config.status_feed_dir, config.get_wiki_url(), config.status_history_limit)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read(self, name: str) -> Optional[dict]:
+        try:
+            with open(self._path(name), encoding='utf-8') as f:
+                document = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable status feed file %s: %s", name, e)
+            return None
+        if document.get('schema_version') != SCHEMA_VERSION:
+            return None
+        return document
+
+    def _write(self, name: str, document: dict):
+        """Replace a feed file atomically, leaving it alone when its bytes wouldn't change"""
+        data = encode(document)
+        path = self._path(name)
+        try:
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return
+        except OSError:
+            pass
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # mkstemp creates 0600; static hosts need to read the file
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+
+    def publish(self, snapshot: BoardSnapshot) -> bool:
+        """Bring the feed up to date with a snapshot, returning whether anything was rewritten"""
+        if snapshot is None or snapshot.twisted is None:
+            return False
+        now = snapshot.fetched_at or datetime.now(timezone.utc).timestamp()
+        current = self.status
+
+        cycle = cycle_id(snapshot, self.cycle_resolution)
+        next_rollover = iso_time(cycle_deadline(snapshot, self.cycle_resolution))
+        timer = board_timer(snapshot, self.cycle_resolution)
+        if current and current['twisted'] == snapshot.twisted and (timer is None or timer.expired):
+            # Same twisted with the timer run out - the wiki just hasn't rolled over yet
+            cycle, next_rollover = current['cycle_id'], current['next_rollover']
+
+        if current and (current['twisted'], current['cycle_id'], current['image_url']) == (
+                snapshot.twisted, cycle, snapshot.image_url):
+            return False
+
+        new_cycle = not current or current['twisted'] != snapshot.twisted or current['cycle_id'] != cycle
+        first_seen = iso_time(now) if new_cycle else current['first_seen']
+        entry = {'cycle_id': cycle, 'twisted': snapshot.twisted, 'image_url': snapshot.image_url,
+                 'first_seen': first_seen}
+        if new_cycle or not self.history:
+            history = [entry] + self.history[:self.history_limit - 1]
+        else:
+            # Same cycle, new artwork
+            history = [entry] + self.history[1:]
+        status = dict(entry, schema_version=SCHEMA_VERSION, next_rollover=next_rollover, wiki_url=self.wiki_url)
+
+        try:
+            # History first, so a client that sees the new status finds it in the history too
+            self._write(HISTORY_FILE, {'schema_version': SCHEMA_VERSION, 'entries': history})
+            self._write(STATUS_FILE, status)
+        except OSError as e:
+            logger.error("Error writing the status feed to %s: %s", self.directory, e)
+            return False
+
+        self.status, self.history = status, history
+        logger.info("Published board status: %s (cycle %s)", snapshot.twisted, cycle)
+        return True
@@ -0,0 +1,96 @@
+import re
+from typing import Optional
+from board import WORD_PATTERN, character_key, names_character
+
+TAG_PATTERN = re.compile(r"<[^>]*>")
+IMG_PATTERN = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+ALT_PATTERN = re.compile(r"\balt=\"([^\"]*)\"", re.IGNORECASE)
+# The name must be followed by the end of its sentence so it isn't cut short
+OCCUPIED_PATTERN = re.compile(r"Currently,\s+the\s+board\s+is\s+occupied\s+by\s+(.+?)[.\n]", re.IGNORECASE | re.DOTALL)
+# Tags are blanked to runs of spaces before matching, so those also end a sentence
+TIMER_PATTERN = re.compile(
+    r"(?:\d+\s+(?:hours?|minutes?|seconds?)(?:,\s*|\s+and\s+|\s+))+until[^.!\n]*?(?:[.!\n]|\s{3})",
+    re.IGNORECASE
+)
+
+
+def _blank_tags(text: str) -> str:
+    """Replace markup with spaces, keeping every character at its original offset"""
+    return TAG_PATTERN.sub(lambda match: ' ' * len(match.group()), text)
+
+
+class BoardStreamScanner:
+    """Watches a page as it downloads and says when the board has been read
+
+    The board is complete once the "occupied by" sentence, the timer sentence
+    and a twisted image for that character have all been seen. `end` is the
+    offset just past the last of them, so the same page always gives the same
+    prefix no matter how it was chunked.
+    """
+
+    def __init__(self, overlap: int = 1024):
+        self.overlap = overlap
+        self.twisted = None
+        self.end = None
+        self._chunks = []
+        self._tail = ''
+        self._tail_start = 0
+        self._twisted_end = None
+        self._timer_end = None
+        self._image_end = None
+        # offset just past each <img> tag -> lowercased alt text
+        self._image_alts = {}
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return ''.join(self._chunks)
+
+    @property
+    def board_text(self) -> Optional[str]:
+        """The page up to the end of the board, once it has been found"""
+        if self.end is None:
+            return None
+        return self.text[:self.end]
+
+    def feed(self, chunk: str) -> bool:
+        """Scan another piece of the page, returning True once the board is complete"""
+        if self.end is not None:
+            return True
+
+        self._chunks.append(chunk)
+        window = self._tail + chunk
+        window_start = self._tail_start
+        plain = _blank_tags(window)
+
+        if self._twisted_end is None:
+            match = OCCUPIED_PATTERN.search(plain)
+            if match:
+                self.twisted = re.sub(r'\s+', ' ', match.group(1).strip())
+                self._twisted_end = window_start + match.end()
+
+        if self._timer_end is None:
+            match = TIMER_PATTERN.search(plain)
+            if match:
+                self._timer_end = window_start + match.end()
+
+        for match in IMG_PATTERN.finditer(window):
+            alt = ALT_PATTERN.search(match.group())
+            if alt:
+                self._image_alts[window_start + match.end()] = alt.group(1).lower()
+
+        if self._image_end is None and self.twisted:
+            words = WORD_PATTERN.findall(character_key(self.twisted))
+            for image_end, alt_text in self._image_alts.items():
+                if words and names_character(alt_text, words) == (True, True):
+                    self._image_end = image_end
+                    break
+
+        keep = min(len(window), self.overlap)
+        self._tail = window[len(window) - keep:]
+        self._tail_start = window_start + len(window) - keep
+
+        if self._twisted_end and self._timer_end and self._image_end:
+            self.end = max(self._twisted_end, self._timer_end, self._image_end)
+            return True
+        return False
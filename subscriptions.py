@@ -0,0 +1,87 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from database import connect
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GuildSubscription:
+    """Where and how one guild wants board announcements"""
+
+    guild_id: int
+    channel_id: int
+    ping_role_id: Optional[int] = None
+    ping_user_ids: tuple = ()
+
+    def get_ping_mentions(self) -> str:
+        """Get ping mentions string for announcements"""
+        mentions = []
+        if self.ping_role_id:
+            mentions.append(f"<@&{self.ping_role_id}>")
+        for user_id in self.ping_user_ids:
+            mentions.append(f"<@{user_id}>")
+        return " ".join(mentions)
+
+
+class SubscriptionRegistry:
+    """Persistent per-guild announcement subscriptions with an in-memory index"""
+
+    def __init__(self, path: str):
+        self.db = connect(path)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS guild_subscriptions (
+                guild_id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL,
+                ping_role_id INTEGER,
+                ping_user_ids TEXT NOT NULL DEFAULT ''
+            )
+        ''')
+        self.db.commit()
+        self._by_guild: Dict[int, GuildSubscription] = {}
+        self._load()
+
+    def _load(self):
+        """Build the in-memory index from the database"""
+        for row in self.db.execute('SELECT * FROM guild_subscriptions'):
+            user_ids = tuple(int(uid) for uid in row['ping_user_ids'].split(',') if uid)
+            self._by_guild[row['guild_id']] = GuildSubscription(
+                guild_id=row['guild_id'],
+                channel_id=row['channel_id'],
+                ping_role_id=row['ping_role_id'],
+                ping_user_ids=user_ids
+            )
+        logger.info("Loaded %s guild subscriptions", len(self._by_guild))
+
+    def __len__(self) -> int:
+        return len(self._by_guild)
+
+    def get(self, guild_id: int) -> Optional[GuildSubscription]:
+        """Get a guild's subscription"""
+        return self._by_guild.get(guild_id)
+
+    def all(self) -> List[GuildSubscription]:
+        """Get every subscription"""
+        return list(self._by_guild.values())
+
+    def subscribe(self, subscription: GuildSubscription):
+        """Add or replace a guild's subscription"""
+        self.db.execute(
+            'INSERT OR REPLACE INTO guild_subscriptions (guild_id, channel_id, ping_role_id, ping_user_ids) '
+            'VALUES (?, ?, ?, ?)',
+            (subscription.guild_id, subscription.channel_id, subscription.ping_role_id,
+             ','.join(str(uid) for uid in subscription.ping_user_ids))
+        )
+        self.db.commit()
+        self._by_guild[subscription.guild_id] = subscription
+
+    def unsubscribe(self, guild_id: int) -> bool:
+        """Remove a guild's subscription, returning whether it had one"""
+        self.db.execute('DELETE FROM guild_subscriptions WHERE guild_id = ?', (guild_id,))
+        self.db.commit()
+        return self._by_guild.pop(guild_id, None) is not None
+
+    def close(self):
+        """Close the database connection"""
+        self.db.close()
@@ -26,7 +26,7 @@ async def test_goob_image():
             image_url = scraper.parse_twisted_image_url(html_content, "Twisted Goob")
             
             if image_url:
-                logger.info(f"Found Twisted Vee image: {image_url}")
+                logger.info("Found Twisted Vee image: %s", image_url)
                 
                 # Create Discord bot client
                 intents = discord.Intents.default()
@@ -34,7 +34,7 @@ async def test_goob_image():
                 
                 @client.event
                 async def on_ready():
-                    logger.info(f"Test bot connected as {client.user}")
+                    logger.info("Test bot connected as %s", client.user)
                     
                     # Get the channel
                     channel_id = config.get_channel_id()
@@ -73,7 +73,7 @@ async def test_goob_image():
             logger.error("Could not fetch wiki page")
             
     except Exception as e:
-        logger.error(f"Error in test: {e}")
+        logger.error("Error in test: %s", e)
     finally:
         await scraper.close()
 
@@ -1,39 +1,141 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+from datetime import datetime, timezone
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra=` fields kept as keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as they are, leaving message formatting to the listener thread
+
+    The stock QueueHandler merges the message and arguments before enqueueing,
+    which is the expensive part of a log call. Log arguments here are plain
+    values that are not mutated afterwards, so formatting can safely wait.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _file_handler(log_dir: str) -> logging.Handler:
+    """Rotating log file: daily by default, or by size with LOG_ROTATE=size"""
+    path = os.path.join(log_dir, 'bot.log')
+    backup_count = int(os.getenv('LOG_BACKUP_COUNT', '7'))
+    if os.getenv('LOG_ROTATE', 'daily').lower() == 'size':
+        max_bytes = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+        return logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+    return logging.handlers.TimedRotatingFileHandler(
+        path, when='midnight', backupCount=backup_count, encoding='utf-8', utc=True
+    )
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Setup logging configuration
+
+    Log calls only put the record on a queue; a background listener thread
+    formats it and writes it to the console and a rotating file, so disk I/O
+    never runs on the event loop. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
 
-def setup_logging():
-    """Setup logging configuration"""
     log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
-    
+    log_dir = os.getenv('LOG_DIR', 'logs')
+
     # Create logs directory if it doesn't exist
-    os.makedirs('logs', exist_ok=True)
-    
-    # Configure logging
-    logging.basicConfig(
-        level=getattr(logging, log_level, logging.INFO),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(f'logs/bot_{datetime.now().strftime("%Y%m%d")}.log'),
-            logging.StreamHandler()
-        ]
-    )
+    os.makedirs(log_dir, exist_ok=True)
+
+    if os.getenv('LOG_FORMAT', 'text').lower() == 'json':
+        formatter = JsonLinesFormatter()
+    else:
+        formatter = logging.Formatter(LOG_FORMAT)
+
+    handlers = [_file_handler(log_dir), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, log_level, logging.INFO))
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(LazyQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(_listener.stop)
     
     # Set third-party library log levels
     logging.getLogger('discord').setLevel(logging.WARNING)
     logging.getLogger('aiohttp').setLevel(logging.WARNING)
     logging.getLogger('urllib3').setLevel(logging.WARNING)
+    return _listener
+
+def setup_worker_logging(level: int = logging.INFO):
+    """Logging for parse worker processes
+
+    Forked workers inherit the queue handler but not the listener thread that
+    drains it, so they log straight to stderr instead.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(level)
 
 def format_twisted_name(name: str) -> str:
-    """Format twisted name for display"""
+    """Format twisted name for display
+
+    Only tidies the spelling; CharacterRegistry.canonical_name gives the
+    wiki's name for characters it knows.
+    """
     if not name:
         return "Unknown"
-    
+
+    # Page titles use underscores; collapse any run of whitespace
+    name = ' '.join(name.replace('_', ' ').split())
+
     # Ensure it starts with "Twisted" if it doesn't already
-    if not name.startswith("Twisted"):
+    if name.lower().startswith("twisted "):
+        name = "Twisted" + name[len("twisted"):]
+    else:
         name = f"Twisted {name}"
-    
-    return name.strip()
+
+    return name
 
 def validate_discord_id(id_str: str) -> bool:
     """Validate that a string is a valid Discord ID"""
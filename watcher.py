@@ -0,0 +1,333 @@
+import asyncio
+import heapq
+import html
+import json
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+import aiohttp
+from fetch_cache import content_hash
+from fetch_policy import FetchError, FetchPolicy, http_error
+from metrics import metrics
+from scraper import extract_board_snapshot, slice_board_section
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_PATTERN = re.compile(r"<(script|style)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+SPACE_PATTERN = re.compile(r"\s+")
+EXTRACTOR_KINDS = ('regex', 'css', 'board')
+BOARD_FIELDS = ('twisted', 'timer', 'image_url')
+
+
+def html_to_text(html_content: str) -> str:
+    """Visible text of an HTML fragment, whitespace collapsed, without building a DOM"""
+    text = SCRIPT_PATTERN.sub(' ', html_content)
+    text = TAG_PATTERN.sub(' ', text)
+    return SPACE_PATTERN.sub(' ', html.unescape(text)).strip()
+
+
+@dataclass
+class Extractor:
+    """One value pulled out of a page
+
+    `regex` searches the article's visible text and returns the first group
+    (or the whole match); `css` returns the text of the first element the
+    selector matches; `board` reads a Daily Twisted Board field (twisted,
+    timer or image_url) with the bot's own parser. Untracked values are
+    reported but never count as a change.
+    """
+    kind: str
+    pattern: str
+    track: bool = True
+
+    def __post_init__(self):
+        if self.kind not in EXTRACTOR_KINDS:
+            raise ValueError(f"Unknown extractor kind {self.kind!r}")
+        if self.kind == 'regex':
+            self._compiled = re.compile(self.pattern, re.IGNORECASE | re.DOTALL)
+        elif self.kind == 'board' and self.pattern not in BOARD_FIELDS:
+            raise ValueError(f"Unknown board field {self.pattern!r}")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Extractor':
+        for kind in EXTRACTOR_KINDS:
+            if kind in data:
+                return cls(kind, data[kind], data.get('track', True))
+        raise ValueError(f"Extractor needs one of {', '.join(EXTRACTOR_KINDS)}: {data!r}")
+
+
+@dataclass
+class WatchTarget:
+    """A page to watch: where it is, what to pull out of it and how often to look"""
+    name: str
+    url: str
+    extractors: Dict[str, Extractor]
+    # Seconds between checks, and the +/- fraction of it to randomise each time
+    interval: float = 900.0
+    jitter: float = 0.1
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'WatchTarget':
+        return cls(
+            name=data['name'],
+            url=data['url'],
+            extractors={name: Extractor.from_dict(spec) for name, spec in data['extractors'].items()},
+            interval=float(data.get('interval', 900)),
+            jitter=float(data.get('jitter', 0.1))
+        )
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.url).netloc
+
+    def next_interval(self) -> float:
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+def load_targets(path: str) -> List[WatchTarget]:
+    """Read watch targets from a JSON file: {"targets": [{name, url, interval, extractors}, ...]}"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    targets = [WatchTarget.from_dict(entry) for entry in data.get('targets', [])]
+    names = [target.name for target in targets]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Duplicate watch target names in {path}")
+    return targets
+
+
+def extract_values(target: WatchTarget, page: str) -> Dict[str, Optional[str]]:
+    """Run every extractor of a target over one page"""
+    section = slice_board_section(page)
+    values = {}
+    text = soup = snapshot = None
+    for name, extractor in target.extractors.items():
+        if extractor.kind == 'regex':
+            if text is None:
+                text = html_to_text(section)
+            match = extractor._compiled.search(text)
+            values[name] = (match.group(1) if match.groups() else match.group(0)).strip() if match else None
+        elif extractor.kind == 'css':
+            if soup is None:
+                from bs4 import BeautifulSoup
+                soup = BeautifulSoup(section, 'html.parser')
+            element = soup.select_one(extractor.pattern)
+            values[name] = element.get_text(' ', strip=True) if element is not None else None
+        else:
+            if snapshot is None:
+                snapshot = extract_board_snapshot(section)
+            values[name] = getattr(snapshot, extractor.pattern)
+    return values
+
+
+@dataclass
+class TargetState:
+    """What the watcher remembers about a target between checks"""
+    target: WatchTarget
+    next_due: float = 0.0
+    values: Optional[Dict[str, Optional[str]]] = None
+    content_hash: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    last_checked: Optional[float] = None
+    failures: int = 0
+    removed: bool = False
+
+
+@dataclass(frozen=True)
+class WatchChange:
+    """Tracked values of a target that differ from the previous check"""
+    target: WatchTarget
+    previous: Dict[str, Optional[str]]
+    current: Dict[str, Optional[str]]
+    changed: tuple = field(default=())
+
+
+OnChange = Callable[[WatchChange], Awaitable[None]]
+
+
+class Watcher:
+    """Monitors many pages concurrently from one process
+
+    Targets sit in a heap ordered by when they are next due, so the engine
+    wakes exactly when something needs checking however many targets there
+    are. Fetches share one aiohttp session (the scraper's connection pool),
+    and each host gets its own concurrency limit and fetch policy, so one
+    slow or failing wiki can't starve or trip the breaker for another.
+    """
+
+    def __init__(self, get_session: Callable[[], Awaitable[aiohttp.ClientSession]],
+                 on_change: Optional[OnChange] = None, concurrency: int = 32, per_host: int = 4):
+        self.get_session = get_session
+        self.on_change = on_change
+        self.per_host = per_host
+        self.states: Dict[str, TargetState] = {}
+        self._heap: List[tuple] = []
+        self._sequence = 0
+        self._slots = asyncio.Semaphore(concurrency)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._policies: Dict[str, FetchPolicy] = {}
+        self._wakeup = asyncio.Event()
+        self._tasks = set()
+        self._runner: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, config, get_session: Callable[[], Awaitable[aiohttp.ClientSession]],
+                    on_change: Optional[OnChange] = None) -> Optional['Watcher']:
+        """Watcher for the targets in WATCH_TARGETS, or None when it isn't set"""
+        if not config.watch_targets:
+            return None
+        watcher = cls(get_session, on_change)
+        for target in load_targets(config.watch_targets):
+            watcher.add(target)
+        logger.info("Watching %s extra pages from %s", len(watcher), config.watch_targets)
+        return watcher
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def _schedule(self, state: TargetState, due: float):
+        state.next_due = due
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, state))
+        self._wakeup.set()
+
+    def add(self, target: WatchTarget, now: Optional[float] = None):
+        """Start watching a target, replacing any target with the same name"""
+        now = time.time() if now is None else now
+        self.remove(target.name)
+        state = self.states[target.name] = TargetState(target)
+        # Spread the first checks out so hundreds of targets don't all fire at startup
+        self._schedule(state, now + random.uniform(0, min(target.interval, 60.0)))
+
+    def remove(self, name: str) -> bool:
+        """Stop watching a target; its heap entry is dropped when it comes up"""
+        state = self.states.pop(name, None)
+        if state is None:
+            return False
+        state.removed = True
+        return True
+
+    def _host_slot(self, host: str) -> asyncio.Semaphore:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        return slot
+
+    def _policy(self, host: str) -> FetchPolicy:
+        policy = self._policies.get(host)
+        if policy is None:
+            policy = self._policies[host] = FetchPolicy()
+        return policy
+
+    async def _request(self, state: TargetState) -> tuple:
+        """One conditional GET: (status, headers, body or None on 304)"""
+        headers = {}
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+
+        session = await self.get_session()
+        async with session.get(state.target.url, headers=headers) as response:
+            if response.status == 304:
+                return response.status, response.headers, None
+            if response.status != 200:
+                raise http_error(response.status)
+            return response.status, response.headers, await response.text()
+
+    async def check(self, state: TargetState) -> Optional[WatchChange]:
+        """Fetch one target and report its change, if any"""
+        target = state.target
+        # Host slot first, so targets queued behind a busy host don't hold global slots
+        async with self._host_slot(target.host), self._slots:
+            status, headers, page = await self._policy(target.host).run(target.name, lambda: self._request(state))
+
+        state.last_checked = time.time()
+        state.etag = headers.get('ETag') or state.etag
+        state.last_modified = headers.get('Last-Modified') or state.last_modified
+        if page is None:
+            metrics.inc('totb_watch_checks_total', result='not_modified')
+            return None
+
+        page_hash = content_hash(slice_board_section(page))
+        if page_hash == state.content_hash:
+            metrics.inc('totb_watch_checks_total', result='unchanged')
+            return None
+
+        # Extraction may build a DOM - keep it off the event loop
+        values = await asyncio.to_thread(extract_values, target, page)
+        previous, state.values, state.content_hash = state.values, values, page_hash
+        if previous is None:
+            metrics.inc('totb_watch_checks_total', result='baseline')
+            logger.info("Watching %s: %s", target.name, values)
+            return None
+
+        changed = tuple(
+            name for name, extractor in target.extractors.items()
+            if extractor.track and values.get(name) != previous.get(name)
+        )
+        if not changed:
+            metrics.inc('totb_watch_checks_total', result='untracked')
+            return None
+        metrics.inc('totb_watch_checks_total', result='changed')
+        return WatchChange(target, previous, values, changed)
+
+    async def _run_check(self, state: TargetState):
+        try:
+            change = await self.check(state)
+            state.failures = 0
+            if change is not None and self.on_change is not None:
+                logger.info("%s changed: %s", state.target.name, ', '.join(change.changed))
+                await self.on_change(change)
+        except FetchError as e:
+            state.failures += 1
+            metrics.inc('totb_watch_checks_total', result='failed')
+            logger.warning("Could not check %s: %s", state.target.name, e)
+        except Exception as e:
+            state.failures += 1
+            logger.error("Error checking %s: %s", state.target.name, e)
+        finally:
+            if not state.removed:
+                # Back off on a failing target, up to 8x its interval
+                interval = state.target.next_interval() * min(8, 2 ** state.failures)
+                self._schedule(state, time.time() + interval)
+
+    async def run(self):
+        """Check targets as they come due, forever"""
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, state = heapq.heappop(self._heap)
+                if state.removed:
+                    continue
+                task = asyncio.create_task(self._run_check(state))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Run the watcher in the background"""
+        if self._runner is None:
+            self._runner = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the background run and cancel any checks still in flight"""
+        # Check tasks drop out of _tasks when done; the runner was never in it
+        tasks = list(self._tasks)
+        if self._runner is not None:
+            tasks.append(self._runner)
+            self._runner = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import re
+from contextlib import nullcontext
+from typing import Awaitable, Callable, List, Optional
+import aiohttp
+from announcement import build_announcement_embed, build_watch_embed
+from delivery import FanOutResult, TokenBucket, fan_out, upload_then_fan_out
+from image_cache import EmbedImage, ImageCache
+from leader import LeaderElector
+from loop_monitor import EventLoopLagMonitor
+from metrics import metrics, start_metrics_server
+from monitor import BoardMonitor
+from profiler import CycleProfiler
+from scraper import DailyTwistedScraper
+from snapshot_store import SnapshotStore
+from status_feed import StatusFeed
+from watcher import Watcher
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_ID_PATTERN = re.compile(r"/webhooks/(\d+)/")
+
+
+class WebhookError(Exception):
+    """A webhook post that could not be delivered"""
+
+
+class Webhook:
+    """A webhook URL that keeps its token out of logs"""
+
+    __slots__ = ('url',)
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def __repr__(self) -> str:
+        match = WEBHOOK_ID_PATTERN.search(self.url)
+        return f"<Webhook {match.group(1) if match else '?'}>"
+
+
+class WebhookDelivery:
+    """Posts announcement embeds to Discord webhooks over a pooled aiohttp session"""
+
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, get_session: Callable[[], Awaitable[aiohttp.ClientSession]], urls: List[str],
+                 concurrency: int = 50, rate_limit: float = 40.0, image_cache: Optional[ImageCache] = None):
+        self.get_session = get_session
+        self.webhooks = [Webhook(url) for url in urls]
+        self.concurrency = concurrency
+        self.limiter = TokenBucket(rate_limit)
+        self.image_cache = image_cache
+
+    @staticmethod
+    def _form(payload: dict, image: EmbedImage) -> aiohttp.FormData:
+        """Multipart body carrying the payload and the image as its only attachment"""
+        form = aiohttp.FormData()
+        payload = dict(payload, attachments=[{'id': 0, 'filename': image.filename}])
+        form.add_field('payload_json', json.dumps(payload), content_type='application/json')
+        form.add_field('files[0]', image.data, filename=image.filename)
+        return form
+
+    async def _post(self, webhook: Webhook, payload: dict, image: Optional[EmbedImage] = None) -> Optional[dict]:
+        """Post to one webhook, returning the created message when an image was uploaded"""
+        session = await self.get_session()
+        for attempt in range(self.MAX_ATTEMPTS):
+            if image is None:
+                request = session.post(webhook.url, json=payload)
+            else:
+                # wait=true makes Discord return the message, and with it the attachment's CDN URL
+                request = session.post(webhook.url, data=self._form(payload, image), params={'wait': 'true'})
+            # Work out any retry delay inside the block, but sleep after it so the pooled connection is released
+            async with request as response:
+                if response.status in (200, 204):
+                    if image is None:
+                        return None
+                    return await response.json(content_type=None)
+
+                if response.status == 429:
+                    try:
+                        data = await response.json(content_type=None)
+                    except Exception:
+                        data = {}
+                    retry_after = float(data.get('retry_after') or response.headers.get('Retry-After', 1))
+                    if data.get('global') or response.headers.get('X-RateLimit-Global'):
+                        self.limiter.pause(retry_after)
+                    logger.warning("Rate limited posting to %s - retrying in %.2fs", webhook, retry_after)
+                elif response.status >= 500:
+                    # Drain the error body so the connection can go back to the pool
+                    await response.read()
+                    retry_after = 2 ** attempt
+                else:
+                    body = await response.text()
+                    raise WebhookError(f"HTTP {response.status}: {body[:200]}")
+
+            await asyncio.sleep(retry_after)
+
+        raise WebhookError(f"Gave up after {self.MAX_ATTEMPTS} attempts")
+
+    async def deliver(self, content: str, embed: dict, image: Optional[EmbedImage] = None) -> FanOutResult:
+        """Post the same message to every webhook
+
+        An image that still needs uploading goes up with the first post only;
+        the other webhooks get an embed pointing at the uploaded copy.
+        """
+        payloads = {'current': {'content': content, 'embeds': [embed]}}
+
+        async def send(webhook: Webhook):
+            await self._post(webhook, payloads['current'])
+
+        if image is None or not image.needs_upload:
+            return await fan_out(self.webhooks, send, concurrency=self.concurrency, limiter=self.limiter)
+
+        async def upload(webhook: Webhook):
+            message = await self._post(webhook, payloads['current'], image)
+            attachments = (message or {}).get('attachments') or []
+            if attachments:
+                cdn_url = attachments[0]['url']
+                if self.image_cache is not None:
+                    self.image_cache.remember_upload(image, cdn_url)
+                payloads['current'] = {'content': content, 'embeds': [dict(embed, image={'url': cdn_url})]}
+
+        return await upload_then_fan_out(
+            self.webhooks, upload, send, concurrency=self.concurrency, limiter=self.limiter
+        )
+
+
+async def run_webhook_mode(config):
+    """Monitor the board and announce through webhooks, without a gateway connection"""
+    scraper = DailyTwistedScraper.from_config(config)
+    store = SnapshotStore(config.get_database_path())
+    monitor = BoardMonitor(scraper, store, StatusFeed.from_config(config))
+    delivery = WebhookDelivery(
+        scraper.get_session,
+        config.webhook_urls,
+        concurrency=config.announce_concurrency,
+        rate_limit=config.announce_rate_limit,
+        image_cache=ImageCache.from_config(config, scraper)
+    )
+    metrics_runner = None
+
+    async def announce(snapshot, reason: str) -> bool:
+        image = None
+        if delivery.image_cache is not None:
+            image = await delivery.image_cache.embed_image(snapshot.twisted, snapshot.image_url)
+        embed = build_announcement_embed(
+            snapshot.twisted, reason, image.url if image else snapshot.image_url, config.get_wiki_url(),
+            scraper.character_url(snapshot.twisted)
+        )
+        result = await delivery.deliver(config.get_ping_mentions(), embed, image)
+        metrics.observe('totb_announce_seconds', result.elapsed)
+        metrics.inc('totb_announce_deliveries_total', result.sent, result='sent')
+        metrics.inc('totb_announce_deliveries_total', len(result.failed), result='failed')
+        logger.info(
+            "Announced current twisted to %s/%s webhooks in %.2fs: %s",
+            result.sent, len(delivery.webhooks), result.elapsed, snapshot.twisted
+        )
+        return result.sent > 0
+
+    async def announce_watch_change(change):
+        result = await delivery.deliver('', build_watch_embed(change))
+        logger.info("Announced %s change to %s/%s webhooks", change.target.name, result.sent, len(delivery.webhooks))
+
+    watcher = Watcher.from_config(config, scraper.get_session, announce_watch_change)
+    elector = LeaderElector.from_config(config)
+    profiler = CycleProfiler.from_config(config)
+    loop_monitor = EventLoopLagMonitor()
+    loop_monitor.add_hook(
+        lambda label, stats: metrics.observe('totb_event_loop_lag_seconds', stats.max_lag, cycle=label)
+    )
+
+    async def on_elected():
+        monitor.following = False
+        if monitor.last_twisted is None and not monitor.restore_state():
+            # Nothing stored yet: take a baseline rather than announcing whatever is on the board
+            await monitor.load_initial_state()
+        if watcher is not None:
+            watcher.start()
+
+    async def on_demoted():
+        monitor.following = True
+        if watcher is not None:
+            await watcher.stop()
+
+    elector.on_elected(on_elected)
+    elector.on_demoted(on_demoted)
+
+    try:
+        if config.metrics_enabled:
+            metrics.enabled = True
+            if config.metrics_port:
+                metrics_runner = await start_metrics_server(config.metrics_port, config.metrics_host)
+
+        loop_monitor.start()
+        if profiler is not None:
+            profiler.start()
+            profiler.install_signal_handler()
+
+        logger.info("Webhook mode - delivering to %s webhooks", len(delivery.webhooks))
+        await elector.start()
+        monitor.following = not elector.is_leader
+        if not monitor.restore_state() and elector.is_leader:
+            await monitor.load_initial_state()
+        if watcher is not None and elector.is_leader:
+            watcher.start()
+
+        while True:
+            if not elector.is_leader:
+                monitor.follow()
+                await elector.wait_for_leadership(timeout=elector.ttl)
+                continue
+            await monitor.scheduler.sleep_until_due()
+            if elector.is_leader:
+                loop_monitor.reset()
+                profiled = profiler.cycle('monitor_twisted_board') if profiler is not None else nullcontext()
+                try:
+                    with profiled:
+                        await monitor.run_cycle(announce)
+                finally:
+                    lag = loop_monitor.report('monitor_twisted_board')
+                    logger.info("Event loop blocked for up to %.1f ms during this check", lag.max_lag * 1000)
+    finally:
+        loop_monitor.stop()
+        if profiler is not None:
+            profiler.dump()
+            profiler.stop()
+        await elector.stop()
+        if watcher is not None:
+            await watcher.stop()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await scraper.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    from config import Config
+    from utils import setup_logging
+
+    setup_logging()
+    asyncio.run(run_webhook_mode(Config()))
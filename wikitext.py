@@ -0,0 +1,73 @@
+import re
+from typing import Optional
+from urllib.parse import quote
+from board import WIKI_BASE_URL, WORD_PATTERN, BoardSnapshot, character_key, names_character, parse_timer_fields
+
+# [[Target|Label]] / [[Target]] -> Label / Target
+LINK_PATTERN = re.compile(r"\[\[(?!File:|Image:)(?:[^|\]]*\|)?([^\]]+)\]\]", re.IGNORECASE)
+FILE_LINK_PATTERN = re.compile(r"\[\[(?:File|Image):([^|\]]+)", re.IGNORECASE)
+TEMPLATE_PATTERN = re.compile(r"\{\{[^{}]*\}\}")
+OCCUPIED_PATTERN = re.compile(r"Currently,\s+the\s+board\s+is\s+occupied\s+by\s+(.+?)(?:\.|$|\n)", re.IGNORECASE)
+TIMER_PATTERN = re.compile(r"It will be (.+?) until the Daily Twisted Board changes", re.IGNORECASE)
+
+
+def wikitext_to_text(wikitext: str) -> str:
+    """Reduce wikitext to readable text, keeping link labels"""
+    text = FILE_LINK_PATTERN.sub('', wikitext)
+    text = LINK_PATTERN.sub(r'\1', text)
+    # Strip templates innermost first so nested ones go too
+    previous = None
+    while previous != text:
+        previous = text
+        text = TEMPLATE_PATTERN.sub('', text)
+    text = re.sub(r"'{2,}", '', text)
+    text = re.sub(r"<[^>]+>", '', text)
+    return text
+
+
+def file_url(file_name: str, base_url: str = WIKI_BASE_URL) -> str:
+    """URL that redirects to the original upload of a wiki file"""
+    return f"{base_url}/wiki/Special:FilePath/{quote(file_name.strip().replace(' ', '_'))}"
+
+
+def find_image_file(file_names, twisted_name: str) -> Optional[str]:
+    """Pick the file for a twisted, preferring files tagged as twisted"""
+    words = WORD_PATTERN.findall(character_key(twisted_name))
+    if not words:
+        return None
+
+    fallback = None
+    for file_name in file_names:
+        named, twisted = names_character(file_name.replace('_', ' '), words)
+        if named:
+            if twisted:
+                return file_name
+            if fallback is None:
+                fallback = file_name
+    return fallback
+
+
+def extract_wikitext_snapshot(wikitext: str, file_names=None, base_url: str = WIKI_BASE_URL) -> BoardSnapshot:
+    """Read the board straight from page wikitext, without building a DOM"""
+    text = wikitext_to_text(wikitext)
+
+    twisted = None
+    match = OCCUPIED_PATTERN.search(text)
+    if match:
+        twisted = re.sub(r'\s+', ' ', match.group(1).strip()).rstrip('.') or None
+
+    # The countdown is usually a template, so this only matches literal text
+    timer = None
+    match = TIMER_PATTERN.search(text)
+    if match:
+        timer = match.group(0).strip()
+
+    if file_names is None:
+        file_names = [name.strip() for name in FILE_LINK_PATTERN.findall(wikitext)]
+
+    snapshot = BoardSnapshot(twisted=twisted, timer=timer, timer_fields=parse_timer_fields(timer))
+    if twisted:
+        image_file = find_image_file(file_names, twisted)
+        if image_file:
+            snapshot.image_url = file_url(image_file, base_url)
+    return snapshot